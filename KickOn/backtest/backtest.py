@@ -1,44 +1,71 @@
 import os
 import re
-import requests
-import dateutil.parser
-import openai
+import sys
 import json
+import glob
+import time
+import argparse
+import threading
 from bs4 import BeautifulSoup, NavigableString
 from urllib.parse import quote_plus
-from datetime import datetime
-import feedparser
-import boto3
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+# 공용 모듈 (KickOn/common) — Lambda 이미지에서는 핸들러와 같은 위치에 복사됨
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import http_cache
+import html_parse
+import feature_store
+import features
+import model_backend
+import news_scoring
+import scoring
+import clients
+import name_index
+import dedupe
+import numpy as np
 import pandas as pd
-from sklearn.metrics import accuracy_score
 
 # ─────────────────────────────────────
 # 설정
 BASE_URL       = "https://www.transfermarkt.com"
-openai.api_key = ""
+# openai / feedparser / boto3 는 실제로 쓰는 모드(live)에서만 로드 — replay 워커 프로세스 시작이 빨라짐
 
-SM_RUNTIME        = boto3.client("sagemaker-runtime", region_name="ap-northeast-2")
-S3                = boto3.client("s3")
+S3                = clients.lazy("s3")
 BUCKET            = "kickon-ml-data-bucket"
 ARCHIVE_PREFIX = "EPL/Crawl_Data/archive/"
-POSITION_MAPPING  = {"Goalkeeper":0,"Defender":1,"Midfield":2,"Attack":3}
+
+# Transfermarkt 요청용 공유 session + 디스크 응답 캐시
+# KICKON_OFFLINE=1 이면 저장된 스냅샷(캐시)만으로 실행
+HDRS       = {"User-Agent":"Mozilla/5.0","Accept-Language":"en-US,en;q=0.9"}
+PAGE_CACHE = http_cache.from_env()
+
+# 기사별 GPT 점수 캐시 — 같은 기사는 다시 분류하지 않음 (KICKON_NEWS_CACHE=sqlite:/경로 로 실행 간 공유)
+NEWS = news_scoring.from_env()
 
 # ─────────────────────────────────────
+def fetch_html(url: str) -> str:
+    fetch = lambda u, headers: clients.http_session("transfermarkt", HDRS).get(u, headers=headers, timeout=(5, 30))
+    if PAGE_CACHE is not None:
+        return PAGE_CACHE.get(url, fetch)
+    resp = fetch(url, {}); resp.raise_for_status()
+    return resp.text
+
 def search_player_requests(player_name: str) -> BeautifulSoup:
     q    = quote_plus(player_name, safe='')
     url  = f"{BASE_URL}/schnellsuche/ergebnis/schnellsuche?query={q}"
-    hdrs = {"User-Agent":"Mozilla/5.0","Accept-Language":"en-US,en;q=0.9"}
-    resp = requests.get(url, headers=hdrs); resp.raise_for_status()
-    return BeautifulSoup(resp.text, "html.parser")
+    return html_parse.parse(fetch_html(url), region="items")
+
+def search_profile_path(player_name: str):
+    first = search_player_requests(player_name).select_one("table.items tbody tr td:nth-of-type(2) a")
+    return first["href"] if first else None
 
 def get_player_profile(player_name: str) -> dict:
-    prof = search_player_requests(player_name)
-    first = prof.select_one("table.items tbody tr td:nth-of-type(2) a")
-    if not first:
+    # 이름 색인(KICKON_NAME_INDEX) 에서 먼저 찾고, 없으면 빠른 검색
+    path, _  = name_index.resolve(player_name, search_profile_path)
+    if not path:
         raise ValueError(f"No results for '{player_name}'")
-    prof_url = BASE_URL + first["href"]
-    hdrs     = {"User-Agent":"Mozilla/5.0","Accept-Language":"en-US,en;q=0.9"}
-    prof     = BeautifulSoup(requests.get(prof_url, headers=hdrs).text, "html.parser")
+    prof_url = BASE_URL + path
+    prof     = html_parse.parse(fetch_html(prof_url), region="profile")
 
     spans = prof.select("span.info-table__content--regular")
     dob   = next((s for s in spans if "Date of birth/Age:" in s.get_text()), None)
@@ -73,154 +100,342 @@ def get_player_profile(player_name: str) -> dict:
         "rank": 0,
     }
 
-def to_timestamp(date_str: str, fmt: str = "%b %d, %Y") -> int:
-    if not date_str:
-        return 0
-    return int(datetime.strptime(date_str, fmt).timestamp())
-
-def map_position(pos_str: str) -> int:
-    return POSITION_MAPPING.get(pos_str, -1)
-
 def get_rss_summaries(player_name: str, max_entries: int = 5) -> list[dict]:
+    import feedparser
     q    = quote_plus(f"{player_name} transfer rumors")
     url  = f"https://news.google.com/rss/search?q={q}&hl=en-US&gl=US&ceid=US:en"
-    feed = feedparser.parse(url)
+    feed = feedparser.parse(clients.http_session("news", HDRS).get(url, timeout=(5, 15)).content)
     out  = []
     for entry in feed.entries[:max_entries]:
         summary = BeautifulSoup(entry.get("summary",""),"html.parser").get_text(" ",strip=True)
         out.append({"summary": summary})
     return out
 
-def classify_with_gpt(articles: list[dict]):
-    payloads = [f"ARTICLE_{i+1}\n\n{a['summary']}" for i,a in enumerate(articles)]
-    user_msg = "\n\n---\n\n".join(payloads)
-    system_prompt = """
-You are a football transfer prediction assistant.
-For each ARTICLE_i, estimate the 0–100 probability it reports a genuine transfer.
-Return ONLY valid JSON:
-{ "per_article":[12,55,88], "overall_probability":67 }
-""".strip()
-
-    max_tokens = 256
-    for _ in range(3):
-        resp = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            response_format={"type":"json_object"},
-            temperature=0.0,
-            max_tokens=max_tokens,
-            messages=[
-                {"role":"system", "content":system_prompt},
-                {"role":"user",   "content":user_msg},
-            ],
-        )
-        content = resp.choices[0].message.content
-        if resp.choices[0].finish_reason=="stop":
-            try:
-                data = json.loads(content)
-                return [p/100.0 for p in data["per_article"]], data["overall_probability"]/100.0
-            except:
-                pass
-        max_tokens *= 2
-    return [], 0.0
+def classify_with_gpt(articles: list[dict], player_name: str = ""):
+    return NEWS.score_articles(articles, player_name)
 
-def combine_fixed(base_prob, ai_score, w=0.1):
-    return w*base_prob + (1-w)*ai_score
+combine_fixed = scoring.combine_fixed
+combine       = scoring.combine   # 뉴스 점수가 없으면(None) 모델 확률만
 
 def handler(player_name: str) -> float:
-    info = get_player_profile(player_name)
-    features = {
-        "age": info["age"],
-        "market_value": float(re.sub(r"[^\d.]", "", info["market_value"] or "0")),
-        "joined_ts": to_timestamp(info["joined"]),
-        "expires_ts": to_timestamp(info["contract_exp"]),
-        "appearance": info["appearance"],
-        "goals": info["goals"],
-        "assists": info["assists"],
-        "rank": info["rank"],
-        "position": map_position(info["position"]),
-    }
-    csv_input = ",".join(str(features[k]) for k in [
-        "age","market_value","joined_ts","expires_ts",
-        "appearance","goals","assists","rank","position"
-    ])
-    resp      = SM_RUNTIME.invoke_endpoint(
-                   EndpointName="xgboost-kickon-endpoint-v9",
-                   ContentType="text/csv",
-                   Body=csv_input
-               )
-    base_prob = float(resp["Body"].read().decode())
-    _, ai_score = classify_with_gpt(get_rss_summaries(player_name))
-    return combine_fixed(base_prob, ai_score)
+    info      = get_player_profile(player_name)
+    base_prob = float(model_backend.predict(features.build_feature_matrix([info]))[0])
+    _, ai_score = classify_with_gpt(get_rss_summaries(player_name), player_name)
+    return combine(base_prob, ai_score)
+
+def score_player_live(player_name: str) -> dict:
+    """실시간 스크래핑 / 모델 / GPT 로 한 선수 점수. 받은 기사도 함께 반환 (replay 용 기록)"""
+    info      = get_player_profile(player_name)
+    base_prob = float(model_backend.predict(features.build_feature_matrix([info]))[0])
+    articles  = get_rss_summaries(player_name)
+    _, ai_score = classify_with_gpt(articles, player_name)
+    return {"base_prob": base_prob, "ai_score": ai_score, "articles": articles}
 
 def predict_transfer(player_name: str) -> float:
-    info = get_player_profile(player_name)
-    features = {
-        "age":         info["age"] if info["age"] is not None else 0,
-        "market_value": float(re.sub(r"[^\d.]", "", info["market_value"] or "0")),
-        "joined_ts":   to_timestamp(info["joined"]),    # to_timestamp 이미 None→0 처리됨
-        "expires_ts":  to_timestamp(info["contract_exp"]),
-        "appearance":  info["appearance"] or 0,
-        "goals":       info["goals"] or 0,
-        "assists":     info["assists"] or 0,
-        "rank":        info["rank"] or 0,
-        "position":    map_position(info["position"]),  # map_position(None)→-1
-    }
-    csv_input = ",".join(str(features[k]) for k in [
-        "age","market_value","joined_ts","expires_ts",
-        "appearance","goals","assists","rank","position"
-    ])
-    resp      = SM_RUNTIME.invoke_endpoint(
-                   EndpointName="xgboost-kickon-endpoint-v9",
-                   ContentType="text/csv",
-                   Body=csv_input
-               )
-    base_prob = float(resp["Body"].read().decode())
-    _, ai_score = classify_with_gpt(get_rss_summaries(player_name))
-    return combine_fixed(base_prob, ai_score)
+    res = score_player_live(player_name)
+    return combine(res["base_prob"], res["ai_score"])
 
 # ─────────────────────────────────────
-# 백테스트 실행
-if __name__ == "__main__":
-    START_KEY = "EPL/Crawl_Data/archive/team_0009_Aston Villa.csv"
-    _resume = False
-    # 1) S3에서 archive 폴더 밑 CSV 목록 가져오기
-    resp = S3.list_objects_v2(Bucket=BUCKET, Prefix=ARCHIVE_PREFIX)
-    for obj in resp.get("Contents", []):
-        key = obj["Key"]
-        if not key.lower().endswith(".csv"):
-            continue
-            
-        if not _resume:
-            if key != START_KEY:
-                print(f"▶ 스킵: {key}")
+# 백테스트 입력
+#   BACKTEST_SOURCE=feature_store 이면 Parquet feature store 에서 필요한 컬럼만 읽고,
+#   아니면 S3 archive 폴더의 팀 CSV 를 하나씩 읽는다
+BACKTEST_SOURCE = os.getenv("BACKTEST_SOURCE", "archive")
+
+def iter_test_sets():
+    """(라벨, DataFrame[name, transfer, ...]) 를 팀 단위로"""
+    if BACKTEST_SOURCE == "feature_store":
+        # 중복 제거 key 에 쓰는 컬럼까지. player_id 가 없는 예전 part 는 null → 행 해시 key 로 비교
+        df = feature_store.load(dedupe.HASH_COLUMNS + ["player_id", "league", "season", "team"])
+        df["player_id"] = df["player_id"].fillna("")
+        for (league, season, team), grp in df.groupby(["league", "season", "team"], sort=True):
+            yield f"{league}/{season}/{team}", grp.reset_index(drop=True)
+        return
+
+    # S3 archive 폴더 밑 CSV 를 하나씩 로드 (어디까지 했는지는 checkpoint 가 기억)
+    paginator = S3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=ARCHIVE_PREFIX):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if not key.lower().endswith(".csv"):
                 continue
-            else:
-                print(f"▶ 여기서부터 재개: {key}")
-                _resume = True
+            body = S3.get_object(Bucket=BUCKET, Key=key)["Body"]
+            yield key, pd.read_csv(body)
+
+# ─────────────────────────────────────
+# 재현 가능한 백테스트
+#   replay : 기록된 입력만 사용 — 팀 CSV 의 특성 + 기록된 뉴스(jsonl) + 로컬 모델. 네트워크 불필요
+#   live   : 선수마다 실시간 스크래핑 / 모델 / GPT (--news 를 주면 받은 기사를 기록해 replay 에 재사용)
+#   결과는 선수 단위로 checkpoint(jsonl) 에 한 줄씩 추가 → 다시 실행하면 끝난 선수는 건너뛴다
+DATA_DIR   = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CHECKPOINT = os.getenv("BACKTEST_CHECKPOINT", "backtest_checkpoint.jsonl")
+REPORT     = os.getenv("BACKTEST_REPORT", "backtest_report.json")
 
+class JsonlWriter:
+    """여러 스레드에서 한 줄씩 append (줄마다 flush → 중간에 끊겨도 끝난 줄은 남음)"""
 
-        print(f"\n=== Testing file: {key} ===")
-        # 2) 해당 파일 로드
-        body = S3.get_object(Bucket=BUCKET, Key=key)["Body"]
-        df   = pd.read_csv(body)
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.fp   = open(path, "a+", encoding="utf-8")
+        # 이전 실행이 줄 중간에서 끊겼으면 새 줄부터 시작
+        if self.fp.tell() > 0:
+            self.fp.seek(self.fp.tell() - 1)
+            if self.fp.read(1) != "\n":
+                self.fp.write("\n")
 
-        # required columns: ['name','transfer']
-        y_true, y_pred = [], []
-        for _, row in df.iterrows():
-            name   = row["name"]
-            actual = int(row["transfer"])
+    def write(self, rec: dict):
+        with self.lock:
+            self.fp.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self.fp.flush()
+
+    def close(self):
+        self.fp.close()
+
+def read_jsonl(path: str) -> list[dict]:
+    if not path or not os.path.exists(path):
+        return []
+    out = []
+    with open(path, encoding="utf-8") as fp:
+        for line in fp:
             try:
-                prob = predict_transfer(name)
-            except Exception as e:
-                print(f"⚠️ {name} skipped: {e}")
-                continue
-            pred = 1 if prob >= 0.6 else 0
-            y_true.append(actual)
-            y_pred.append(pred)
-            print(f"{name:20s} → prob={prob:.3f}, pred={pred}, actual={actual}")
-
-        if y_pred:
-            acc = accuracy_score(y_true, y_pred)
-            print(f"\n▶ {key} 백테스트 정확도: {acc:.3f}")
+                out.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue   # 끊기면서 잘린 마지막 줄
+    return out
+
+def done_rows(records: list[dict]) -> dict:
+    """{파일: {끝난 row 번호}} — 오류로 끝난 행은 다시 시도"""
+    out = {}
+    for rec in records:
+        if rec.get("error") is None:
+            out.setdefault(rec["file"], set()).add(rec["row"])
+    return out
+
+def load_news_record(path: str) -> dict:
+    """기록된 뉴스 {"name": ..., "articles": [...]} jsonl → {선수: 기사 목록} (뒤에 기록된 것이 우선)"""
+    return {rec["name"]: rec["articles"] for rec in read_jsonl(path)}
+
+# replay 작업자(스레드 / 프로세스)별로 한 번만 만드는 모델 / 뉴스 점수기
+_replay_state = {}
+_replay_lock  = threading.Lock()
+
+# 크롤러의 transfer 라벨은 입단일(joined)로 정해진다 (transfer_label_from_joined) — 입단일 / 계약 만료일을
+# 특성으로 쓰면 라벨을 그대로 외우므로 crossfit 학습에서는 뺀다
+LEAKY_COLUMNS    = ["joined_ts", "expires_ts"]
+CROSSFIT_COLUMNS = [c for c in features.FEATURE_COLUMNS if c not in LEAKY_COLUMNS]
+
+def check_leakage(matrix: pd.DataFrame, label) -> None:
+    """한 특성의 임계값 하나로 라벨이 완전히 갈리면 (라벨 누수) ValueError"""
+    label = np.asarray(label)
+    if label.min() == label.max():
+        return
+    for col in matrix.columns:
+        x = matrix[col].to_numpy()
+        neg, pos = x[label == 0], x[label == 1]
+        if neg.max() < pos.min() or pos.max() < neg.min():
+            raise ValueError(f"feature {col!r} separates the label perfectly — label leak, "
+                             f"results would be meaningless")
+
+def crossfit_model(paths: list, hold_out: str):
+    """
+    hold_out 을 뺀 나머지 팀 CSV 로 학습한 XGBoost (모델 산출물이 없을 때의 로컬 기준선).
+    라벨을 만드는 날짜 특성(LEAKY_COLUMNS)은 빼고, 남은 특성에 누수가 있으면 학습하지 않는다
+    """
+    import xgboost as xgb
+    # 평가 팀에도 있는 선수 행(중복 업로드 / 같은 시즌 이적)은 학습에서 빼야 정보가 새지 않는다
+    seen  = set(dedupe.row_key(r) for r in pd.read_csv(hold_out).to_dict("records"))
+    train = pd.concat([pd.read_csv(p) for p in paths if p != hold_out], ignore_index=True)
+    train = train[dedupe.first_occurrences(train.to_dict("records"), seen=seen)]
+    matrix = features.build_feature_matrix(train)[CROSSFIT_COLUMNS]
+    label  = features.integers(train["transfer"])
+    check_leakage(matrix, label)
+    dtrain = xgb.DMatrix(matrix.to_numpy("float32"), label=label)
+    booster = xgb.train({"objective": "binary:logistic", "max_depth": 4, "eta": 0.1, "seed": 0},
+                        dtrain, num_boost_round=100)
+    return model_backend.LocalModel(booster=booster, columns=CROSSFIT_COLUMNS)
+
+def replay_state(opts: dict) -> dict:
+    with _replay_lock:
+        if not _replay_state:
+            news_model = news_scoring.StubModel() if opts["news_model"] == "stub" else None
+            _replay_state["news"]    = load_news_record(opts["news"])
+            _replay_state["scorer"]  = news_scoring.NewsScorer(
+                model=news_model, store=news_scoring.kv_store.from_uri(news_scoring.CACHE_URI))
+            if opts["model"] == "local":
+                _replay_state["model"] = model_backend.LocalModel()
+            elif opts["model"] == "endpoint":
+                _replay_state["model"] = model_backend.EndpointModel()
+        return _replay_state
+
+def replay_file(path: str, paths: list, opts: dict, skip: set) -> list[dict]:
+    """팀 CSV 하나: 모델은 팀 전체를 한 번에, 뉴스는 기록이 있는 선수만 묶어서 점수"""
+    state = replay_state(opts)
+    label = os.path.basename(path)
+    df    = pd.read_csv(path)
+    df    = df[~df.index.isin(skip)]
+    if df.empty:
+        return []
+    model = state.get("model") or crossfit_model(paths, path)
+    base  = model.predict(features.build_feature_matrix(df))
+
+    names  = [str(n) for n in df["name"]]
+    arts   = {n: state["news"][n] for n in names if state["news"].get(n)}
+    scored = state["scorer"].score_players(arts) if arts else {}
+
+    out = []
+    for row, name, actual, b in zip(df.index, names, df["transfer"], base):
+        ai = scored[name]["overall"] if name in scored else None
+        out.append({
+            "file": label, "row": int(row), "name": name, "transfer": int(actual),
+            "base_prob": float(b), "ai_score": ai,
+            # 기록된 뉴스가 없는 선수는 모델 확률만 (예측 API 의 model_only 와 같음)
+            "prob": combine(float(b), ai),
+            "error": None,
+        })
+    return out
+
+def duplicate_rows(paths: list) -> dict:
+    """{파일: {앞 파일에 이미 나온 행 번호}} — 팀 파일끼리 겹치는 선수는 한 번만 평가"""
+    seen, out = set(), {}
+    for p in paths:
+        first = dedupe.first_occurrences(pd.read_csv(p).to_dict("records"), seen=seen)
+        out[os.path.basename(p)] = {i for i, f in enumerate(first) if not f}
+    return out
+
+def season_of(label: str):
+    """'.../GB1/2023/team_0001_팀.csv' / 'GB1/2023/팀' → '2023' (경로에 시즌이 없으면 None)"""
+    m = re.search(r"/(\d{4})/", f"/{label}")
+    return m.group(1) if m else None
+
+def run_replay(data_dir: str, opts: dict, workers: int, executor: str, writer, done: dict) -> int:
+    paths = sorted(glob.glob(os.path.join(data_dir, "*.csv")))
+    Pool  = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    dupes = duplicate_rows(paths)
+    print(f"▶ 중복 행 {sum(map(len, dupes.values()))}개 제외")
+    n = 0
+    with Pool(max_workers=workers) as pool:
+        futs = {pool.submit(replay_file, p, paths, opts,
+                            done.get(os.path.basename(p), set()) | dupes[os.path.basename(p)]): p
+                for p in paths}
+        for fut in as_completed(futs):
+            recs = fut.result()
+            for rec in recs:
+                writer.write(rec)
+            n += len(recs)
+            print(f"▶ {os.path.basename(futs[fut])}: {len(recs)}명")
+    return n
+
+def live_row(label: str, row: int, name: str, actual: int, news_writer) -> dict:
+    rec = {"file": label, "row": row, "name": name, "transfer": actual}
+    try:
+        res = score_player_live(name)
+    except Exception as e:
+        print(f"⚠️ {name} skipped: {e}")
+        return {**rec, "error": str(e)}
+    if news_writer is not None:
+        news_writer.write({"name": name, "articles": res["articles"]})
+    prob = combine(res["base_prob"], res["ai_score"])
+    print(f"{name:20s} → prob={prob:.3f}, actual={actual}")
+    return {**rec, "base_prob": res["base_prob"], "ai_score": res["ai_score"], "prob": prob, "error": None}
+
+def run_live(workers: int, writer, done: dict, news_path: str = None) -> int:
+    news_writer = JsonlWriter(news_path) if news_path else None
+    n, seen = 0, set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for label, df in iter_test_sets():
+            skip  = done.get(label, set())
+            first = dedupe.first_occurrences(df.to_dict("records"), season_of(label), seen)
+            futs = [pool.submit(live_row, label, int(i), str(r["name"]), int(r["transfer"]), news_writer)
+                    for (i, r), f in zip(df.iterrows(), first) if f and int(i) not in skip]
+            for fut in as_completed(futs):
+                writer.write(fut.result())
+                n += 1
+    if news_writer is not None:
+        news_writer.close()
+    return n
+
+def report(records: list[dict], weights=scoring.WEIGHTS, thresholds=scoring.THRESHOLDS,
+           objective: str = "accuracy", path: str = None) -> dict:
+    """
+    checkpoint 전체(이전 실행 포함)의 base_prob / ai_score 로 파일별 / 전체 지표를 다시 계산.
+    가중치 × 임계값 격자는 scoring.evaluate 에서 한 번에 — 모델 / GPT 를 다시 부르지 않는다.
+    """
+    df = pd.DataFrame([r for r in records if r.get("error") is None])
+    if df.empty:
+        print("▶ No valid predictions.")
+        return {}
+    ai = pd.to_numeric(df["ai_score"], errors="coerce").to_numpy()
+    df["ai"] = ai
+
+    def evaluate(grp):
+        return scoring.evaluate(grp["transfer"].to_numpy(), grp["base_prob"].to_numpy(), grp["ai"].to_numpy(),
+                                weights, thresholds, objective=objective)
+
+    out = {"files": {label: evaluate(grp) for label, grp in df.groupby("file", sort=True)},
+           "overall": evaluate(df)}
+    for label, res in list(out["files"].items()) + [("전체", out["overall"])]:
+        d, b = res["default"], res["best"]
+        auc = "-" if d["roc_auc"] is None else f"{d['roc_auc']:.3f}"
+        print(f"▶ {label} ({res['n']}명) acc={d['accuracy']:.3f} prec={d['precision']:.3f} "
+              f"rec={d['recall']:.3f} auc={auc} | best w={b['w']:.2f} t={b['threshold']:.2f} "
+              f"{objective}={b[objective]:.3f}")
+    print(f"▶ 전체 보정 오차(ECE, best w): {out['overall']['calibration']['ece']:.4f}")
+
+    if path:
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(out, fp, ensure_ascii=False, indent=1)
+        print(f"▶ 지표 저장: {path}")
+    return out
+
+# ─────────────────────────────────────
+# 백테스트 실행
+#   python backtest.py                              # replay: backtest/data/*.csv, 교차 학습 모델, 네트워크 없음
+#   python backtest.py --model local --news news.jsonl --news-model stub --workers 4 --executor process
+#   python backtest.py --mode live --news news.jsonl # 실시간 호출 + 뉴스 기록
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=["replay", "live"], default="replay")
+    ap.add_argument("--data", default=DATA_DIR, help="replay 입력 팀 CSV 폴더")
+    ap.add_argument("--model", choices=["crossfit", "local", "endpoint"], default="crossfit",
+                    help="replay 모델: crossfit=나머지 팀으로 학습, local=KICKON_MODEL_URI, endpoint=SageMaker")
+    ap.add_argument("--news", default=None, help="기록된 뉴스 jsonl (live 에서는 기록할 경로)")
+    ap.add_argument("--news-model", choices=["stub", "openai"], default="stub",
+                    help="replay 에서 캐시에 없는 기사를 점수 매길 모델")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    ap.add_argument("--executor", choices=["thread", "process"], default="thread")
+    ap.add_argument("--checkpoint", default=CHECKPOINT)
+    ap.add_argument("--fresh", action="store_true", help="checkpoint 를 지우고 처음부터")
+    ap.add_argument("--evaluate-only", action="store_true", help="점수 계산 없이 checkpoint 로 지표만 다시 계산")
+    ap.add_argument("--objective", choices=["accuracy", "f1", "precision", "recall"], default="accuracy",
+                    help="best (가중치, 임계값) 을 고르는 기준")
+    ap.add_argument("--report", default=REPORT)
+    args = ap.parse_args()
+
+    if args.evaluate_only:
+        report(read_jsonl(args.checkpoint), objective=args.objective, path=args.report)
+        sys.exit(0)
+
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    done = done_rows(read_jsonl(args.checkpoint))
+    if done:
+        print(f"▶ checkpoint 에서 재개: {sum(len(v) for v in done.values())}명 완료")
+
+    writer = JsonlWriter(args.checkpoint)
+    start  = time.perf_counter()
+    try:
+        if args.mode == "replay":
+            opts = {"model": args.model, "news": args.news, "news_model": args.news_model}
+            n = run_replay(args.data, opts, args.workers, args.executor, writer, done)
         else:
-            print("▶ No valid predictions for this file.")
+            n = run_live(args.workers, writer, done, args.news)
+    finally:
+        writer.close()
+    print(f"▶ 이번 실행 {n}명, {time.perf_counter() - start:.1f}s\n")
+
+    report(read_jsonl(args.checkpoint), objective=args.objective, path=args.report)
+    if PAGE_CACHE is not None:
+        print(f"\n▶ http_cache {json.dumps(PAGE_CACHE.stats())}")
+    # process 실행기면 뉴스 점수기는 작업자 프로세스에 있어 여기서는 보이지 않음
+    scorer = _replay_state.get("scorer") if args.mode == "replay" else NEWS
+    if scorer is not None:
+        print(f"▶ news {json.dumps(scorer.stats())}")
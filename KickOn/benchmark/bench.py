@@ -0,0 +1,286 @@
+"""
+크롤링 / 파싱 / 특성 변환 / 예측 핫 패스 벤치마크 (네트워크 없음)
+
+    python bench.py [--repeat N] [--players N] [--only case1,case2] [--baseline FILE] [--fail-on-regression]
+
+입력: backtest/data 팀 CSV, 그 행으로 만든 합성 HTML (fixtures.py)
+외부 호출: S3 / SageMaker / OpenAI / 게시판 API 는 stubs.py 의 로컬 스텁
+출력: 케이스별 처리량(ops/s), 지연 시간 p50 / p95 / p99 (ms), 최대 메모리(KB)
+결과는 results/{커밋}.json 으로 저장하고, 직전 결과(또는 --baseline)와 비교해
+p50 이 REGRESSION_PCT 이상 느려진 케이스를 표시한다.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+for sub in ("common", "crawler", "predict", "preprocessing"):
+    sys.path.append(os.path.join(ROOT, sub))
+
+# import 전에: 디스크 캐시 / 예측 캐시 / 뉴스 캐시 / 이름 색인 끄기, 모델은 endpoint(스텁)
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+os.environ["KICKON_HTTP_CACHE"]    = "0"
+os.environ["PREDICT_CACHE"]        = "off"
+os.environ["KICKON_NEWS_CACHE"]    = "off"
+os.environ["KICKON_MODEL_BACKEND"] = "endpoint"
+os.environ["KICKON_NAME_INDEX"]    = "off"
+
+import openai
+import fixtures
+import stubs
+import features
+import feature_store
+import model_backend
+import news_scoring
+import name_index
+import board_client
+import crawl
+import predict
+import preprocessing
+
+RESULTS_DIR    = os.path.join(HERE, "results")
+REGRESSION_PCT = 20.0
+ARTICLES = [
+    {"summary": "Club in talks over a summer move, bid expected", "url": "https://news/1", "published": ""},
+    {"summary": "Player happy to stay, new deal discussed",       "url": "https://news/2", "published": ""},
+    {"summary": "Agent confirms interest from several clubs",     "url": "https://news/3", "published": ""},
+]
+
+
+# ─── 공통 측정 ───
+def measure(fn, items: list, repeat: int) -> dict:
+    """items 각각에 fn 을 repeat 번. 시간은 tracemalloc 없이, 메모리는 별도 1회 실행으로 잰다"""
+    lat = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            fn(item)
+            lat.append(time.perf_counter() - t0)
+    total = time.perf_counter() - start
+
+    tracemalloc.start()
+    for item in items:
+        fn(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    ms = np.array(lat) * 1000
+    return {
+        "ops":        len(lat),
+        "total_s":    round(total, 4),
+        "ops_per_s":  round(len(lat) / total, 2) if total else None,
+        "p50_ms":     round(float(np.percentile(ms, 50)), 3),
+        "p95_ms":     round(float(np.percentile(ms, 95)), 3),
+        "p99_ms":     round(float(np.percentile(ms, 99)), 3),
+        "peak_kb":    round(peak / 1024, 1),
+    }
+
+
+# ─── 스텁 연결 ───
+class Env:
+    def __init__(self, players: int):
+        self.rows  = fixtures.load_rows()
+        self.sample = self.rows.head(players).reset_index(drop=True)
+        self.pages = fixtures.site(self.sample)
+        self.urls  = [fixtures.profile_url(r, i) for i, r in self.sample.iterrows()]
+        self.s3    = stubs.StubS3()
+        self.sm    = stubs.StubSageMakerRuntime()
+        self.chat  = stubs.StubChatCompletion()
+
+        crawl.http_get         = lambda url, timeout=None: self.pages[url]
+        crawl.s3               = self.s3
+        preprocessing.s3       = self.s3
+        feature_store.available = lambda: False
+        predict.fetch_html     = lambda url: self.pages[url]
+        predict.get_rss_summaries = lambda name, max_entries=5: [
+            {**a, "summary": f"{name}: {a['summary']}"} for a in ARTICLES[:max_entries]]
+        openai.ChatCompletion  = self.chat
+        model_backend._model   = model_backend.EndpointModel(client=self.sm)
+        predict.NEWS           = news_scoring.NewsScorer(model=news_scoring.OpenAIChatModel())
+
+    def records(self) -> list:
+        """크롤러 레코드 형태 (features 변환 전 원본 필드)"""
+        out = []
+        for url in self.urls:
+            rec = crawl.fetch_player_info(url, "GB1", "2023")
+            out.append(rec)
+        return out
+
+    def seed_raw(self, teams: int = 10):
+        for key in [k for b, k in self.s3.objects if k.startswith(preprocessing.PROCESSED_PREFIX)]:
+            self.s3.objects.pop((preprocessing.BUCKET, key), None)
+        for name, grp in list(self.rows.groupby("file", sort=True))[:teams]:
+            body = grp.drop(columns=["file"]).to_csv(index=False).encode("utf-8")
+            self.s3.put_object(Bucket=preprocessing.BUCKET, Key=f"{preprocessing.RAW_PREFIX}GB1/2023/{name}", Body=body)
+
+
+# ─── 케이스 ───
+def case_parse_crawler(env, repeat):
+    return measure(lambda url: crawl.fetch_player_info(url, "GB1", "2023"), env.urls, repeat)
+
+def case_parse_predict(env, repeat):
+    names = [str(n) for n in env.sample["name"]]
+    return measure(predict.get_player_profile, names, repeat)
+
+def case_features(env, repeat):
+    return measure(features.build_feature_matrix, [env.rows], repeat)
+
+def case_name_index(env, repeat):
+    # 전체 행으로 색인을 만들고, 대문자 / 성만 / 오타 섞인 이름으로 조회
+    index = name_index.NameIndex()
+    for i, row in env.rows.iterrows():
+        index.add(str(row["name"]), fixtures.profile_url(row, i))
+    names = [str(n) for n in env.sample["name"]]
+    queries = [n.upper() for n in names] + [n.split()[-1] for n in names] + [n[:-1] for n in names]
+    return measure(index.lookup, queries, repeat)
+
+def case_csv_save(env, repeat):
+    recs  = env.records()
+    shard = {"competition": "GB1", "season": "2023", "team_idx": 0}
+    return measure(lambda r: crawl.save_team_results_csv(shard, "Bench FC", r, 1), [recs], repeat)
+
+def case_csv_append(env, repeat):
+    recs  = env.records()
+    shard = {"competition": "GB1", "season": "2023", "team_idx": 1}
+    key   = crawl.team_csv_key(shard, "Bench FC")
+
+    def run(rs):
+        env.s3.delete_object(Bucket=crawl.BUCKET, Key=key)
+        for rec in rs:
+            crawl.append_player_to_csv(shard, "Bench FC", rec, 1)
+    return measure(run, [recs], repeat)
+
+def case_preprocess(env, repeat):
+    def run(_):
+        env.seed_raw()
+        preprocessing.lambda_handler({}, None)
+    return measure(run, [None], repeat)
+
+def case_predict_single(env, repeat):
+    names = [str(n) for n in env.sample["name"]]
+    return measure(lambda n: predict.handler({"queryStringParameters": {"player_name": n}}, None), names, repeat)
+
+def case_predict_batch(env, repeat):
+    names = list(dict.fromkeys(str(n) for n in env.sample["name"]))[:predict.MAX_BATCH]
+    return measure(lambda ns: predict.handler({"player_names": ns}, None), [names], repeat)
+
+def _case_board(concurrency: int):
+    """게시판 스텁(요청당 20ms, 7번째마다 503) 에 글 20개 등록 — 재시도 대기는 1ms"""
+    def case(env, repeat):
+        posts = [{"team": 37, "title": f"벤치 제목 {i}", "contents": "내용"} for i in range(20)]
+        def run(_):
+            board  = stubs.StubBoardAPI(latency=0.02, fail_every=7)
+            client = board_client.BoardClient("https://board/posts", "token", session=board,
+                                              concurrency=concurrency, backoff=0.001)
+            client.publish([(p, board_client.idempotency_key(p)) for p in posts])
+        return measure(run, [None], repeat)
+    return case
+
+CASES = {
+    "parse.fetch_player_info":    case_parse_crawler,
+    "parse.get_player_profile":   case_parse_predict,
+    "features.build_matrix":      case_features,
+    "name_index.lookup":          case_name_index,
+    "csv.save_team_results":      case_csv_save,
+    "csv.append_player":          case_csv_append,
+    "preprocess.lambda_handler":  case_preprocess,
+    "predict.single":             case_predict_single,
+    "predict.batch":              case_predict_batch,
+    "board.publish_serial":       _case_board(1),
+    "board.publish":              _case_board(board_client.CONCURRENCY),
+}
+
+
+# ─── 저장 / 비교 ───
+def git_commit() -> str:
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD"], cwd=HERE) != 0
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "local"
+
+def latest_result(exclude: str):
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    files = [os.path.join(RESULTS_DIR, f) for f in os.listdir(RESULTS_DIR)
+             if f.endswith(".json") and os.path.join(RESULTS_DIR, f) != exclude]
+    return max(files, key=os.path.getmtime) if files else None
+
+def compare(current: dict, baseline: dict) -> list:
+    """p50 이 REGRESSION_PCT 이상 느려진 케이스 이름"""
+    regressions = []
+    print(f"\n▶ 비교 기준: {baseline.get('commit')}")
+    for name, cur in current["cases"].items():
+        old = baseline.get("cases", {}).get(name)
+        if not old:
+            continue
+        change = (cur["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+        flag = "REGRESSION" if change >= REGRESSION_PCT else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:28s} p50 {old['p50_ms']:9.3f} → {cur['p50_ms']:9.3f} ms ({change:+6.1f}%) {flag}")
+    return regressions
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--players", type=int, default=40, help="파싱 / 예측 케이스에 쓸 선수 수")
+    ap.add_argument("--only", default="", help="쉼표로 구분한 케이스 이름 (접두어 가능)")
+    ap.add_argument("--baseline", default=None)
+    ap.add_argument("--fail-on-regression", action="store_true")
+    ap.add_argument("--no-save", action="store_true")
+    args = ap.parse_args()
+
+    env = Env(args.players)
+    only = [o for o in args.only.split(",") if o]
+    result = {
+        "commit":    git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python":    platform.python_version(),
+        "params":    {"repeat": args.repeat, "players": args.players},
+        "cases":     {},
+    }
+
+    # 출력을 줄이기 위해 예측 / 전처리 로그는 케이스 실행 동안 버린다
+    print(f"{'case':28s} {'ops':>6s} {'ops/s':>10s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'peak KB':>10s}")
+    for name, case in CASES.items():
+        if only and not any(name.startswith(o) for o in only):
+            continue
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                res = case(env, args.repeat)
+            finally:
+                sys.stdout = stdout
+        result["cases"][name] = res
+        print(f"{name:28s} {res['ops']:6d} {res['ops_per_s']:10.1f} {res['p50_ms']:9.3f} "
+              f"{res['p95_ms']:9.3f} {res['p99_ms']:9.3f} {res['peak_kb']:10.1f}")
+    print(f"\n▶ 스텁 호출: s3={env.s3.calls} sagemaker={env.sm.calls} (rows={env.sm.rows}) openai={env.chat.calls}")
+
+    path = None
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{result['commit']}.json")
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(result, fp, indent=1)
+        print(f"▶ 저장: {path}")
+
+    base_path = args.baseline or latest_result(exclude=path)
+    regressions = []
+    if base_path:
+        with open(base_path, encoding="utf-8") as fp:
+            regressions = compare(result, json.load(fp))
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
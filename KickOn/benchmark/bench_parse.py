@@ -0,0 +1,88 @@
+"""
+저장된 HTML 로 파서 백엔드 / 영역 파싱 속도 비교
+
+    python bench_parse.py [FIXTURE_DIR] [--repeat N]
+
+FIXTURE_DIR 기본값은 크롤러 응답 캐시(KICKON_HTTP_CACHE_DIR).
+캐시 항목은 옆의 .json 메타의 page_type 으로, 그 외 파일은 "{page_type}_*.html"
+이름 규칙으로 페이지 종류를 판단한다.
+기준(html.parser + 문서 전체)과 각 백엔드(영역 파싱)의 추출 결과가 다르면 종료 코드 1.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from collections import defaultdict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import http_cache
+import html_parse
+
+BASE_URL = "https://www.transfermarkt.com"
+
+EXTRACTORS = {
+    "profile":     html_parse.extract_player_profile,
+    "performance": html_parse.extract_performance,
+    "squad":       lambda html, **kw: html_parse.extract_player_links(html, BASE_URL, **kw),
+    "league":      lambda html, **kw: html_parse.extract_team_links(html, BASE_URL, **kw),
+    "search":      html_parse.extract_search_first_link,
+}
+
+def available_backends() -> list:
+    return ["html.parser"] + (["lxml"] if importlib.util.find_spec("lxml") is not None else [])
+
+def load_fixtures(root: str) -> dict:
+    """{page_type: [html, ...]}"""
+    out = defaultdict(list)
+    for dirpath, _, files in os.walk(root):
+        for f in sorted(files):
+            if not f.endswith(".html"):
+                continue
+            path = os.path.join(dirpath, f)
+            meta = path[:-5] + ".json"
+            if os.path.exists(meta):
+                with open(meta, encoding="utf-8") as fp:
+                    kind = json.load(fp).get("page_type")
+            else:
+                kind = f.split("_", 1)[0]
+            if kind in EXTRACTORS:
+                with open(path, encoding="utf-8") as fp:
+                    out[kind].append(fp.read())
+    return out
+
+def time_extract(fn, pages: list, repeat: int, **kw) -> tuple:
+    """(페이지당 평균 ms, 마지막 반복의 추출 결과)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [fn(html, **kw) for html in pages]
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / (repeat * len(pages)), results
+
+def run(root: str, repeat: int) -> int:
+    fixtures = load_fixtures(root)
+    if not fixtures:
+        print(f"▶ {root} 에 HTML 픽스처가 없습니다 (크롤러를 한 번 실행하면 캐시에 쌓입니다)")
+        return 0
+
+    mismatches = 0
+    print(f"{'page':12s} {'n':>4s} {'backend':20s} {'ms/page':>9s} {'speed-up':>9s}  fields")
+    for kind, pages in sorted(fixtures.items()):
+        fn = EXTRACTORS[kind]
+        base_ms, expected = time_extract(fn, pages, repeat, parser="html.parser", strain=False)
+        print(f"{kind:12s} {len(pages):4d} {'html.parser (full)':20s} {base_ms:9.2f} {1.0:8.2f}x  -")
+        for backend in available_backends():
+            ms, got = time_extract(fn, pages, repeat, parser=backend, strain=True)
+            same = got == expected
+            mismatches += not same
+            print(f"{kind:12s} {len(pages):4d} {backend + ' (region)':20s} {ms:9.2f} "
+                  f"{base_ms / ms:8.2f}x  {'identical' if same else 'MISMATCH'}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("fixtures", nargs="?", default=http_cache.CACHE_DIR)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+    sys.exit(run(args.fixtures, args.repeat))
@@ -0,0 +1,134 @@
+"""
+Lambda 핸들러별 cold start / import 시간 예산 확인 (네트워크 없음)
+
+    python coldstart.py [--runs N] [--only predict,crawl] [--fail-on-budget]
+
+핸들러마다 새 파이썬 프로세스를 runs 번 띄워
+  - import_ms     : 핸들러 모듈 import 시간 (Lambda init 단계에 해당)
+  - first_call_ms : 가장 가벼운 요청 한 번 (OPTIONS / clear / 빈 버킷 전처리 / 진행 상태 초기화)
+  - modules       : 그때까지 로드된 모듈 수
+의 중앙값을 재고, import 시간이 BUDGET_MS 를 넘는 핸들러를 표시한다.
+가장 무거운 import 는 python -X importtime 결과에서 뽑아 함께 출력한다.
+S3 는 stubs.StubS3 로 바꿔 호출한다.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+
+# 핸들러 → (디렉터리, 모듈, 함수, 가벼운 요청, S3 스텁 연결 여부)
+HANDLERS = {
+    "predict":       ("predict",       "predict",       "handler",        {"httpMethod": "OPTIONS"}, False),
+    "crawl":         ("crawler",       "crawl",         "lambda_handler", {"reset": True},           True),
+    "preprocessing": ("preprocessing", "preprocessing", "lambda_handler", {},                        True),
+    "post_ai":       ("postai",        "post_ai",       "lambda_handler", {"action": "clear"},       False),
+}
+
+# import 시간 예산 (ms). 기본 설정(endpoint 백엔드)의 측정값에 여유를 둔 값
+BUDGET_MS = {
+    "predict":       800,
+    "crawl":         950,
+    "preprocessing": 800,
+    "post_ai":       150,
+}
+
+CHILD = r"""
+import os, sys, time, json
+t0 = time.perf_counter()
+sys.path.insert(0, {path!r})
+import {module} as m
+t1 = time.perf_counter()
+if {stub_s3!r}:
+    sys.path.insert(0, {here!r})
+    import stubs
+    m.s3 = stubs.StubS3()
+t2 = time.perf_counter()
+out = getattr(m, {func!r})({event!r}, None)
+t3 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1000, "first_call_ms": (t3 - t2) * 1000,
+                  "modules": len(sys.modules), "status": out.get("statusCode")}}))
+"""
+
+CHILD_ENV = {
+    "AWS_DEFAULT_REGION": "ap-northeast-2",
+    "KICKON_HTTP_CACHE":  "0",
+    "KICKON_METRICS":     "0",
+    "KICKON_TITLE_STORE": "memory",
+    "PYTHONDONTWRITEBYTECODE": "1",
+}
+
+
+def run_child(name: str) -> dict:
+    sub, module, func, event, stub_s3 = HANDLERS[name]
+    path = os.path.join(ROOT, sub)
+    code = CHILD.format(path=path, module=module, func=func, event=event, stub_s3=stub_s3, here=HERE)
+    out = subprocess.run([sys.executable, "-c", code], cwd=path, env={**os.environ, **CHILD_ENV},
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def top_imports(name: str, n: int = 5) -> list:
+    """python -X importtime 에서 핸들러 모듈이 직접 import 한 모듈 중 누적 시간 상위 n 개"""
+    sub, module, *_ = HANDLERS[name]
+    path = os.path.join(ROOT, sub)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=path,
+                         env={**os.environ, **CHILD_ENV}, capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, mod = line.split("|", 2)
+        if len(mod) - len(mod.lstrip()) == 3:   # 핸들러 모듈 바로 아래 (들여쓰기 한 단계)
+            rows.append((int(cumulative) / 1000, mod.strip()))
+    rows.sort(reverse=True)
+    return [[m, round(ms, 1)] for ms, m in rows[:n]]
+
+
+def measure(name: str, runs: int) -> dict:
+    samples = [run_child(name) for _ in range(runs)]
+    return {
+        "import_ms":     round(statistics.median(s["import_ms"] for s in samples), 1),
+        "first_call_ms": round(statistics.median(s["first_call_ms"] for s in samples), 1),
+        "modules":       samples[-1]["modules"],
+        "status":        samples[-1]["status"],
+        "budget_ms":     BUDGET_MS.get(name),
+        "top_imports":   top_imports(name),
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--only", default="", help="쉼표로 구분한 핸들러 이름")
+    ap.add_argument("--json", default=None, help="결과를 저장할 파일")
+    ap.add_argument("--fail-on-budget", action="store_true")
+    args = ap.parse_args()
+
+    only = [o for o in args.only.split(",") if o]
+    results, over = {}, []
+    print(f"{'handler':14s} {'import':>9s} {'budget':>8s} {'1st call':>9s} {'modules':>8s}  top imports (ms)")
+    for name in HANDLERS:
+        if only and name not in only:
+            continue
+        res = results[name] = measure(name, args.runs)
+        flag = ""
+        if res["budget_ms"] is not None and res["import_ms"] > res["budget_ms"]:
+            flag = "  OVER BUDGET"
+            over.append(name)
+        top = ", ".join(f"{m} {ms}" for m, ms in res["top_imports"])
+        print(f"{name:14s} {res['import_ms']:9.1f} {res['budget_ms'] or 0:8d} {res['first_call_ms']:9.1f} "
+              f"{res['modules']:8d}  {top}{flag}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fp:
+            json.dump(results, fp, indent=1)
+    return 1 if over and args.fail_on_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
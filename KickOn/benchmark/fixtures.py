@@ -0,0 +1,107 @@
+"""
+backtest/data 의 선수 행으로 만든 Transfermarkt 형태의 합성 HTML (프로필 / 기록 / 검색 / 스쿼드).
+실제 페이지처럼 본문 앞뒤에 관련 없는 마크업(filler)을 붙여 크기를 맞춘다.
+녹화된 실제 페이지로 파서만 비교할 때는 bench_parse.py (http_cache 디렉터리) 를 쓴다.
+"""
+import os
+import glob
+import html
+from datetime import datetime, timezone
+
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backtest", "data")
+BASE_URL = "https://www.transfermarkt.com"
+POSITIONS = {0: "Goalkeeper", 1: "Defender - Centre-Back", 2: "Midfield - Central Midfield",
+             3: "Attack - Centre-Forward", -1: "Unknown"}
+
+_FILLER_BLOCK = '<div class="box"><p>news <a href="/x">link</a> <span>text</span></p></div>'
+
+
+def filler(blocks: int) -> str:
+    return _FILLER_BLOCK * blocks
+
+
+def load_rows(data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """모든 팀 CSV (file 컬럼 = 파일 이름)"""
+    frames = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+        df = pd.read_csv(path)
+        df["file"] = os.path.basename(path)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _date(ts) -> str:
+    ts = int(ts or 0)
+    if ts <= 0:
+        return "-"
+    d = datetime.fromtimestamp(ts, tz=timezone.utc)
+    return f"{d.strftime('%b')} {d.day}, {d.year}"
+
+
+def player_slug(row) -> str:
+    return "".join(c if c.isalnum() else "-" for c in str(row["name"]).lower())
+
+
+def profile_url(row, idx: int) -> str:
+    return f"{BASE_URL}/{player_slug(row)}/profil/spieler/{100000 + idx}"
+
+
+def profile_page(row, blocks: int = 400) -> str:
+    info = [
+        ("Date of birth/Age:", f"Jan 1, {2024 - int(row['age'])} ({int(row['age'])})"),
+        ("Position:",          POSITIONS.get(int(row["position"]), "Unknown")),
+        ("Joined:",            _date(row["joined_ts"])),
+        ("Contract expires:",  _date(row["expires_ts"])),
+    ]
+    spans = "".join(
+        f'<span class="info-table__content info-table__content--regular">{k}</span>'
+        f'<span class="info-table__content info-table__content--bold">{html.escape(v)}</span>'
+        for k, v in info
+    )
+    return (
+        f'<html><body>{filler(blocks // 2)}'
+        f'<header class="data-header"><h1><strong>{html.escape(str(row["name"]))}</strong></h1>'
+        f'<a class="data-header__market-value-wrapper" href="#">€{float(row["market_value"]):.2f}m '
+        f'<p class="data-header__last-update">Last update: Jun 1, 2024</p></a></header>'
+        f'{filler(blocks // 4)}'
+        f'<div class="spielerdatenundfakten"><div class="info-table">{spans}</div></div>'
+        f'{filler(blocks // 4)}</body></html>'
+    )
+
+
+def performance_page(row, blocks: int = 200) -> str:
+    tds = "".join(f'<td class="zentriert">{int(row[c])}</td>' for c in ("appearances", "goals", "assists"))
+    return (f'<html><body>{filler(blocks)}<table class="items"><tbody><tr><td>-</td></tr></tbody>'
+            f'<tfoot><tr>{tds}</tr></tfoot></table></body></html>')
+
+
+def search_page(href: str, blocks: int = 100) -> str:
+    return (f'<html><body>{filler(blocks)}<table class="items"><tbody><tr><td>1</td>'
+            f'<td><a href="{href}">player</a></td></tr></tbody></table></body></html>')
+
+
+def squad_page(urls: list, blocks: int = 200) -> str:
+    rows = "".join(
+        f'<tr><td><table class="inline-table"><tr><td class="hauptlink">'
+        f'<a href="{u[len(BASE_URL):]}">p</a></td></tr></table></td></tr>' for u in urls
+    )
+    return f'<html><body>{filler(blocks)}<table class="items"><tbody>{rows}</tbody></table></body></html>'
+
+
+def site(rows: pd.DataFrame, competition: str = "GB1", season: str = "2023", blocks: int = 400) -> dict:
+    """
+    {url: html} — 선수마다 프로필 / 기록 / 검색 결과 페이지.
+    검색 URL 은 predict.search_player_requests 와 같은 규칙 (quote_plus).
+    """
+    from urllib.parse import quote_plus
+    pages = {}
+    for idx, row in rows.reset_index(drop=True).iterrows():
+        url  = profile_url(row, idx)
+        perf = url.replace("/profil/", "/leistungsdatendetails/") + f"/wettbewerb/{competition}/saison/{season}"
+        pages[url]  = profile_page(row, blocks)
+        pages[perf] = performance_page(row, blocks // 2)
+        q = quote_plus(str(row["name"]), safe="")
+        pages[f"{BASE_URL}/schnellsuche/ergebnis/schnellsuche?query={q}"] = search_page(url[len(BASE_URL):], blocks // 4)
+    return pages
@@ -0,0 +1,176 @@
+"""
+벤치마크용 로컬 스텁 — 네트워크 없이 S3 / SageMaker / OpenAI / 게시판 API 호출 흉내
+(botocore / openai 응답 중 코드가 실제로 읽는 부분만 구현)
+"""
+import io
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from botocore.exceptions import ClientError
+
+
+class _StreamingBody(io.BytesIO):
+    def iter_lines(self):
+        for line in self.read().splitlines():
+            yield line
+
+
+class _ClientError(ClientError):
+    def __init__(self, code: str):
+        super().__init__({"Error": {"Code": code}}, "Stub")
+
+
+class StubS3:
+    """메모리 버킷. s3.exceptions.NoSuchKey 와 ClientError(code=NoSuchKey) 둘 다로 잡힌다"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects = {}   # (bucket, key) → bytes
+        self.calls   = 0
+        self._lock   = threading.Lock()
+
+        class NoSuchKey(_ClientError):
+            def __init__(self):
+                super().__init__("NoSuchKey")
+
+        class _Exceptions:
+            pass
+        self.exceptions = _Exceptions()
+        self.exceptions.NoSuchKey   = NoSuchKey
+        self.exceptions.ClientError = ClientError
+
+    def _tick(self):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _get(self, bucket, key) -> bytes:
+        data = self.objects.get((bucket, key))
+        if data is None:
+            raise self.exceptions.NoSuchKey()
+        return data
+
+    def put_object(self, Bucket, Key, Body, **kw):
+        self._tick()
+        self.objects[(Bucket, Key)] = Body if isinstance(Body, bytes) else Body.encode("utf-8")
+        return {"ETag": f'"{hash(self.objects[(Bucket, Key)]) & 0xffffffff:x}"'}
+
+    def get_object(self, Bucket, Key, **kw):
+        self._tick()
+        data = self._get(Bucket, Key)
+        return {"Body": _StreamingBody(data), "ContentLength": len(data)}
+
+    def head_object(self, Bucket, Key, **kw):
+        self._tick()
+        return {"ContentLength": len(self._get(Bucket, Key))}
+
+    def copy_object(self, Bucket, CopySource, Key, **kw):
+        self._tick()
+        self.objects[(Bucket, Key)] = self._get(CopySource["Bucket"], CopySource["Key"])
+
+    def delete_object(self, Bucket, Key, **kw):
+        self._tick()
+        self.objects.pop((Bucket, Key), None)
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None):
+        with open(Filename, "rb") as fp:
+            self.put_object(Bucket=Bucket, Key=Key, Body=fp.read())
+
+    def list_objects_v2(self, Bucket, Prefix="", **kw):
+        self._tick()
+        keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix))
+        return {"Contents": [{"Key": k, "Size": len(self.objects[(Bucket, k)]),
+                              "ETag": f'"{hash(self.objects[(Bucket, k)]) & 0xffffffff:x}"',
+                              "LastModified": datetime.now(timezone.utc)} for k in keys]}
+
+    def get_paginator(self, name):
+        s3 = self
+
+        class _Paginator:
+            def paginate(self, **kw):
+                yield s3.list_objects_v2(**kw)
+        return _Paginator()
+
+
+class StubSageMakerRuntime:
+    """text/csv 요청의 행마다 특성값으로 정해지는 확률을 한 줄씩 응답"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls   = 0
+        self.rows    = 0
+
+    def invoke_endpoint(self, EndpointName, ContentType, Body, **kw):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        lines = [l for l in (Body.decode() if isinstance(Body, bytes) else Body).splitlines() if l]
+        self.rows += len(lines)
+        probs = [f"{(sum(float(v) for v in l.split(',')) % 97) / 97:.6f}" for l in lines]
+        return {"Body": io.BytesIO("\n".join(probs).encode("utf-8"))}
+
+
+class StubChatCompletion:
+    """openai.ChatCompletion.create 대체. 기사 id 마다 고정 점수 JSON 을 응답"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls   = 0
+
+    def create(self, model, messages, max_tokens=256, **kw):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        user   = messages[-1]["content"]
+        ids    = [b.split()[0] for b in user.split("\n\n---\n\n") if b.strip()]
+        body   = json.dumps({"scores": {i: (len(i) * 37) % 100 for i in ids}})
+        choice = type("Choice", (), {"message": type("Msg", (), {"content": body})(), "finish_reason": "stop"})()
+        resp   = type("Resp", (dict,), {})({"usage": {"prompt_tokens": len(user) // 4,
+                                                      "completion_tokens": len(body) // 4}})
+        resp.choices = [choice]
+        return resp
+
+
+class StubBoardAPI:
+    """
+    게시판 글 등록 API 흉내 (POST /posts). 같은 Idempotency-Key 는 한 번만 저장하고,
+    fail_every 번째 요청마다 503 을 돌려 재시도 경로도 재현한다.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_every: int = 0):
+        self.latency    = latency
+        self.fail_every = fail_every
+        self.calls      = 0
+        self.posts      = {}
+        self._lock      = threading.Lock()
+
+    def post(self, url, json=None, headers=None, timeout=None, **kw):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        if self.latency:
+            time.sleep(self.latency)
+        if self.fail_every and n % self.fail_every == 0:
+            return _Response(503, {"error": "unavailable"})
+        key = (headers or {}).get("Idempotency-Key") or f"auto-{n}"
+        with self._lock:
+            created = key not in self.posts
+            self.posts.setdefault(key, json)
+        return _Response(201 if created else 200, {"id": key, "created": created})
+
+
+class _Response:
+    def __init__(self, status_code: int, payload: dict):
+        self.status_code = status_code
+        self._payload    = payload
+        self.text        = json.dumps(payload)
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code}", response=self)
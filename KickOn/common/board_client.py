@@ -0,0 +1,130 @@
+import os
+import time
+import random
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+import clients
+import instrument
+
+# ─────────────────────────────────────
+# 게시판 글 등록 클라이언트 (post_ai)
+#   - keep-alive 공유 Session (clients.http_session("board")) 로 연결 재사용
+#   - 최대 CONCURRENCY 개씩 동시에 등록
+#   - 글마다 Idempotency-Key (풀 글의 id, 없으면 제목+내용 해시) → 재시도 / 재실행해도 한 번만 등록
+#   - 연결 실패 / 시간 초과 / 429 / 5xx 는 지수 백오프(+지터)로 MAX_ATTEMPTS 번까지 재시도
+#     (Retry-After 헤더가 있으면 그 시간만큼), 그 외 4xx 는 바로 실패
+#   - publish() 는 글별 결과와 성공 / 중복 / 실패 / 재시도 수 요약을 돌려준다
+# ─────────────────────────────────────
+
+CONCURRENCY  = int(os.getenv("BOARD_CONCURRENCY", "4"))
+TIMEOUT      = (3.05, float(os.getenv("BOARD_TIMEOUT", "10")))   # (연결, 응답) 초
+MAX_ATTEMPTS = int(os.getenv("BOARD_MAX_ATTEMPTS", "4"))
+BACKOFF      = float(os.getenv("BOARD_BACKOFF", "0.5"))          # 첫 재시도 대기 (초), 이후 2배씩
+BACKOFF_MAX  = 8.0
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+def idempotency_key(post: dict) -> str:
+    if post.get("id"):
+        return str(post["id"])
+    text = f"{post.get('team')}|{post['title']}|{post['contents']}"
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _retry_after(resp):
+    try:
+        return float(resp.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _replayed(resp) -> bool:
+    """서버가 같은 key 의 이전 결과를 돌려준 응답인지 (Idempotent-Replayed 헤더 또는 본문 "created": false)"""
+    headers = getattr(resp, "headers", None) or {}
+    if str(headers.get("Idempotent-Replayed", "")).lower() == "true":
+        return True
+    try:
+        payload = resp.json()
+    except Exception:
+        return False
+    return isinstance(payload, dict) and payload.get("created") is False
+
+
+class BoardClient:
+    def __init__(self, url: str, token: str = None, session=None, concurrency: int = CONCURRENCY,
+                 timeout=TIMEOUT, max_attempts: int = MAX_ATTEMPTS, backoff: float = BACKOFF):
+        self.url          = url
+        self.token        = token
+        self._session     = session
+        self.concurrency  = concurrency
+        self.timeout      = timeout
+        self.max_attempts = max_attempts
+        self.backoff      = backoff
+
+    @property
+    def session(self):
+        # 처음 등록할 때 만든다 (import 시점에 requests 를 로드하지 않음)
+        if self._session is None:
+            self._session = clients.http_session("board", pool_size=max(self.concurrency, 1))
+        return self._session
+
+    def _wait(self, attempt: int, resp=None):
+        delay = _retry_after(resp) if resp is not None else None
+        if delay is not None:
+            # 서버가 아주 긴 Retry-After 를 주어도 한 번에 BACKOFF_MAX 이상 멈추지 않음 (crawl 과 같음)
+            delay = min(BACKOFF_MAX, delay)
+        else:
+            delay = min(BACKOFF_MAX, self.backoff * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+        time.sleep(delay)
+
+    def post(self, body: dict, key: str) -> dict:
+        """{"key", "status", "ok", "created", "attempts", "response" | "error"}"""
+        headers = {
+            "Authorization":   f"Bearer {self.token}",
+            "Content-Type":    "application/json",
+            "Idempotency-Key": key,
+        }
+        out = {"key": key, "status": None, "ok": False, "created": False, "attempts": 0}
+        for attempt in range(1, self.max_attempts + 1):
+            out["attempts"] = attempt
+            resp = None
+            try:
+                with instrument.span("board.post"):
+                    resp = self.session.post(self.url, headers=headers, json=body, timeout=self.timeout)
+            except Exception as e:   # requests 의 ConnectionError / Timeout 등
+                out["error"] = f"{type(e).__name__}: {e}"
+            else:
+                out["status"], out["response"] = resp.status_code, resp.text
+                out.pop("error", None)
+                if resp.status_code < 400:
+                    out["ok"] = True
+                    out["created"] = not _replayed(resp)
+                    return out
+                if resp.status_code not in RETRY_STATUS:
+                    return out
+            if attempt < self.max_attempts:
+                instrument.count("board.retries")
+                self._wait(attempt, resp)
+        return out
+
+    def publish(self, items: list) -> dict:
+        """items = [(요청 body, Idempotency-Key)] → {"results": [...], "summary": {...}} (items 순서대로)"""
+        if not items:
+            results = []
+        elif self.concurrency <= 1 or len(items) == 1:
+            results = [self.post(body, key) for body, key in items]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(items))) as pool:
+                results = list(pool.map(lambda item: self.post(*item), items))
+        summary = {
+            "total":     len(results),
+            "posted":    sum(r["ok"] and r["created"] for r in results),
+            "duplicate": sum(r["ok"] and not r["created"] for r in results),
+            "failed":    sum(not r["ok"] for r in results),
+            "retries":   sum(r["attempts"] - 1 for r in results),
+        }
+        instrument.count("board.posted", summary["posted"])
+        instrument.count("board.duplicate", summary["duplicate"])
+        instrument.count("board.failed", summary["failed"])
+        return {"results": results, "summary": summary}
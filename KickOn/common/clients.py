@@ -0,0 +1,68 @@
+import os
+import threading
+
+# ─────────────────────────────────────
+# 프로세스 단위 공유 클라이언트 (warm Lambda 호출끼리 재사용)
+#   boto(service)        : boto3 클라이언트 — 서비스 / 리전마다 하나, keep-alive + 연결 풀
+#   lazy(service)        : boto() 를 처음 속성에 접근할 때 만드는 대리 객체 (모듈 전역용)
+#   http_session(name)   : requests.Session — 이름마다 하나, 연결 풀 + (선택) Retry
+# boto3 / requests 는 처음 쓸 때 import 한다 (cold start 의 모듈 로드 시간 절약)
+# ─────────────────────────────────────
+
+POOL_SIZE = int(os.getenv("KICKON_POOL_SIZE", "16"))
+
+_lock     = threading.Lock()
+_boto     = {}
+_sessions = {}
+
+
+def boto(service: str, region: str = None):
+    key = (service, region)
+    client = _boto.get(key)
+    if client is None:
+        with _lock:
+            client = _boto.get(key)
+            if client is None:
+                import boto3
+                from botocore.config import Config
+                config = Config(max_pool_connections=POOL_SIZE, tcp_keepalive=True)
+                client = _boto[key] = boto3.client(service, region_name=region, config=config)
+    return client
+
+
+class LazyClient:
+    """s3 = clients.lazy("s3") — import 시점에는 아무것도 만들지 않는다"""
+
+    def __init__(self, service: str, region: str = None):
+        self._service = service
+        self._region  = region
+
+    def __getattr__(self, attr):
+        return getattr(boto(self._service, self._region), attr)
+
+
+def lazy(service: str, region: str = None) -> LazyClient:
+    return LazyClient(service, region)
+
+
+def http_session(name: str = "default", headers: dict = None, retry=None, pool_size: int = POOL_SIZE):
+    """
+    이름별 공유 Session. 처음 만들 때만 headers / retry(urllib3 Retry) / pool_size 를 적용하고,
+    이후 같은 이름은 만들어 둔 Session 을 그대로 돌려준다.
+    """
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                                      **({"max_retries": retry} if retry is not None else {}))
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(headers or {})
+                _sessions[name] = session
+    return session
+
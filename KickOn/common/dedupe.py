@@ -0,0 +1,47 @@
+import hashlib
+
+# ─────────────────────────────────────
+# 선수 행 중복 제거 키
+#   player_id 가 있으면 (player_id, 시즌) — 같은 시즌에 팀을 옮겨 두 팀 파일에 나온 선수도 한 행
+#   없으면(player_id 이전 CSV) 행 전체 내용 해시 — 이름 / 나이가 같은 다른 선수를 합치지 않도록
+#   완전히 같은 행(같은 스냅샷을 다시 올린 파일 등)만 중복으로 본다
+# row_hash 는 같은 key 의 행이 바뀌었는지(upsert 필요) 판단하는 데도 쓴다
+# ─────────────────────────────────────
+
+HASH_COLUMNS = ["transfer", "name", "age", "market_value", "position", "joined_ts", "expires_ts",
+                "appearances", "goals", "assists", "team_rank"]
+
+
+def _text(value) -> str:
+    """CSV 문자열 / pandas 값 모두 같은 표기로 ("12.0" → "12", NaN / None → "")"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value != value:
+            return ""
+        if value.is_integer():
+            return str(int(value))
+    return str(value).strip()
+
+
+def row_hash(row) -> str:
+    text = "\x1f".join(_text(row.get(c)) for c in HASH_COLUMNS)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def row_key(row, season=None) -> str:
+    pid = _text(row.get("player_id"))
+    if pid:
+        return f"id:{pid}|{season or ''}"
+    return f"row:{row_hash(row)}"
+
+
+def first_occurrences(rows, season=None, seen: set = None) -> list:
+    """행마다 처음 나온 key 인지 (seen 을 넘기면 여러 파일에 걸쳐 누적)"""
+    seen = set() if seen is None else seen
+    out = []
+    for row in rows:
+        key = row_key(row, season)
+        out.append(key not in seen)
+        seen.add(key)
+    return out
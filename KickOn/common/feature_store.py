@@ -0,0 +1,130 @@
+import os
+import importlib.util
+from urllib.parse import quote
+
+import features
+
+# pyarrow 가 없으면 feature store 기능만 비활성화 (CSV 경로는 그대로 동작)
+# 설치되어 있어도 실제로 Parquet 를 읽고 쓸 때 처음 import (새 원본이 없는 실행은 로드하지 않음)
+pa = ds = pq = pc = pafs = None
+
+def _arrow():
+    global pa, ds, pq, pc, pafs
+    if pa is None:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+        import pyarrow.parquet
+        from pyarrow import fs
+        pa, ds, pq, pc, pafs = pyarrow, pyarrow.dataset, pyarrow.parquet, pyarrow.compute, fs
+
+# ─────────────────────────────────────
+# 선수 특성 Parquet 저장소
+#   {root}/league={리그}/season={시즌}/team={팀}/{part}.parquet  (hive 파티션)
+#   컬럼 / 타입은 크롤러 팀 CSV(CSV_COLUMNS) 기준
+# ─────────────────────────────────────
+
+STORE_URI = os.getenv("KICKON_FEATURE_STORE", "s3://kickon-ml-data-bucket/EPL/feature_store")
+
+COLUMNS = [
+    ("transfer",     "int8"),
+    ("name",         "string"),
+    ("age",          "int16"),
+    ("market_value", "float32"),
+    ("position",     "int8"),
+    ("joined_ts",    "int64"),
+    ("expires_ts",   "int64"),
+    ("appearances",  "int16"),
+    ("goals",        "int16"),
+    ("assists",      "int16"),
+    ("team_rank",    "int8"),
+    ("player_id",    "string"),
+]
+PARTITIONS = ["league", "season", "team"]
+
+
+def available() -> bool:
+    return pa is not None or importlib.util.find_spec("pyarrow") is not None
+
+
+def schema():
+    _arrow()
+    return pa.schema([(name, getattr(pa, typ)()) for name, typ in COLUMNS])
+
+
+def to_table(rows: list):
+    """
+    크롤러 CSV 행(dict, 값은 문자열)들을 타입이 맞춰진 Arrow 테이블로.
+    숫자 특성은 학습 / 예측과 같은 features 모듈 변환을 쓴다 (비었거나 바꿀 수 없는 값은 0, 포지션은 -1)
+    """
+    _arrow()
+    matrix = features.build_feature_matrix(rows)
+    matrix["transfer"] = features.integers([r.get("transfer") for r in rows])
+    cols = {}
+    for name, typ in COLUMNS:
+        if typ == "string":
+            cols[name] = pa.array([r.get(name) or "" for r in rows], type=pa.string())
+        else:
+            cols[name] = pa.array(matrix[name].to_numpy(), type=getattr(pa, typ)())
+    return pa.Table.from_pydict(cols, schema=schema())
+
+
+def _filesystem(uri: str):
+    """(filesystem, 경로). 로컬 경로는 memory-map 으로 읽는다"""
+    _arrow()
+    if "://" not in uri:
+        return pafs.LocalFileSystem(use_mmap=True), os.path.abspath(uri)
+    return pafs.FileSystem.from_uri(uri)
+
+
+def partition_path(root: str, league: str, season: str, team: str) -> str:
+    vals = {"league": league or "unknown", "season": season or "unknown", "team": team or "unknown"}
+    return "/".join([root.rstrip("/")] + [f"{k}={quote(str(vals[k]), safe='')}" for k in PARTITIONS])
+
+
+def write_partition(rows: list, league: str, season: str, team: str,
+                    part_name: str, uri: str = STORE_URI) -> str:
+    """한 팀 파일 분량을 파티션 아래 part 하나로 저장. 같은 part_name 이면 덮어쓴다"""
+    filesystem, root = _filesystem(uri)
+    directory = partition_path(root, league, season, team)
+    filesystem.create_dir(directory, recursive=True)
+    path = f"{directory}/{part_name}.parquet"
+    pq.write_table(to_table(rows), path, filesystem=filesystem, compression="zstd")
+    return path
+
+
+def drop_rows(path: str, column: str, values, uri: str = STORE_URI) -> int:
+    """write_partition 이 쓴 part 에서 column 값이 values 에 있는 행을 빼고 다시 쓴다. 남은 행 수"""
+    filesystem, _ = _filesystem(uri)
+    table = pq.read_table(path, filesystem=filesystem)
+    mask  = pc.invert(pc.is_in(table[column], value_set=pa.array(sorted(values), type=pa.string())))
+    table = table.filter(mask)
+    pq.write_table(table, path, filesystem=filesystem, compression="zstd")
+    return table.num_rows
+
+
+def dataset(uri: str = STORE_URI):
+    """
+    스키마를 COLUMNS 로 고정해서 연다 — 예전 part(player_id 컬럼 이전)처럼 없는 컬럼은 null 로 읽힌다
+    (파일에서 추론하면 처음 고른 파일에 따라 컬럼이 빠지거나 읽기가 실패함)
+    """
+    filesystem, root = _filesystem(uri)
+    part_schema = pa.schema([(p, pa.string()) for p in PARTITIONS])
+    full_schema = pa.schema(list(schema()) + list(part_schema))
+    return ds.dataset(root, schema=full_schema, filesystem=filesystem, format="parquet",
+                      partitioning=ds.partitioning(part_schema, flavor="hive"))
+
+
+def load(columns: list = None, league: str = None, season: str = None, team: str = None,
+         uri: str = STORE_URI):
+    """
+    필요한 컬럼 / 파티션만 읽어 pandas DataFrame 으로.
+    예: load(["name", "transfer"], league="GB1", season="2023")
+    """
+    dset = dataset(uri)
+    expr = None
+    for key, val in (("league", league), ("season", season), ("team", team)):
+        if val is not None:
+            cond = ds.field(key) == str(val)
+            expr = cond if expr is None else expr & cond
+    return dset.to_table(columns=columns, filter=expr).to_pandas()
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+# ─────────────────────────────────────
+# 모델 입력 특성 변환 (크롤러 / 전처리 / 예측 공용, 배치 단위 벡터 연산)
+#   원본 레코드 → FEATURE_COLUMNS 9개 컬럼 행렬
+# ─────────────────────────────────────
+
+# 학습 데이터(part CSV) 의 label 뒤 컬럼 순서 그대로
+FEATURE_COLUMNS = [
+    "age", "market_value", "position", "joined_ts", "expires_ts",
+    "appearances", "goals", "assists", "team_rank",
+]
+
+DATE_FORMAT = "%b %d, %Y"   # "Jul 1, 2024"
+
+# 먼저 나온 키가 우선 (예: "Attack - Centre-Forward" → Attack)
+POSITION_MAPPING = {
+    "Goalkeeper": 0,
+    "Defender":   1,
+    "Midfield":   2,
+    "Attack":     3,
+}
+
+# 시장가치 단위 → 백만 유로 배수 (단위가 없으면 이미 백만 단위로 본다)
+MARKET_VALUE_UNITS = {"bn": 1000.0, "m": 1.0, "k": 0.001, "th.": 0.001}
+
+_EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+def _series(values) -> pd.Series:
+    if isinstance(values, pd.Series):
+        return values.reset_index(drop=True).astype("object")
+    return pd.Series(list(values), dtype="object")
+
+
+def integers(values) -> np.ndarray:
+    """숫자로 바꿀 수 없거나 비어 있으면 0"""
+    return pd.to_numeric(_series(values), errors="coerce").fillna(0).astype("int64").to_numpy()
+
+
+def timestamps(values, fmt: str = DATE_FORMAT) -> np.ndarray:
+    """
+    "Jul 1, 2024" → UTC Unix timestamp. 이미 숫자(timestamp)면 그대로,
+    '-' / 빈 값 / 포맷 불일치는 0.
+    """
+    s   = _series(values)
+    num = pd.to_numeric(s, errors="coerce")
+    txt = s.where(num.isna()).astype("string").str.strip()
+    dt  = pd.to_datetime(txt, format=fmt, errors="coerce", utc=True)
+    sec = (dt - _EPOCH).dt.total_seconds()
+    return num.fillna(sec).fillna(0).astype("int64").to_numpy()
+
+
+def positions(values) -> np.ndarray:
+    """포지션 문자열에 POSITION_MAPPING 키가 (대소문자 무시) 포함되면 그 값, 없으면 -1. 숫자면 그대로"""
+    s   = _series(values)
+    num = pd.to_numeric(s, errors="coerce")
+    low = s.where(num.isna()).astype("string").str.lower().fillna("")
+    out = np.full(len(s), -1, dtype="int64")
+    # 뒤에서부터 덮어써서 앞쪽 키가 우선하도록
+    for key, val in reversed(list(POSITION_MAPPING.items())):
+        out = np.where(low.str.contains(key.lower(), regex=False).to_numpy(), val, out)
+    return np.where(num.notna().to_numpy(), num.fillna(-1).to_numpy(), out).astype("int64")
+
+
+def market_values(values) -> np.ndarray:
+    """"€25.00m" → 25.0, "€800k" → 0.8, "€1.20bn" → 1200.0, "25.00" → 25.0 (백만 유로 단위)"""
+    s     = _series(values).astype("string").str.lower().str.replace(",", "", regex=False)
+    parts = s.str.extract(r"([\d.]+)\s*(bn|m|k|th\.)?")
+    num   = pd.to_numeric(parts[0], errors="coerce")
+    mult  = parts[1].map(MARKET_VALUE_UNITS).astype("float64").fillna(1.0)
+    return (num * mult).fillna(0.0).round(4).astype("float64").to_numpy()
+
+
+def build_feature_matrix(records) -> pd.DataFrame:
+    """
+    원본 레코드(dict 목록 또는 DataFrame) → FEATURE_COLUMNS 순서의 DataFrame.
+    크롤러 키(joined, contract_expires ...)와 이미 변환된 키(joined_ts, expires_ts ...)
+    모두 받는다.
+    """
+    df = records if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(list(records))
+    n  = len(df)
+
+    def col(*names):
+        # 여러 이름 중 레코드마다 처음으로 값이 있는 것 (예측 쪽 키 appearance / rank / contract_exp 포함)
+        out = pd.Series([None] * n, dtype="object")
+        for name in names:
+            if name in df:
+                vals = df[name].astype("object").to_numpy()
+                out  = out.where(out.notna(), pd.Series(vals, dtype="object"))
+        return out
+
+    return pd.DataFrame({
+        "age":          integers(col("age")),
+        "market_value": market_values(col("market_value")),
+        "position":     positions(col("position")),
+        "joined_ts":    timestamps(col("joined_ts", "joined")),
+        "expires_ts":   timestamps(col("expires_ts", "contract_expires", "contract_exp")),
+        "appearances":  integers(col("appearances", "appearance")),
+        "goals":        integers(col("goals")),
+        "assists":      integers(col("assists")),
+        "team_rank":    integers(col("team_rank", "rank")),
+    }, columns=FEATURE_COLUMNS)
+
+
+def to_csv_payload(matrix: pd.DataFrame) -> str:
+    """SageMaker text/csv 입력 (헤더 없음, 한 줄에 한 선수)"""
+    return matrix[FEATURE_COLUMNS].to_csv(header=False, index=False).strip()
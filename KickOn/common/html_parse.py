@@ -0,0 +1,134 @@
+import os
+import re
+import importlib.util
+from bs4 import BeautifulSoup, SoupStrainer
+
+import instrument
+
+# ─────────────────────────────────────
+# HTML 파싱 백엔드 + 페이지별 추출기
+#   - 백엔드: KICKON_HTML_PARSER (lxml / html.parser), 기본은 lxml 이 있으면 lxml
+#   - region: 페이지 전체가 아니라 필요한 영역(SoupStrainer)만 트리로 만든다
+# ─────────────────────────────────────
+
+def _default_parser() -> str:
+    # 설치 여부만 확인 (lxml 은 BeautifulSoup 이 실제로 파싱할 때 로드)
+    return "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+PARSER = os.getenv("KICKON_HTML_PARSER") or _default_parser()
+
+
+def _has_class(*names):
+    # SoupStrainer 에는 class 속성이 "a b c" 문자열 그대로 넘어오므로 직접 나눠서 비교
+    wanted = set(names)
+    def match(value):
+        if not value:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return not wanted.isdisjoint(classes)
+    return match
+
+REGIONS = {
+    # 선수 프로필: 상단 헤더(이름, 시장가치) + 인적사항 테이블
+    "profile": SoupStrainer(class_=_has_class("data-header", "spielerdatenundfakten")),
+    # 리그 / 스쿼드 / 기록 / 검색 결과 테이블
+    "items":   SoupStrainer("table", class_=_has_class("items")),
+}
+
+
+def parse(html: str, region: str = None, parser: str = None) -> BeautifulSoup:
+    """region 이 None 이면 문서 전체, 아니면 REGIONS[region] 영역만 파싱"""
+    with instrument.span(f"parse.{region or 'full'}"):
+        return BeautifulSoup(html, parser or PARSER,
+                             parse_only=REGIONS[region] if region else None)
+
+
+def _soup(html, region, parser, strain):
+    return parse(html, region if strain else None, parser)
+
+
+# ─── 페이지별 추출기 (strain=False, parser="html.parser" 가 기존 동작) ───
+
+def extract_team_links(html: str, base_url: str, parser: str = None, strain: bool = True) -> list:
+    soup = _soup(html, "items", parser, strain)
+    out = []
+    for a in soup.select("td.hauptlink.no-border-links a"):
+        # title 속성이 없으면 a.text.strip() 사용
+        team_name = a.get("title") or a.get_text(strip=True)
+        out.append({"team": team_name, "url": base_url + a.get("href")})
+    return out
+
+
+def extract_player_links(html: str, base_url: str, parser: str = None, strain: bool = True) -> list:
+    soup = _soup(html, "items", parser, strain)
+    links = []
+    for a in soup.select("table.inline-table td.hauptlink a"):
+        href = a.get("href", "")
+        if "/profil/spieler" in href:
+            links.append(base_url + href)
+    return list(dict.fromkeys(links))
+
+
+def extract_player_profile(html: str, parser: str = None, strain: bool = True) -> dict:
+    """크롤러용 프로필: name, market_value, age, position, joined, contract_expires"""
+    soup = _soup(html, "profile", parser, strain)
+
+    # 1) 이름
+    name_tag = soup.select_one("header.data-header strong")
+    name = name_tag.get_text(strip=True) if name_tag else None
+
+    # 2) Market Value (header)
+    mv_wrapper = soup.select_one("a.data-header__market-value-wrapper")
+    market_value = None
+    if mv_wrapper:
+        last = mv_wrapper.select_one("p.data-header__last-update")
+        if last:
+            last.extract()
+        raw_mv = mv_wrapper.get_text(strip=True)
+        # 단위(bn / m / k)까지 남겨 두고 숫자 변환은 features.market_values 에서
+        m = re.search(r"([\d\.,]+\s*(?:bn|m|k|Th\.)?)", raw_mv)
+        market_value = m.group(1) if m else None
+
+    data = {
+        "name": name,
+        "market_value": market_value,
+    }
+
+    # 3) 인적사항 테이블
+    info_div = soup.select_one("div.spielerdatenundfakten div.info-table")
+    if info_div:
+        spans = info_div.select("span.info-table__content")
+        for i in range(0, len(spans) - 1, 2):
+            label = spans[i].get_text(strip=True).rstrip(":")
+            val = spans[i+1].get_text(strip=True)
+
+            if label == "Date of birth/Age":
+                m = re.search(r"\((\d+)\)", val)
+                data["age"] = int(m.group(1)) if m else None
+            elif label == "Position":
+                data["position"] = val
+            elif label == "Market value":
+                data["market_value"] = val
+            elif label == "Joined":
+                data["joined"] = val
+            elif label == "Contract expires":
+                data["contract_expires"] = val
+    return data
+
+
+def extract_performance(html: str, parser: str = None, strain: bool = True) -> dict:
+    """leistungsdatendetails: table.items > tfoot > tr > td.zentriert 의 출장/골/어시스트"""
+    soup = _soup(html, "items", parser, strain)
+    perf = {"appearances": 0, "goals": 0, "assists": 0}
+    tds = soup.select("table.items tfoot tr td.zentriert")
+    for col, td in zip(("appearances", "goals", "assists"), tds):
+        txt = td.get_text(strip=True)
+        perf[col] = int(txt) if txt.isdigit() else 0
+    return perf
+
+
+def extract_search_first_link(html: str, parser: str = None, strain: bool = True):
+    """빠른 검색 결과 첫 번째 선수의 프로필 경로 (없으면 None)"""
+    soup = _soup(html, "items", parser, strain)
+    first = soup.select_one("table.items tbody tr td:nth-of-type(2) a")
+    return first["href"] if first else None
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+# ─────────────────────────────────────
+# Transfermarkt 페이지 디스크 캐시
+#   - URL 단위 키, 페이지 종류별 TTL
+#   - TTL 이 지나면 ETag / Last-Modified 로 조건부 재검증 (304 면 본문 재사용)
+#   - 전체 크기가 max_bytes 를 넘으면 가장 오래 안 쓴 항목부터 삭제 (LRU)
+#   - offline 모드: 네트워크 없이 캐시에 있는 것만 반환
+# ─────────────────────────────────────
+
+CACHE_DIR = os.getenv("KICKON_HTTP_CACHE_DIR", "/tmp/kickon_http_cache")
+CACHE_MB  = int(os.getenv("KICKON_HTTP_CACHE_MB", "256"))
+OFFLINE   = os.getenv("KICKON_OFFLINE", "0") == "1"
+ENABLED   = os.getenv("KICKON_HTTP_CACHE", "1") == "1"
+
+HOUR = 3600
+DAY  = 24 * HOUR
+
+# (URL 조각, 페이지 종류, TTL 초) — 위에서부터 처음 맞는 것 사용
+PAGE_TYPES = [
+    ("/schnellsuche/",           "search",      DAY),
+    ("/leistungsdatendetails/",  "performance", DAY),
+    ("/profil/spieler/",         "profile",     DAY),
+    ("/startseite/verein/",      "squad",       DAY),
+    ("/startseite/wettbewerb/",  "league",      7 * DAY),
+]
+DEFAULT_PAGE = ("other", 6 * HOUR)
+
+
+class OfflineMiss(LookupError):
+    """offline 모드에서 캐시에 없는 URL 을 요청한 경우"""
+
+
+def page_type(url: str) -> tuple:
+    for frag, kind, ttl in PAGE_TYPES:
+        if frag in url:
+            return kind, ttl
+    return DEFAULT_PAGE
+
+
+class HttpCache:
+    """
+    fetch(url, headers) 로 실제 요청을 보내는 함수를 받아 쓰는 디스크 캐시.
+    fetch 는 requests.Response 처럼 status_code / headers / text /
+    raise_for_status() 를 가진 객체를 반환하면 된다.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, max_bytes: int = CACHE_MB * 1024 * 1024,
+                 offline: bool = OFFLINE, ttls: dict = None):
+        self.root      = root
+        self.max_bytes = max_bytes
+        self.offline   = offline
+        self.ttls      = ttls or {}      # {"profile": 3600, ...} 로 종류별 TTL 덮어쓰기
+        self._lock     = threading.Lock()
+        self._stats    = {"hits": 0, "misses": 0, "revalidated": 0,
+                          "offline_hits": 0, "offline_misses": 0, "evicted": 0,
+                          "bytes_from_cache": 0, "bytes_from_network": 0}
+        os.makedirs(root, exist_ok=True)
+        self._size = sum(size for _, _, size in self._entries())
+
+    # ─── 파일 배치 ───
+    def _paths(self, url: str) -> tuple:
+        h = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        d = os.path.join(self.root, h[:2])
+        return os.path.join(d, h + ".json"), os.path.join(d, h + ".html")
+
+    def _entries(self):
+        """(최근 사용 시각, meta 경로, 바이트) 목록"""
+        out = []
+        for dirpath, _, files in os.walk(self.root):
+            for f in files:
+                if not f.endswith(".json"):
+                    continue
+                meta = os.path.join(dirpath, f)
+                body = meta[:-5] + ".html"
+                try:
+                    st = os.stat(meta)
+                    size = st.st_size + os.path.getsize(body)
+                except OSError:
+                    continue
+                out.append((st.st_mtime, meta, size))
+        return out
+
+    def _load(self, url: str):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, encoding="utf-8") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        # LRU 기준 시각 갱신
+        os.utime(meta_path, None)
+        return meta, body
+
+    def _store(self, url: str, meta: dict, body: str = None):
+        meta_path, body_path = self._paths(url)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        old = 0
+        if os.path.exists(meta_path):
+            old = os.path.getsize(meta_path) + (os.path.getsize(body_path) if os.path.exists(body_path) else 0)
+        # 임시 파일에 쓰고 교체 → 동시에 읽는 쪽이 깨진 파일을 보지 않음
+        if body is not None:
+            tmp = f"{body_path}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(body)
+            os.replace(tmp, body_path)
+        tmp = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+        new = os.path.getsize(meta_path) + os.path.getsize(body_path)
+        with self._lock:
+            self._size += new - old
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self):
+        """전체 크기가 max_bytes 의 90% 이하가 될 때까지 오래된 항목 삭제"""
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries())
+        with self._lock:
+            self._size = sum(size for _, _, size in entries)
+            for _, meta, size in entries:
+                if self._size <= target:
+                    break
+                for p in (meta, meta[:-5] + ".html"):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+                self._size -= size
+                self._stats["evicted"] += 1
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    # ─── 조회 ───
+    def get(self, url: str, fetch) -> str:
+        """url 의 본문(str). 신선하면 캐시, 아니면 조건부 요청 후 갱신."""
+        kind, ttl = page_type(url)
+        ttl = self.ttls.get(kind, ttl)
+        meta, body = self._load(url)
+
+        if meta is not None and time.time() - meta["fetched_at"] < ttl:
+            self._count("hits")
+            self._count("bytes_from_cache", len(body))
+            return body
+
+        if self.offline:
+            if meta is None:
+                self._count("offline_misses")
+                raise OfflineMiss(url)
+            # 오프라인이면 만료된 항목도 그대로 사용
+            self._count("offline_hits")
+            self._count("bytes_from_cache", len(body))
+            return body
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        res = fetch(url, headers)
+        if meta is not None and res.status_code == 304:
+            meta["fetched_at"] = time.time()
+            self._store(url, meta)
+            self._count("revalidated")
+            self._count("bytes_from_cache", len(body))
+            return body
+
+        res.raise_for_status()
+        body = res.text
+        self._store(url, {
+            "url":           url,
+            "page_type":     kind,
+            "etag":          res.headers.get("ETag"),
+            "last_modified": res.headers.get("Last-Modified"),
+            "fetched_at":    time.time(),
+        }, body)
+        self._count("misses")
+        self._count("bytes_from_network", len(body))
+        return body
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._stats)
+            out["size_bytes"] = self._size
+        lookups = out["hits"] + out["misses"] + out["revalidated"] + out["offline_hits"]
+        out["hit_ratio"] = round((out["hits"] + out["revalidated"] + out["offline_hits"]) / lookups, 3) if lookups else 0.0
+        return out
+
+    def reset_stats(self):
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+
+def from_env():
+    """환경변수 설정으로 캐시 생성. KICKON_HTTP_CACHE=0 이면 None (캐시 없이 바로 요청)."""
+    if not ENABLED and not OFFLINE:
+        return None
+    return HttpCache()
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import functools
+import threading
+
+# ─────────────────────────────────────
+# 단계별 시간 / 카운터 계측
+#   span("sagemaker.invoke")      : with 블록 시간 (호출 수 / 합계 / 최대 ms)
+#   count("transfermarkt.retries") : 카운터 누적
+#   observe("stage.news", ms)      : 직접 잰 시간을 span 과 같은 형태로 기록
+#   wrap_client(s3, "s3")          : 클라이언트 메서드 호출마다 span("s3.<메서드>")
+#   @handler("predict")            : Lambda 핸들러 한 번 실행마다 JSON 한 줄 출력
+# KICKON_METRICS=0 이면 위 함수들이 모두 아무것도 하지 않는 버전으로 바뀐다
+# (데코레이터 / wrap_client 는 원래 객체를 그대로 돌려주므로 추가 비용 없음)
+# KICKON_METRICS_FORMAT=emf 면 CloudWatch Embedded Metric Format 으로 출력
+# ─────────────────────────────────────
+
+ENABLED   = os.getenv("KICKON_METRICS", "1") != "0"
+FORMAT    = os.getenv("KICKON_METRICS_FORMAT", "json")
+NAMESPACE = "KickOn"
+
+_lock     = threading.Lock()
+_spans    = {}   # 이름 → [호출 수, 합계 ms, 최대 ms]
+_counters = {}
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+def _record(name: str, ms: float):
+    with _lock:
+        s = _spans.get(name)
+        if s is None:
+            _spans[name] = [1, ms, ms]
+        else:
+            s[0] += 1
+            s[1] += ms
+            s[2] = max(s[2], ms)
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _span(name: str):
+    return _Span(name)
+
+
+def _observe(name: str, ms: float):
+    _record(name, ms)
+
+
+def _count(name: str, value=1):
+    if value:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + value
+
+
+def _add_counters(prefix: str, values: dict):
+    for k, v in values.items():
+        if isinstance(v, (int, float)) and not isinstance(v, bool):
+            _count(f"{prefix}.{k}", v)
+
+
+def _timed(name: str):
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+class _ClientProxy:
+    """boto3 / requests 클라이언트 대리 객체 — 호출 가능한 속성은 span 으로 감싼다"""
+
+    def __init__(self, client, prefix: str):
+        self._client = client
+        self._prefix = prefix
+
+    def __getattr__(self, attr):
+        value = getattr(self._client, attr)
+        if not callable(value) or attr.startswith("_") or isinstance(value, type):
+            return value
+        name = f"{self._prefix}.{attr}"
+
+        def call(*args, **kwargs):
+            with _Span(name):
+                return value(*args, **kwargs)
+        return call
+
+
+def _wrap_client(client, prefix: str):
+    return _ClientProxy(client, prefix)
+
+
+def snapshot() -> dict:
+    with _lock:
+        spans = {k: {"n": v[0], "ms": round(v[1], 1), "max_ms": round(v[2], 1)} for k, v in _spans.items()}
+        return {"spans": spans, "counters": dict(_counters)}
+
+
+def emit(name: str, duration_ms: float, status, context=None, extra: dict = None):
+    """한 번 실행분을 한 줄로 출력"""
+    snap = snapshot()
+    line = {
+        "metric":      NAMESPACE,
+        "handler":     name,
+        "request_id":  getattr(context, "aws_request_id", None),
+        "status":      status,
+        "duration_ms": round(duration_ms, 1),
+        **snap,
+        **(extra or {}),
+    }
+    if FORMAT == "emf":
+        metrics = {"duration": duration_ms}
+        metrics.update({f"{k}.ms": v["ms"] for k, v in snap["spans"].items()})
+        metrics.update(snap["counters"])
+        line.update(metrics)
+        line["_aws"] = {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace":  NAMESPACE,
+                "Dimensions": [["handler"]],
+                "Metrics":    [{"Name": k, "Unit": "Milliseconds" if k == "duration" or k.endswith(".ms") else "Count"}
+                               for k in metrics],
+            }],
+        }
+    print(json.dumps(line, ensure_ascii=False, default=str))
+
+
+def _handler(name: str):
+    """Lambda 핸들러 데코레이터: 실행 전 초기화, 끝나면 (예외여도) 한 줄 출력"""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(event, context, *args, **kwargs):
+            reset()
+            start  = time.perf_counter()
+            status = "error"
+            try:
+                out = fn(event, context, *args, **kwargs)
+                status = out.get("statusCode") if isinstance(out, dict) else "ok"
+                return out
+            finally:
+                emit(name, (time.perf_counter() - start) * 1000, status, context)
+        return wrapper
+    return deco
+
+
+def _noop(*args, **kwargs):
+    return None
+
+
+def _identity_deco(name: str):
+    return lambda fn: fn
+
+
+if ENABLED:
+    span, count, add_counters, observe = _span, _count, _add_counters, _observe
+    timed, handler, wrap_client = _timed, _handler, _wrap_client
+else:
+    span         = lambda name: _NOOP_SPAN
+    count        = _noop
+    add_counters = _noop
+    observe      = _noop
+    timed        = _identity_deco
+    handler      = _identity_deco
+    wrap_client  = lambda client, prefix: client
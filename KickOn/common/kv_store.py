@@ -0,0 +1,193 @@
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# ─────────────────────────────────────
+# 작은 key-value 저장소 + TTL / stale-while-revalidate 캐시
+#   MemoryStore : 프로세스 안 LRU (warm Lambda 재사용)
+#   SqliteStore : 로컬 파일 하나 (오프라인 / 로컬 실행, 프로세스 간 공유)
+# 값은 JSON 으로 직렬화 가능한 것만 저장한다
+# ─────────────────────────────────────
+
+
+class MemoryStore:
+    def __init__(self, max_items: int = 1024):
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """(value, stored_at) 또는 None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+            return item
+
+    def set(self, key: str, value, stored_at: float = None):
+        with self._lock:
+            self._data[key] = (value, time.time() if stored_at is None else stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SqliteStore:
+    def __init__(self, path: str):
+        self.path  = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT, stored_at REAL)"
+            )
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM kv WHERE key = ?", (key,)).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def set(self, key: str, value, stored_at: float = None):
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() if stored_at is None else stored_at),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+
+# 모든 SwrCache 가 함께 쓰는 백그라운드 갱신 스레드 (캐시마다 풀을 두지 않음)
+REFRESH_WORKERS = 4
+_refresh_pool   = None
+_pool_lock      = threading.Lock()
+
+
+def refresh_pool() -> ThreadPoolExecutor:
+    global _refresh_pool
+    if _refresh_pool is None:
+        with _pool_lock:
+            if _refresh_pool is None:
+                _refresh_pool = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="swr")
+    return _refresh_pool
+
+
+def from_uri(uri: str):
+    """
+    "memory" / "memory:5000" → MemoryStore, "sqlite:/tmp/x.db" → SqliteStore,
+    "off" / "" → None (캐시 사용 안 함)
+    """
+    if not uri or uri == "off":
+        return None
+    kind, _, arg = uri.partition(":")
+    if kind == "memory":
+        return MemoryStore(int(arg) if arg else 1024)
+    if kind == "sqlite":
+        return SqliteStore(arg or ":memory:")
+    raise ValueError(f"unknown store uri: {uri}")
+
+
+class SwrCache:
+    """
+    namespace 별 TTL 캐시.
+      나이 < ttl                 → fresh: 그대로 반환
+      ttl ≤ 나이 < ttl+stale_ttl → stale: 일단 반환하고 백그라운드에서 다시 계산
+      그 이상 / 없음              → miss : 바로 계산해서 저장
+    같은 key 의 백그라운드 갱신은 동시에 하나만 돈다.
+    갱신은 pool 을 주지 않으면 모듈 공용 refresh_pool() 에서 돈다.
+    """
+
+    def __init__(self, store, namespace: str, ttl: float, stale_ttl: float = 0.0, pool=None):
+        self.store     = store
+        self.namespace = namespace
+        self.ttl       = ttl
+        self.stale_ttl = stale_ttl
+        self._pool     = pool
+        self._inflight = set()
+        self._lock     = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def pool(self):
+        return self._pool or refresh_pool()
+
+    def reset_stats(self):
+        with self._lock:
+            self.counts = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts)
+
+    def _count(self, name: str):
+        # 요청 스레드와 갱신 스레드가 함께 올린다
+        with self._lock:
+            self.counts[name] += 1
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def lookup(self, key: str):
+        """(value, "fresh" | "stale" | "miss")"""
+        item = self.store.get(self._key(key))
+        if item is None:
+            return None, "miss"
+        value, stored_at = item
+        age = time.time() - stored_at
+        if age < self.ttl:
+            return value, "fresh"
+        if age < self.ttl + self.stale_ttl:
+            return value, "stale"
+        return None, "miss"
+
+    def put(self, key: str, value):
+        self.store.set(self._key(key), value)
+
+    def _refresh(self, key: str, compute, should_store):
+        try:
+            value = compute()
+            if should_store(value):
+                self.put(key, value)
+            self._count("refreshes")
+        except Exception as e:
+            self._count("refresh_errors")
+            print(f"⚠️ cache refresh failed ({self.namespace}:{key}): {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard(key)
+
+    def get_or_compute(self, key: str, compute, should_store=lambda value: True):
+        value, state = self.lookup(key)
+        if state == "fresh":
+            self._count("hits")
+            return value
+        if state == "stale":
+            self._count("stale_hits")
+            with self._lock:
+                start = key not in self._inflight
+                self._inflight.add(key)
+            if start:
+                self.pool.submit(self._refresh, key, compute, should_store)
+            return value
+        self._count("misses")
+        value = compute()
+        if should_store(value):
+            self.put(key, value)
+        return value
@@ -0,0 +1,220 @@
+import os
+import re
+import sys
+import shutil
+import hashlib
+import random
+import tarfile
+import threading
+import importlib.util
+import numpy as np
+
+import features
+import instrument
+import clients
+
+# xgboost 는 local 백엔드가 처음 쓸 때 import (endpoint 경로는 cold start 에 로드하지 않음)
+# 설치되어 있지 않으면 로컬 추론만 비활성화 (endpoint 경로는 그대로 동작)
+xgb = None
+
+def _xgboost():
+    global xgb
+    if xgb is None:
+        import xgboost
+        xgb = xgboost
+    return xgb
+
+# ─────────────────────────────────────
+# 이적 확률 모델 호출
+#   endpoint : SageMaker endpoint 에 text/csv 로 (여러 행을 한 번에)
+#   local    : 학습 산출물(model.tar.gz / xgboost-model)을 프로세스당 한 번 로드해 직접 추론
+# KICKON_MODEL_BACKEND 로 선택. local 일 때 KICKON_MODEL_PARITY 비율만큼
+# 같은 행을 endpoint 에도 보내 결과 차이를 로그로 남긴다
+# ─────────────────────────────────────
+
+BACKEND       = os.getenv("KICKON_MODEL_BACKEND", "endpoint")
+ENDPOINT_NAME = os.getenv("KICKON_MODEL_ENDPOINT", "xgboost-kickon-endpoint-v9")
+REGION        = "ap-northeast-2"
+MODEL_URI     = os.getenv("KICKON_MODEL_URI", "s3://kickon-ml-data-bucket/models/xgboost-kickon-v9/model.tar.gz")
+MODEL_DIR     = os.getenv("KICKON_MODEL_DIR", "/tmp/kickon_model")
+PARITY_RATE   = float(os.getenv("KICKON_MODEL_PARITY", "0"))
+PARITY_TOL    = 1e-4
+
+
+def available() -> bool:
+    return xgb is not None or importlib.util.find_spec("xgboost") is not None
+
+
+class EndpointModel:
+    name = "endpoint"
+
+    def __init__(self, endpoint_name: str = ENDPOINT_NAME, client=None):
+        self.endpoint_name = endpoint_name
+        self._client       = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = clients.boto("sagemaker-runtime", REGION)
+        return self._client
+
+    def predict(self, matrix) -> np.ndarray:
+        """FEATURE_COLUMNS 행렬 → 행 순서대로 확률 (XGBoost 컨테이너는 줄바꿈 또는 콤마로 구분해 응답)"""
+        payload = features.to_csv_payload(matrix)
+        with instrument.span("sagemaker.invoke"):
+            resp = self.client.invoke_endpoint(
+                EndpointName=self.endpoint_name,
+                ContentType="text/csv",
+                Body=payload,
+            )
+            body = resp["Body"].read().decode("utf-8")
+        instrument.count("sagemaker.rows", len(matrix))
+        probs = np.array([float(v) for v in re.split(r"[,\s]+", body.strip()) if v])
+        if len(probs) != len(matrix):
+            raise ValueError(f"endpoint returned {len(probs)} scores for {len(matrix)} rows")
+        return probs
+
+
+def _cache_dir(uri: str, version: str, model_dir: str) -> str:
+    """URI + 버전(S3 ETag / 로컬 수정 시각)별 캐시 디렉터리 — 다른 모델이나 같은 키를 덮어쓴 모델을 섞지 않음"""
+    digest = hashlib.sha1(f"{uri}|{version}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(model_dir, digest)
+
+
+def fetch_artifact(uri: str = MODEL_URI, model_dir: str = MODEL_DIR) -> str:
+    """
+    S3 / 로컬의 model.tar.gz 또는 모델 파일 → 로컬 모델 파일 경로.
+    SageMaker XGBoost 산출물은 tar 안에 xgboost-model 하나가 들어 있다.
+    받은 파일 / 푼 모델은 model_dir/{URI+버전 해시}/ 에 두고 같은 산출물이면 다시 쓴다.
+    """
+    path = uri
+    if uri.startswith("s3://"):
+        bucket, _, key = uri[len("s3://"):].partition("/")
+        s3   = clients.boto("s3")
+        etag = s3.head_object(Bucket=bucket, Key=key)["ETag"].strip('"')
+        cache_dir = _cache_dir(uri, etag, model_dir)
+        path = os.path.join(cache_dir, os.path.basename(key))
+        if not os.path.exists(path):
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            s3.download_file(bucket, key, tmp)
+            os.replace(tmp, path)
+    else:
+        cache_dir = _cache_dir(os.path.abspath(uri), os.path.getmtime(uri), model_dir)
+    if path.endswith((".tar.gz", ".tgz")):
+        out = os.path.join(cache_dir, "xgboost-model")
+        if not os.path.exists(out):
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{out}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with tarfile.open(path) as tar:
+                member = next(m for m in tar.getmembers() if m.isfile())
+                with tar.extractfile(member) as src, open(tmp, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            os.replace(tmp, out)
+        path = out
+    return path
+
+
+def load_booster(path: str):
+    xgb = _xgboost()
+    booster = xgb.Booster()
+    try:
+        booster.load_model(path)
+    except xgb.core.XGBoostError:
+        # 예전 SageMaker XGBoost 컨테이너(1.0 이하)는 Booster 를 pickle 로 저장
+        import pickle
+        with open(path, "rb") as fp:
+            booster = pickle.load(fp)
+    return booster
+
+
+class LocalModel:
+    name = "local"
+
+    def __init__(self, uri: str = MODEL_URI, booster=None, columns: list = None):
+        if booster is None and not available():
+            raise RuntimeError("xgboost is not installed; use KICKON_MODEL_BACKEND=endpoint")
+        self.uri      = uri
+        self._booster = booster
+        self.columns  = columns or features.FEATURE_COLUMNS   # booster 가 학습한 특성 (순서 포함)
+        self._lock    = threading.Lock()
+
+    @property
+    def booster(self):
+        if self._booster is None:
+            with self._lock:
+                if self._booster is None:
+                    self._booster = load_booster(fetch_artifact(self.uri))
+        return self._booster
+
+    def predict(self, matrix) -> np.ndarray:
+        values  = np.asarray(matrix[self.columns], dtype="float32")
+        booster = self.booster   # 첫 호출의 모델 로드는 span 밖에서
+        with instrument.span("model.local"):
+            return np.asarray(booster.predict(_xgboost().DMatrix(values)), dtype="float64")
+
+
+def parity_check(local, endpoint, matrix, tol: float = PARITY_TOL) -> dict:
+    """같은 행렬을 두 백엔드로 예측해 최대 오차 비교"""
+    a, b = local.predict(matrix), endpoint.predict(matrix)
+    diff = float(np.max(np.abs(a - b))) if len(a) else 0.0
+    return {"rows": len(a), "max_abs_diff": diff, "ok": diff <= tol}
+
+
+class CheckedModel:
+    """local 로 답하고, parity_rate 비율의 호출은 endpoint 결과와 비교해 로그로 남긴다"""
+
+    def __init__(self, local, endpoint, parity_rate: float = PARITY_RATE):
+        self.name        = local.name
+        self.local       = local
+        self.endpoint    = endpoint
+        self.parity_rate = parity_rate
+
+    def predict(self, matrix) -> np.ndarray:
+        probs = self.local.predict(matrix)
+        if self.parity_rate > 0 and random.random() < self.parity_rate:
+            try:
+                other = self.endpoint.predict(matrix)
+                diff  = float(np.max(np.abs(probs - other))) if len(probs) else 0.0
+                instrument.count("model.parity_checks")
+                if diff > PARITY_TOL:
+                    instrument.count("model.parity_mismatch")
+                    print(f"⚠️ model parity mismatch: rows={len(probs)} max_abs_diff={diff:.6f}")
+            except Exception as e:
+                print(f"⚠️ model parity check skipped: {e}")
+        return probs
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """설정(KICKON_MODEL_BACKEND)에 맞는 모델 — 프로세스당 하나"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                if BACKEND == "local":
+                    _model = CheckedModel(LocalModel(), EndpointModel())
+                elif BACKEND == "endpoint":
+                    _model = EndpointModel()
+                else:
+                    raise ValueError(f"unknown KICKON_MODEL_BACKEND: {BACKEND}")
+    return _model
+
+
+def predict(matrix) -> np.ndarray:
+    return get_model().predict(matrix)
+
+
+if __name__ == "__main__":
+    # python model_backend.py team_0000.csv ...  → 로컬 모델과 endpoint 결과 비교
+    import pandas as pd
+    frames = [pd.read_csv(p) for p in sys.argv[1:]]
+    if not frames:
+        sys.exit("usage: python model_backend.py CSV [CSV ...]")
+    matrix = features.build_feature_matrix(pd.concat(frames, ignore_index=True))
+    report = parity_check(LocalModel(), EndpointModel(), matrix)
+    print(report)
+    sys.exit(0 if report["ok"] else 1)
@@ -0,0 +1,362 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import clients
+import kv_store
+
+# ─────────────────────────────────────
+# 선수 이름 → Transfermarkt 프로필 경로 색인
+#   - 크롤러가 팀을 끝낼 때마다 manifest(프로필 URL → 이름)로 팀 샤드를 쓴다
+#       {KICKON_NAME_INDEX}/{리그}/{시즌}/team_XXXX.json
+#   - 예측은 이름을 먼저 색인에서 찾고, 없거나 애매하면 빠른 검색(schnellsuche)으로
+#     찾은 뒤 그 결과를 learned/ 에 별칭 하나씩 남긴다
+#   - compact_learned() 가 learned/ 를 aliases/ 의 ALIAS_SHARDS 개 파일로 합치고 원본을 지운다
+#     (크롤러가 리그 전체를 끝냈을 때 한 번 — 동시에 여러 곳에서 돌리지 않음)
+#   - 조회: 정규화(악센트 제거 / 소문자 / 기호 제거)한 이름 일치 → 트라이그램 유사도
+#     (질의 단어가 모두 들어 있는 이름은 TOKEN_SCORE 로 취급, 예: "mbappe" → "kylian mbappe")
+#     1등과 2등 점수 차가 MARGIN 보다 작으면 애매한 것으로 보고 None (원격 검색으로)
+# KICKON_NAME_INDEX = s3://버킷/경로 / 로컬 디렉터리 / off
+# ─────────────────────────────────────
+
+INDEX_URI       = os.getenv("KICKON_NAME_INDEX", "s3://kickon-ml-data-bucket/EPL/name_index")
+REFRESH_SECONDS = float(os.getenv("KICKON_NAME_INDEX_REFRESH", "3600"))
+MIN_SCORE       = float(os.getenv("KICKON_NAME_INDEX_MIN_SCORE", "0.55"))
+MARGIN          = 0.1
+TOKEN_SCORE     = 0.9
+MAX_CANDIDATES  = 50
+LEARNED_DIR     = "learned"
+ALIAS_DIR       = "aliases"
+ALIAS_SHARDS    = 16
+
+# NFKD 로 분해되지 않는 글자
+_FOLD = str.maketrans({"ø": "o", "ł": "l", "đ": "d", "æ": "ae", "œ": "oe", "ı": "i", "ð": "d", "þ": "th"})
+
+
+def normalize(name: str) -> str:
+    """"  Martin ØDEGAARD " → "martin odegaard", "N'Golo Kanté" → "n golo kante" """
+    folded = unicodedata.normalize("NFKD", name or "")
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    folded = folded.casefold().translate(_FOLD)
+    return " ".join(re.sub(r"[^\w]+", " ", folded).split())
+
+
+def trigrams(norm: str) -> set:
+    """단어마다 앞 두 칸 / 뒤 한 칸을 띄운 3글자 조각 (pg_trgm 과 같은 방식)"""
+    grams = set()
+    for token in norm.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def profile_path(url: str) -> str:
+    """전체 URL 이어도 /{slug}/profil/spieler/{id} 경로만"""
+    m = re.search(r"(/[^/]+/profil/spieler/\d+)", url or "")
+    return m.group(1) if m else url
+
+
+def player_id(url: str):
+    m = re.search(r"/spieler/(\d+)", url or "")
+    return m.group(1) if m else None
+
+
+class NameIndex:
+    def __init__(self):
+        self.entries = {}   # 선수 id → {"path", "names", ...meta}
+        self.by_name = {}   # 정규화한 이름 → {선수 id}
+        self.by_gram = {}   # 트라이그램 → {(선수 id, 정규화한 이름)}
+        self.n_grams = {}   # 정규화한 이름 → 트라이그램 수
+        self.counts  = Counter()
+        self._lock   = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, name: str, url: str, **meta):
+        norm = normalize(name)
+        path = profile_path(url)
+        if not norm or not path:
+            return
+        key = player_id(path) or path
+        with self._lock:
+            entry = self.entries.setdefault(key, {"path": path, "names": set()})
+            entry.update(meta)
+            if norm in entry["names"]:
+                return
+            entry["names"].add(norm)
+            self.by_name.setdefault(norm, set()).add(key)
+            grams = trigrams(norm)
+            self.n_grams[norm] = len(grams)
+            for g in grams:
+                self.by_gram.setdefault(g, set()).add((key, norm))
+
+    def _result(self, key: str, score: float, match: str) -> dict:
+        entry = self.entries[key]
+        return {"path": entry["path"], "id": player_id(entry["path"]), "score": round(score, 3),
+                "match": match, "team": entry.get("team")}
+
+    def lookup(self, name: str):
+        """{"path", "id", "score", "match", "team"} 또는 None (없음 / 애매함)"""
+        norm = normalize(name)
+        if not norm:
+            return None
+        with self._lock:
+            exact = self.by_name.get(norm, ())
+            if len(exact) == 1:
+                self.counts["exact"] += 1
+                return self._result(next(iter(exact)), 1.0, "exact")
+            if len(exact) > 1:
+                # 동명이인 — 색인만으로는 고를 수 없음
+                self.counts["ambiguous"] += 1
+                return None
+
+            grams  = trigrams(norm)
+            tokens = set(norm.split())
+            shared = Counter()
+            for g in grams:
+                shared.update(self.by_gram.get(g, ()))
+            best = {}
+            for (key, cand), n in shared.most_common(MAX_CANDIDATES):
+                score = n / (len(grams) + self.n_grams[cand] - n)
+                if tokens <= set(cand.split()):
+                    score = max(score, TOKEN_SCORE)
+                best[key] = max(best.get(key, 0.0), score)
+
+            ranked = sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+            if not ranked or ranked[0][1] < MIN_SCORE:
+                self.counts["miss"] += 1
+                return None
+            if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < MARGIN:
+                self.counts["ambiguous"] += 1
+                return None
+            self.counts["fuzzy"] += 1
+            return self._result(ranked[0][0], ranked[0][1], "fuzzy")
+
+    def stats(self) -> dict:
+        return {"players": len(self.entries), "names": len(self.by_name), **self.counts}
+
+
+# ─── 저장소 (S3 또는 로컬 디렉터리) ───
+
+def _split(uri: str):
+    bucket, _, prefix = uri[len("s3://"):].partition("/")
+    return bucket, prefix.rstrip("/")
+
+
+def shard_path(competition: str, season: str, team_idx: int) -> str:
+    return f"{competition}/{season}/team_{team_idx:04d}.json"
+
+
+def write_json(relpath: str, records: list, uri: str = None, s3=None):
+    uri = uri or INDEX_URI
+    body = json.dumps(records, ensure_ascii=False).encode("utf-8")
+    if uri.startswith("s3://"):
+        bucket, prefix = _split(uri)
+        (s3 or clients.boto("s3")).put_object(Bucket=bucket, Key=f"{prefix}/{relpath}", Body=body,
+                                              ContentType="application/json")
+    else:
+        path = os.path.join(uri, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as fp:
+            fp.write(body)
+
+
+def save_shard(competition: str, season: str, team_idx: int, team: str, manifest: dict,
+               uri: str = None, s3=None) -> int:
+    """크롤러 팀 manifest({프로필 URL: {"name", ...}}) → 팀 샤드. 기록한 선수 수"""
+    records = [{"name": e["name"], "path": profile_path(url), "team": team,
+                "competition": competition, "season": season}
+               for url, e in manifest.items() if e.get("name")]
+    write_json(shard_path(competition, season, team_idx), records, uri, s3)
+    return len(records)
+
+
+def _list(uri: str, sub: str = "", s3=None) -> list:
+    """uri(/sub) 아래 *.json 의 [(키 또는 경로, 수정 시각)]"""
+    if uri.startswith("s3://"):
+        s3 = s3 or clients.boto("s3")
+        bucket, prefix = _split(uri)
+        base = f"{prefix}/{sub}/" if sub else prefix + "/"
+        return [(obj["Key"], obj["LastModified"].timestamp())
+                for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=base)
+                for obj in page.get("Contents", []) if obj["Key"].endswith(".json")]
+    root = os.path.join(uri, sub)
+    return [(os.path.join(d, f), os.path.getmtime(os.path.join(d, f)))
+            for d, _, files in os.walk(root) for f in files if f.endswith(".json")]
+
+
+def _read(uri: str, key: str, s3=None) -> list:
+    if uri.startswith("s3://"):
+        bucket, _ = _split(uri)
+        return json.loads((s3 or clients.boto("s3")).get_object(Bucket=bucket, Key=key)["Body"].read())
+    with open(key, encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def _delete(uri: str, key: str, s3=None):
+    if uri.startswith("s3://"):
+        bucket, _ = _split(uri)
+        (s3 or clients.boto("s3")).delete_object(Bucket=bucket, Key=key)
+    else:
+        try:
+            os.remove(key)
+        except FileNotFoundError:
+            pass
+
+
+def _read_all(uri: str, s3=None) -> list:
+    """uri 아래 모든 *.json 의 레코드 (팀 샤드 + aliases + 아직 합치지 않은 learned)"""
+    if uri.startswith("s3://"):
+        s3 = s3 or clients.boto("s3")
+    keys = [key for key, _ in _list(uri, s3=s3)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return [rec for recs in pool.map(lambda key: _read(uri, key, s3), keys) for rec in recs]
+
+
+def alias_shard(norm: str) -> str:
+    return f"{ALIAS_DIR}/{int(hashlib.sha1(norm.encode('utf-8')).hexdigest(), 16) % ALIAS_SHARDS:02d}.json"
+
+
+def compact_learned(uri: str = None, s3=None) -> int:
+    """
+    learned/ 의 별칭 파일들을 aliases/ 샤드에 합치고(같은 이름은 나중에 배운 경로가 이김) 원본을 지운다.
+    합친 별칭 수. 합치는 동안 새로 생긴 learned/ 파일은 목록에 없으므로 다음 번에 합쳐진다.
+    """
+    uri = uri or INDEX_URI
+    if not enabled(uri):
+        return 0
+    if uri.startswith("s3://"):
+        s3 = s3 or clients.boto("s3")
+    flush()     # 이 프로세스가 배운 별칭부터 마저 쓴 뒤 합침
+    learned = sorted(_list(uri, LEARNED_DIR, s3), key=lambda kv: kv[1])
+    if not learned:
+        return 0
+    by_shard = {}
+    for key, _ in learned:
+        for rec in _read(uri, key, s3):
+            norm = normalize(rec["name"])
+            by_shard.setdefault(alias_shard(norm), {})[norm] = rec
+    existing = {os.path.basename(key): key for key, _ in _list(uri, ALIAS_DIR, s3)}
+    for rel, new in by_shard.items():
+        old = existing.get(os.path.basename(rel))
+        merged = {normalize(rec["name"]): rec for rec in (_read(uri, old, s3) if old else [])}
+        merged.update(new)
+        write_json(rel, list(merged.values()), uri, s3)
+    for key, _ in learned:
+        _delete(uri, key, s3)
+    return sum(len(v) for v in by_shard.values())
+
+
+def load(uri: str = None, s3=None) -> NameIndex:
+    index = NameIndex()
+    for rec in _read_all(uri or INDEX_URI, s3):
+        index.add(rec["name"], rec["path"], **{k: v for k, v in rec.items() if k not in ("name", "path")})
+    return index
+
+
+# ─── 프로세스 단위 색인 (REFRESH_SECONDS 마다 다시 읽음) ───
+# 처음 한 번만 요청 중에 읽고, 이후 다시 읽기와 learned/ 쓰기는 kv_store.refresh_pool() 에서
+# (그동안 요청은 이전 색인을 그대로 사용 — stale-while-revalidate)
+
+_index     = None
+_loaded_at = 0.0
+_reloading = False
+_load_lock = threading.Lock()
+_pending   = []            # 아직 끝나지 않은 백그라운드 작업 (flush() 로 기다림)
+
+
+def enabled(uri: str = None) -> bool:
+    uri = uri or INDEX_URI
+    return uri != "off"
+
+
+def _background(fn, *args):
+    fut = kv_store.refresh_pool().submit(fn, *args)
+    with _load_lock:
+        _pending[:] = [f for f in _pending if not f.done()] + [fut]
+    return fut
+
+
+def flush(timeout: float = None):
+    """백그라운드 다시 읽기 / learned 쓰기가 끝날 때까지 기다림 (테스트, 크롤러 compact 전)"""
+    with _load_lock:
+        pending = list(_pending)
+    wait(pending, timeout=timeout)
+
+
+def _load_or_keep() -> NameIndex:
+    try:
+        return load()
+    except Exception as e:
+        print(f"⚠️ name index load failed: {e}")
+        return _index or NameIndex()
+
+
+def _reload():
+    global _index, _loaded_at, _reloading
+    fresh = _load_or_keep()
+    with _load_lock:
+        _index, _loaded_at, _reloading = fresh, time.time(), False
+
+
+def get_index():
+    """색인을 읽을 수 없으면 None (호출 쪽은 원격 검색만 사용)"""
+    global _index, _loaded_at, _reloading
+    if not enabled():
+        return None
+    if _index is None:
+        with _load_lock:
+            if _index is None:
+                _index, _loaded_at = _load_or_keep(), time.time()
+        return _index
+    if time.time() - _loaded_at >= REFRESH_SECONDS:
+        with _load_lock:
+            start = not _reloading and time.time() - _loaded_at >= REFRESH_SECONDS
+            _reloading = _reloading or start
+        if start:
+            _background(_reload)
+    return _index
+
+
+def _write_learned(relpath: str, records: list, uri: str = None):
+    try:
+        write_json(relpath, records, uri)
+    except Exception as e:
+        print(f"⚠️ name index learn failed: {e}")
+
+
+def learn(name: str, path: str, uri: str = None):
+    """
+    원격 검색으로 찾은 (질의 이름, 프로필 경로) 를 메모리 색인에 바로, learned/ 에는 백그라운드로 추가
+    (Lambda 가 응답 후 멈추면 쓰기는 다음 호출 때 이어서 끝남)
+    """
+    index = get_index()
+    if index is None:
+        return
+    index.add(name, path, source="search")
+    norm = normalize(name)
+    digest = hashlib.sha1(norm.encode("utf-8")).hexdigest()[:16]
+    _background(_write_learned, f"{LEARNED_DIR}/{digest}.json",
+                [{"name": name, "path": profile_path(path), "source": "search"}], uri)
+
+
+def resolve(name: str, search) -> tuple:
+    """
+    (프로필 경로, 출처). 색인에서 찾으면 ("/..../profil/spieler/123", "index"),
+    아니면 search(name) (원격 검색, 경로 또는 None) 결과를 색인에 남기고 (경로, "search")
+    """
+    index = get_index()
+    hit = index.lookup(name) if index is not None else None
+    if hit is not None:
+        return hit["path"], "index"
+    path = search(name)
+    if path:
+        learn(name, path)
+    return path, "search"
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+import kv_store
+import instrument
+
+# ─────────────────────────────────────
+# 뉴스 기사 이적 가능성 점수 (GPT)
+#   - (선수, 기사)별 점수를 본문 해시로 캐시 → 처음 보는 기사만 분류
+#     점수는 "그 선수의" 이적 가능성이라 두 선수가 나오는 기사는 선수마다 따로 분류
+#   - 여러 선수의 새 기사를 한 요청에 묶어 보냄 (배치 모드)
+#   - 요청 수 / 토큰 사용량 / 지연 시간 통계
+#   - 모델은 주입식: OpenAIChatModel (운영), StubModel (로컬 / 오프라인)
+# ─────────────────────────────────────
+
+SYSTEM_PROMPT = """
+You are a football transfer prediction assistant.
+For each article below (id, player and plain-text summary), estimate the 0–100 probability it reports a genuine, still-possible transfer move for that player.
+
+⚠️ Special rules:
+• If an article reports a recent contract extension or re-signing, reduce its probability by at least 30 points.
+• If an article says the player’s current club is actively interested in keeping them (e.g. “club wants to keep,” “offer new deal”), boost its probability by at least 20 points.
+• If an article contains the keyword “FA” (or “Free Agent”), boost its probability by at least 20 points.
+
+Return ONLY valid JSON mapping every article id to its probability, like:
+{"scores": {"A1": 12, "A2": 55, "A3": 88}}
+""".strip()
+
+# 프롬프트가 바뀌면 캐시 key 도 바뀌도록
+PROMPT_VERSION = os.getenv("KICKON_NEWS_PROMPT_VERSION",
+                           hashlib.sha1(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:8])
+CHAT_MODEL     = os.getenv("KICKON_NEWS_MODEL", "gpt-4o-mini")
+CACHE_URI      = os.getenv("KICKON_NEWS_CACHE", "memory:20000")
+CACHE_TTL      = float(os.getenv("KICKON_NEWS_CACHE_TTL", str(30 * 86400)))
+BATCH_ARTICLES = int(os.getenv("KICKON_NEWS_BATCH", "25"))   # 요청 하나에 담을 기사 수
+TOKENS_PER_ARTICLE = 12
+MAX_ATTEMPTS   = 3
+
+
+def _fold(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def article_key(summary: str, player: str = "") -> str:
+    """같은 선수의, 공백 / 대소문자만 다른 같은 기사는 같은 key"""
+    return hashlib.sha1(f"{PROMPT_VERSION}|{_fold(player)}|{_fold(summary)}".encode("utf-8")).hexdigest()
+
+
+class OpenAIChatModel:
+    """openai.ChatCompletion 호출 → (content, finish_reason, usage)"""
+
+    def __init__(self, model: str = CHAT_MODEL):
+        self.model = model
+
+    def __call__(self, system_prompt: str, user_msg: str, max_tokens: int):
+        import openai
+        resp = openai.ChatCompletion.create(
+            model=self.model,
+            response_format={"type": "json_object"},
+            temperature=0.0,
+            max_tokens=max_tokens,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user",   "content": user_msg},
+            ],
+        )
+        usage = resp.get("usage") or {}
+        return (resp.choices[0].message.content, resp.choices[0].finish_reason,
+                {"prompt_tokens": usage.get("prompt_tokens", 0),
+                 "completion_tokens": usage.get("completion_tokens", 0)})
+
+
+class StubModel:
+    """
+    네트워크 없이 같은 입력에 항상 같은 점수를 내는 모델 (테스트 / 오프라인 백테스트용).
+    키워드로 점수를 정하고, 호출마다 받은 기사 id 를 calls 에 남긴다.
+    """
+    KEYWORDS = {"agreement": 30, "bid": 20, "signs": 30, "medical": 30, "free agent": 20,
+                "talks": 10, "interest": 10, "extension": -30, "new deal": -30, "stay": -20}
+
+    def __init__(self, base: int = 40):
+        self.base  = base
+        self.calls = []
+
+    def __call__(self, system_prompt: str, user_msg: str, max_tokens: int):
+        scores = {}
+        for block in user_msg.split("\n\n---\n\n"):
+            head, _, body = block.partition("\n")
+            aid  = head.split()[0]
+            low  = body.lower()
+            score = self.base + sum(v for k, v in self.KEYWORDS.items() if k in low)
+            scores[aid] = max(0, min(100, score))
+        self.calls.append(list(scores))
+        content = json.dumps({"scores": scores})
+        return content, "stop", {"prompt_tokens": len(user_msg) // 4, "completion_tokens": len(content) // 4}
+
+
+class NewsScorer:
+    def __init__(self, model=None, store=None, ttl: float = CACHE_TTL, batch_articles: int = BATCH_ARTICLES):
+        self.model          = model or OpenAIChatModel()
+        self.store          = store
+        self.ttl            = ttl
+        self.batch_articles = batch_articles
+        self._lock          = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.counts = {"requests": 0, "articles": 0, "cache_hits": 0, "classified": 0, "failed": 0,
+                       "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0}
+
+    def stats(self) -> dict:
+        out = dict(self.counts)
+        out["latency_ms"] = round(out["latency_ms"], 1)
+        return out
+
+    def _count(self, **kw):
+        with self._lock:
+            for k, v in kw.items():
+                self.counts[k] += v
+        # 지연 시간은 openai.chat span 으로 따로 잡힌다
+        instrument.add_counters("news", {k: v for k, v in kw.items() if k != "latency_ms"})
+
+    def _cached(self, key: str):
+        if self.store is None:
+            return None
+        item = self.store.get(key)
+        if item is None or time.time() - item[1] >= self.ttl:
+            return None
+        return item[0]
+
+    def _classify(self, batch: list) -> dict:
+        """[(key, player, summary)] → {key: 0~1}. 응답이 잘리면 max_tokens 를 두 배로 늘려 재시도"""
+        ids      = {f"A{i + 1}": key for i, (key, _, _) in enumerate(batch)}
+        user_msg = "\n\n---\n\n".join(
+            f"A{i + 1} PLAYER: {player}\n{summary}" for i, (_, player, summary) in enumerate(batch)
+        )
+        max_tokens = 32 + TOKENS_PER_ARTICLE * len(batch)
+        for _ in range(MAX_ATTEMPTS):
+            start = time.perf_counter()
+            with instrument.span("openai.chat"):
+                content, finish, usage = self.model(SYSTEM_PROMPT, user_msg, max_tokens)
+            self._count(requests=1, latency_ms=(time.perf_counter() - start) * 1000,
+                        prompt_tokens=usage.get("prompt_tokens", 0),
+                        completion_tokens=usage.get("completion_tokens", 0))
+            if finish == "stop":
+                try:
+                    scores = json.loads(content)["scores"]
+                    return {ids[aid]: float(p) / 100.0 for aid, p in scores.items() if aid in ids}
+                except (KeyError, TypeError, ValueError):
+                    pass
+            max_tokens *= 2
+        return {}
+
+    def score_players(self, articles_by_player: dict) -> dict:
+        """
+        {선수: [{"summary": ...}, ...]} → {선수: {"per_article": [0~1, ...], "overall": 0~1}}
+        캐시에 없는 (선수, 기사)만 중복 제거 후 batch_articles 개씩 묶어 분류한다.
+        overall 은 기사 점수 평균, 점수를 얻지 못한 기사는 빠진다.
+        점수를 하나도 얻지 못하면(기사 없음 / 분류 실패) overall 은 None — "이적 가능성 0" 과 구분.
+        """
+        keyed  = {p: [article_key(a.get("summary", ""), p) for a in arts] for p, arts in articles_by_player.items()}
+        scores, todo = {}, {}
+        for player, arts in articles_by_player.items():
+            for key, art in zip(keyed[player], arts):
+                if key in scores or key in todo:
+                    continue
+                hit = self._cached(key)
+                if hit is not None:
+                    scores[key] = hit
+                else:
+                    todo[key] = (key, player, art.get("summary", ""))
+        self._count(articles=sum(len(v) for v in keyed.values()),
+                    cache_hits=sum(1 for ks in keyed.values() for k in ks if k in scores))
+
+        pending = list(todo.values())
+        for i in range(0, len(pending), self.batch_articles):
+            batch = pending[i:i + self.batch_articles]
+            got   = self._classify(batch)
+            self._count(classified=len(got), failed=len(batch) - len(got))
+            for key, prob in got.items():
+                scores[key] = prob
+                if self.store is not None:
+                    self.store.set(key, prob)
+
+        out = {}
+        for player, keys in keyed.items():
+            per = [scores[k] for k in keys if k in scores]
+            out[player] = {"per_article": per, "overall": sum(per) / len(per) if per else None}
+        return out
+
+    def score_articles(self, articles: list, player: str = "") -> tuple:
+        """단건 호환: (기사별 점수, 전체 점수 또는 None) — 기존 classify_with_gpt 반환 형태"""
+        res = self.score_players({player: articles})[player]
+        return res["per_article"], res["overall"]
+
+
+def from_env(model=None) -> NewsScorer:
+    return NewsScorer(model=model, store=kv_store.from_uri(CACHE_URI))
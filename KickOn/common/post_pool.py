@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import uuid
+
+import clients
+
+# ─────────────────────────────────────
+# 미리 생성해 둔 AI 게시글 큐 (post_ai fill → publish)
+#   {KICKON_POST_POOL}/queue/{kind}/{생성시각}-{id}.json   게시 대기
+#   {KICKON_POST_POOL}/claimed/{kind}/...                 게시 중 (claim 으로 옮긴 것)
+#   - claim(kind, n): 오래된 것부터 n 개를 claimed/ 로 옮겨 반환
+#   - ack(post)     : 게시 성공 → 삭제,  release(post): 실패 → queue/ 로 되돌림
+#   - recover()     : CLAIM_TIMEOUT 보다 오래 claimed/ 에 남은 글(게시 중 끊긴 실행)을 queue/ 로
+# 로컬 디렉터리는 os.replace 로 옮기므로 동시에 claim 해도 한 쪽만 가져간다.
+# S3 는 복사 + 삭제라 동시 실행이 같은 글을 가져갈 수 있음 (게시 요청의 id 로 중복 등록 방지)
+# KICKON_POST_POOL = s3://버킷/경로 / 로컬 디렉터리
+# ─────────────────────────────────────
+
+POOL_URI      = os.getenv("KICKON_POST_POOL", "s3://kickon-ml-data-bucket/postai/pool")
+CLAIM_TIMEOUT = float(os.getenv("KICKON_POST_POOL_CLAIM_TIMEOUT", "900"))
+
+
+class _LocalQueue:
+    def __init__(self, root: str):
+        self.root = root
+
+    def list(self, prefix: str) -> list:
+        """[(상대 경로, 수정 시각)] 이름순"""
+        base = os.path.join(self.root, prefix)
+        if not os.path.isdir(base):
+            return []
+        return [(f"{prefix}/{f}", os.path.getmtime(os.path.join(base, f)))
+                for f in sorted(os.listdir(base)) if f.endswith(".json")]
+
+    def put(self, rel: str, body: bytes):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as fp:
+            fp.write(body)
+        os.replace(tmp, path)
+
+    def get(self, rel: str) -> bytes:
+        with open(os.path.join(self.root, rel), "rb") as fp:
+            return fp.read()
+
+    def move(self, src: str, dst: str) -> bool:
+        """다른 실행이 먼저 옮겼으면 False"""
+        os.makedirs(os.path.dirname(os.path.join(self.root, dst)), exist_ok=True)
+        try:
+            os.replace(os.path.join(self.root, src), os.path.join(self.root, dst))
+        except FileNotFoundError:
+            return False
+        os.utime(os.path.join(self.root, dst))
+        return True
+
+    def delete(self, rel: str):
+        try:
+            os.remove(os.path.join(self.root, rel))
+        except FileNotFoundError:
+            pass
+
+
+class _S3Queue:
+    def __init__(self, uri: str):
+        self.bucket, _, prefix = uri[len("s3://"):].partition("/")
+        self.prefix = prefix.rstrip("/")
+        self.s3     = clients.boto("s3")
+
+    def _key(self, rel: str) -> str:
+        return f"{self.prefix}/{rel}"
+
+    def list(self, prefix: str) -> list:
+        out = []
+        for page in self.s3.get_paginator("list_objects_v2").paginate(Bucket=self.bucket,
+                                                                      Prefix=self._key(prefix) + "/"):
+            for obj in page.get("Contents", []):
+                if obj["Key"].endswith(".json"):
+                    out.append((obj["Key"][len(self.prefix) + 1:], obj["LastModified"].timestamp()))
+        return sorted(out)
+
+    def put(self, rel: str, body: bytes):
+        self.s3.put_object(Bucket=self.bucket, Key=self._key(rel), Body=body, ContentType="application/json")
+
+    def get(self, rel: str) -> bytes:
+        return self.s3.get_object(Bucket=self.bucket, Key=self._key(rel))["Body"].read()
+
+    def move(self, src: str, dst: str) -> bool:
+        try:
+            self.s3.copy_object(Bucket=self.bucket, CopySource={"Bucket": self.bucket, "Key": self._key(src)},
+                                Key=self._key(dst))
+        except self.s3.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return False
+            raise
+        self.s3.delete_object(Bucket=self.bucket, Key=self._key(src))
+        return True
+
+    def delete(self, rel: str):
+        self.s3.delete_object(Bucket=self.bucket, Key=self._key(rel))
+
+
+class PostPool:
+    def __init__(self, uri: str = None):
+        uri = uri or POOL_URI
+        self.uri   = uri
+        self.store = _S3Queue(uri) if uri.startswith("s3://") else _LocalQueue(uri)
+
+    def enqueue(self, kind: str, posts: list) -> int:
+        """posts 에 id 가 없으면 붙여서 queue/{kind}/ 에 하나씩 저장"""
+        for post in posts:
+            post = {**post, "kind": kind, "id": post.get("id") or uuid.uuid4().hex,
+                    "created_at": time.time()}
+            rel = f"queue/{kind}/{int(post['created_at'] * 1000):013d}-{post['id']}.json"
+            self.store.put(rel, json.dumps(post, ensure_ascii=False).encode("utf-8"))
+        return len(posts)
+
+    def size(self, kind: str) -> int:
+        return len(self.store.list(f"queue/{kind}"))
+
+    def claim(self, kind: str, n: int) -> list:
+        """오래된 글부터 최대 n 개. 반환한 글에는 "_claim"(claimed/ 경로) 이 붙는다"""
+        out = []
+        for rel, _ in self.store.list(f"queue/{kind}"):
+            if len(out) >= n:
+                break
+            dst = "claimed/" + rel[len("queue/"):]
+            if not self.store.move(rel, dst):
+                continue
+            post = json.loads(self.store.get(dst))
+            post["_claim"] = dst
+            out.append(post)
+        return out
+
+    def ack(self, post: dict):
+        self.store.delete(post["_claim"])
+
+    def release(self, post: dict):
+        self.store.move(post["_claim"], "queue/" + post["_claim"][len("claimed/"):])
+
+    def recover(self, kind: str, timeout: float = CLAIM_TIMEOUT) -> int:
+        n = 0
+        for rel, mtime in self.store.list(f"claimed/{kind}"):
+            if time.time() - mtime >= timeout and self.store.move(rel, "queue/" + rel[len("claimed/"):]):
+                n += 1
+        return n
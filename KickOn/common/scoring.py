@@ -0,0 +1,142 @@
+import os
+import numpy as np
+
+# ─────────────────────────────────────
+# 최종 이적 확률 조합 + 백테스트 평가 지표
+#   최종 확률 = w * XGBoost 확률 + (1 - w) * 뉴스(GPT) 점수
+#   뉴스 점수가 없는 선수(NaN)는 XGBoost 확률만 사용
+#   평가는 (가중치 w × 임계값 t) 격자 전체를 NumPy 브로드캐스팅 한 번으로 계산
+# ─────────────────────────────────────
+
+BASE_WEIGHT = float(os.getenv("KICKON_BASE_WEIGHT", "0.1"))   # predict / backtest 공통 기본값
+THRESHOLD   = float(os.getenv("KICKON_THRESHOLD", "0.6"))
+WEIGHTS     = np.round(np.linspace(0.0, 1.0, 21), 2)
+THRESHOLDS  = np.round(np.linspace(0.0, 1.0, 101), 2)
+CALIBRATION_BINS = 10
+
+
+def combine_fixed(base_prob, ai_score, w=BASE_WEIGHT):
+    return w * base_prob + (1 - w) * ai_score
+
+
+def combine(base_prob, ai_score, w=BASE_WEIGHT):
+    """뉴스 점수가 없으면(None) 모델 확률만 (blend 의 NaN 처리와 같음)"""
+    return base_prob if ai_score is None else combine_fixed(base_prob, ai_score, w)
+
+
+def blend(base, ai, weights=WEIGHTS) -> np.ndarray:
+    """(N,), (N,) → (W, N). ai 가 NaN 인 선수는 base 그대로"""
+    base = np.asarray(base, dtype="float64")
+    ai   = np.asarray(ai, dtype="float64")
+    w    = np.asarray(weights, dtype="float64")[:, None]
+    return np.where(np.isnan(ai), base, combine_fixed(base, ai, w))
+
+
+def confusion(y, probs, thresholds=THRESHOLDS) -> dict:
+    """probs (W, N) 와 임계값 (T,) → tp / fp / fn / tn 각각 (W, T)"""
+    y    = np.asarray(y, dtype=bool)
+    pred = probs[:, None, :] >= np.asarray(thresholds)[None, :, None]   # (W, T, N)
+    tp = (pred & y).sum(axis=2)
+    fp = (pred & ~y).sum(axis=2)
+    pos = int(y.sum())
+    neg = len(y) - pos
+    return {"tp": tp, "fp": fp, "fn": pos - tp, "tn": neg - fp}
+
+
+def _div(a, b) -> np.ndarray:
+    a = np.asarray(a, dtype="float64")
+    b = np.asarray(b, dtype="float64")
+    return np.divide(a, b, out=np.zeros_like(a), where=b > 0)
+
+
+def grid_metrics(y, probs, thresholds=THRESHOLDS) -> dict:
+    """accuracy / precision / recall / f1 각각 (W, T)"""
+    c = confusion(y, probs, thresholds)
+    n = len(y)
+    precision = _div(c["tp"], c["tp"] + c["fp"])
+    recall    = _div(c["tp"], c["tp"] + c["fn"])
+    return {
+        "accuracy":  _div(c["tp"] + c["tn"], np.full_like(c["tp"], n)),
+        "precision": precision,
+        "recall":    recall,
+        "f1":        _div(2 * precision * recall, precision + recall),
+    }
+
+
+def roc_auc(y, probs) -> np.ndarray:
+    """
+    (W, N) → 가중치별 ROC-AUC (W,). 순위 합(Mann–Whitney U)으로 계산하고 동점은 평균 순위.
+    양성 / 음성 중 하나라도 없으면 NaN.
+    """
+    y    = np.asarray(y, dtype=bool)
+    pos  = int(y.sum())
+    neg  = len(y) - pos
+    if pos == 0 or neg == 0:
+        return np.full(probs.shape[0], np.nan)
+    order  = np.argsort(probs, axis=1, kind="mergesort")
+    sorted_ = np.take_along_axis(probs, order, axis=1)
+    ranks  = np.empty_like(probs)
+    for i in range(probs.shape[0]):
+        # 같은 값끼리 평균 순위 (1부터)
+        _, start, counts = np.unique(sorted_[i], return_index=True, return_counts=True)
+        avg = start + (counts + 1) / 2.0
+        ranks[i, order[i]] = np.repeat(avg, counts)
+    rank_sum = (ranks * y).sum(axis=1)
+    return (rank_sum - pos * (pos + 1) / 2.0) / (pos * neg)
+
+
+def calibration(y, prob, bins: int = CALIBRATION_BINS) -> dict:
+    """구간별 평균 예측 확률 vs 실제 이적 비율 + ECE (기대 보정 오차)"""
+    y    = np.asarray(y, dtype="float64")
+    prob = np.asarray(prob, dtype="float64")
+    idx  = np.clip((prob * bins).astype(int), 0, bins - 1)
+    count    = np.bincount(idx, minlength=bins)
+    mean_p   = _div(np.bincount(idx, weights=prob, minlength=bins), count)
+    frac_pos = _div(np.bincount(idx, weights=y, minlength=bins), count)
+    ece = float((count * np.abs(mean_p - frac_pos)).sum() / max(len(y), 1))
+    return {
+        "bins": [
+            {"range": [round(b / bins, 2), round((b + 1) / bins, 2)], "count": int(count[b]),
+             "mean_pred": round(float(mean_p[b]), 4), "frac_pos": round(float(frac_pos[b]), 4)}
+            for b in range(bins) if count[b]
+        ],
+        "ece": round(ece, 4),
+    }
+
+
+def _at(metrics: dict, wi: int, ti: int) -> dict:
+    return {k: round(float(v[wi, ti]), 4) for k, v in metrics.items()}
+
+
+def _nan_to_none(x):
+    return None if x is None or np.isnan(x) else round(float(x), 4)
+
+
+def evaluate(y, base, ai, weights=WEIGHTS, thresholds=THRESHOLDS,
+             default_w: float = BASE_WEIGHT, default_t: float = THRESHOLD, objective: str = "accuracy") -> dict:
+    """
+    한 묶음(파일 하나 또는 전체)의 평가:
+      - default : 현재 설정(default_w, default_t)의 지표
+      - best    : 격자 전체에서 objective 가 가장 높은 (w, t) 와 그 지표
+      - auc     : 가중치별 ROC-AUC, calibration: best w 의 보정 곡선
+    """
+    weights    = np.asarray(weights, dtype="float64")
+    thresholds = np.asarray(thresholds, dtype="float64")
+    probs   = blend(base, ai, weights)
+    metrics = grid_metrics(y, probs, thresholds)
+    auc     = roc_auc(y, probs)
+
+    wi, ti = np.unravel_index(np.argmax(metrics[objective]), metrics[objective].shape)
+    dw = int(np.abs(weights - default_w).argmin())
+    dt = int(np.abs(thresholds - default_t).argmin())
+    return {
+        "n":         int(len(y)),
+        "positives": int(np.asarray(y).sum()),
+        "with_news": int((~np.isnan(np.asarray(ai, dtype="float64"))).sum()),
+        "default":   {"w": float(weights[dw]), "threshold": float(thresholds[dt]),
+                      **_at(metrics, dw, dt), "roc_auc": _nan_to_none(auc[dw])},
+        "best":      {"objective": objective, "w": float(weights[wi]), "threshold": float(thresholds[ti]),
+                      **_at(metrics, wi, ti), "roc_auc": _nan_to_none(auc[wi])},
+        "auc_by_weight": {f"{w:.2f}": _nan_to_none(a) for w, a in zip(weights, auc)},
+        "calibration": calibration(y, probs[wi]),
+    }
@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import time
+import struct
+import hashlib
+import threading
+import unicodedata
+
+import clients
+
+# ─────────────────────────────────────
+# AI 게시글 제목 저장소 (post_ai 중복 제목 방지)
+#   - 정확히 같은 제목: 정규화(NFKC / 소문자 / 공백·기호 제거) 후 해시 색인
+#   - 거의 같은 제목 : 글자 SHINGLE-gram 의 MinHash → LSH 밴드로 후보만 찾고,
+#                     후보와 실제 Jaccard 가 NEAR_DUP 이상이면 중복
+#   - 최근 MAX_TITLES 개만 보관 (오래된 제목부터 삭제)
+# 프롬프트에는 recent() 의 일부만 넣고, 중복 판정은 생성 뒤 여기서 한다
+# KICKON_TITLE_STORE = s3://버킷/키.json / 로컬 파일 경로 / memory (저장 안 함)
+# ─────────────────────────────────────
+
+STORE_URI  = os.getenv("KICKON_TITLE_STORE", "s3://kickon-ml-data-bucket/postai/used_titles.json")
+MAX_TITLES = int(os.getenv("KICKON_TITLE_STORE_MAX", "5000"))
+NEAR_DUP   = float(os.getenv("KICKON_TITLE_NEAR_DUP", "0.6"))
+SHINGLE    = 2            # 한글 제목은 짧아 2글자 단위가 3글자보다 변형(조사 / 어순)에 강함
+BANDS      = 16
+ROWS       = 2            # MinHash 개수 = BANDS × ROWS (Jaccard 0.6 이면 후보가 될 확률 ≈ 0.999)
+
+_PRIME = (1 << 61) - 1
+# 고정 시드의 (a, b) — 실행 / 프로세스가 달라도 같은 서명
+_PERMS = [(int.from_bytes(hashlib.sha1(f"a{i}".encode()).digest()[:8], "big") % (_PRIME - 1) + 1,
+           int.from_bytes(hashlib.sha1(f"b{i}".encode()).digest()[:8], "big") % _PRIME)
+          for i in range(BANDS * ROWS)]
+
+
+def normalize(title: str) -> str:
+    """" 손흥민의  최다 골 기록은? " → "손흥민의최다골기록은" """
+    text = unicodedata.normalize("NFKC", title or "").casefold()
+    return re.sub(r"[\W_]+", "", text)
+
+
+def title_hash(title: str) -> str:
+    return hashlib.sha1(normalize(title).encode("utf-8")).hexdigest()[:16]
+
+
+def shingles(norm: str) -> set:
+    if len(norm) <= SHINGLE:
+        return {norm} if norm else set()
+    return {norm[i:i + SHINGLE] for i in range(len(norm) - SHINGLE + 1)}
+
+
+def band_keys(grams: set) -> list:
+    """MinHash 서명을 ROWS 개씩 묶은 밴드별 key"""
+    if not grams:
+        return []
+    xs  = [struct.unpack(">Q", hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest())[0] for g in grams]
+    sig = [min((a * x + b) % _PRIME for x in xs) for a, b in _PERMS]
+    return [f"{i}:{hashlib.sha1(repr(sig[i * ROWS:(i + 1) * ROWS]).encode()).hexdigest()[:12]}"
+            for i in range(BANDS)]
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class TitleStore:
+    def __init__(self, records: list = None):
+        self.records = []   # [{"title", "hash", "bands", "at"}] 오래된 것부터
+        self.by_hash = {}   # 해시 → record
+        self.by_band = {}   # 밴드 key → {해시}
+        self._lock   = threading.Lock()
+        for rec in records or []:
+            self._add(rec)
+
+    def __len__(self):
+        return len(self.records)
+
+    def _add(self, rec: dict):
+        if rec["hash"] in self.by_hash:
+            return
+        self.records.append(rec)
+        self.by_hash[rec["hash"]] = rec
+        for band in rec["bands"]:
+            self.by_band.setdefault(band, set()).add(rec["hash"])
+
+    def _evict(self):
+        drop, self.records = self.records[:-MAX_TITLES], self.records[-MAX_TITLES:]
+        for rec in drop:
+            self.by_hash.pop(rec["hash"], None)
+            for band in rec["bands"]:
+                members = self.by_band.get(band)
+                if members is not None:
+                    members.discard(rec["hash"])
+                    if not members:
+                        del self.by_band[band]
+
+    def check(self, title: str):
+        """중복이 아니면 None, 중복이면 {"match": "exact" | "near", "title": 기존 제목, "score"}"""
+        norm = normalize(title)
+        h    = title_hash(title)
+        with self._lock:
+            rec = self.by_hash.get(h)
+            if rec is not None:
+                return {"match": "exact", "title": rec["title"], "score": 1.0}
+            grams = shingles(norm)
+            cands = set()
+            for band in band_keys(grams):
+                cands.update(self.by_band.get(band, ()))
+            best = None
+            for ch in cands:
+                other = self.by_hash[ch]["title"]
+                score = jaccard(grams, shingles(normalize(other)))
+                if score >= NEAR_DUP and (best is None or score > best["score"]):
+                    best = {"match": "near", "title": other, "score": round(score, 3)}
+            return best
+
+    def add(self, title: str):
+        rec = {"title": title, "hash": title_hash(title), "bands": band_keys(shingles(normalize(title))),
+               "at": time.time()}
+        with self._lock:
+            self._add(rec)
+            self._evict()
+
+    def recent(self, n: int) -> list:
+        with self._lock:
+            return [rec["title"] for rec in self.records[-n:]] if n > 0 else []
+
+
+# ─── 저장소 (S3 / 로컬 파일 / memory) ───
+
+_memory = {}
+
+
+def _split(uri: str):
+    bucket, _, key = uri[len("s3://"):].partition("/")
+    return bucket, key
+
+
+def load(uri: str = None) -> TitleStore:
+    uri = uri or STORE_URI
+    if uri == "memory":
+        return TitleStore(_memory.get("records"))
+    if uri.startswith("s3://"):
+        bucket, key = _split(uri)
+        s3 = clients.boto("s3")
+        try:
+            body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+        except s3.exceptions.NoSuchKey:
+            return TitleStore()
+    elif os.path.exists(uri):
+        with open(uri, "rb") as fp:
+            body = fp.read()
+    else:
+        return TitleStore()
+    return TitleStore(json.loads(body)["titles"])
+
+
+def save(store: TitleStore, uri: str = None):
+    uri = uri or STORE_URI
+    with store._lock:
+        records = list(store.records)
+    if uri == "memory":
+        _memory["records"] = records
+        return
+    body = json.dumps({"titles": records}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if uri.startswith("s3://"):
+        bucket, key = _split(uri)
+        clients.boto("s3").put_object(Bucket=bucket, Key=key, Body=body, ContentType="application/json")
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(uri)), exist_ok=True)
+        with open(uri, "wb") as fp:
+            fp.write(body)
+
+
+def clear(uri: str = None):
+    save(TitleStore(), uri)
@@ -1,80 +1,155 @@
 import os
-import re
+import sys
 import csv
 import json
-import boto3
+import time
+import hashlib
+import threading
 import requests
 from io import StringIO
-from bs4 import BeautifulSoup
 from datetime import datetime
+from collections import Counter
 from urllib.parse import urlparse
-from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from urllib3.util.retry import Retry
+from rate_limit import HostRateLimiter
+
+# 공용 모듈 (KickOn/common) — Lambda 이미지에서는 핸들러와 같은 위치에 복사됨
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import http_cache
+import html_parse
+import features
+import instrument
+import clients
+import name_index
 
 # transfermkt 대상 크롤링
 BASE_URL = "https://www.transfermarkt.com"
-START_URL = f"{BASE_URL}/laliga/startseite/wettbewerb/ES1"
 
-# User-Agent 헤더
-HEADERS = {
-    "User-Agent":  "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+# 리그 코드 → transfermarkt URL slug
+COMPETITIONS = {
+    "ES1": "laliga",
+    "GB1": "premier-league",
+    "IT1": "serie-a",
+    "L1":  "bundesliga",
+    "FR1": "ligue-1",
 }
+# 기본 리그 / 기준 시즌 (event 의 competition, season 으로 덮어쓰기 가능)
+COMPETITION = os.getenv("CRAWL_COMPETITION", "ES1")
+SEASON      = os.getenv("CRAWL_SEASON", "2023")
 
-def to_ts_safe(date_str: str, fmt: str = "%b %d, %Y") -> int:
-    """
-    date_str 이 '-' 또는 빈 문자열이거나 포맷이 안 맞으면 0 반환,
-    그렇지 않으면 Unix timestamp 반환.
-    """
-    if not date_str or date_str.strip() == "-":
-        return 0
-    try:
-        return int(datetime.strptime(date_str, fmt).timestamp())
-    except ValueError:
-        return 0
-
-def fetch_team_links(since_timestamp=None):
-    res = requests.get(START_URL, headers=HEADERS, timeout=10)
-    res.raise_for_status()
-    soup = BeautifulSoup(res.text, "html.parser")
+def league_url(competition: str) -> str:
+    return f"{BASE_URL}/{COMPETITIONS[competition]}/startseite/wettbewerb/{competition}"
 
-    out = []
-    for a in soup.select("td.hauptlink.no-border-links a"):
-        # title 속성이 없으면 a.text.strip() 사용
-        team_name = a.get("title") or a.get_text(strip=True)
-        href      = a.get("href")
-        full_url  = BASE_URL + href
-        out.append({"team": team_name, "url": full_url})
+def season_label(season: str) -> str:
+    # "2023" → "2023/24"
+    return f"{season}/{(int(season) + 1) % 100:02d}"
 
-    return out
+# User-Agent 헤더
+HEADERS = {
+    "User-Agent":  "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+}
 
-def fetch_player_links(team_url):
-    res  = requests.get(team_url, headers=HEADERS, timeout=(5, 30))
-    res.raise_for_status()
-    soup = BeautifulSoup(res.text, "html.parser")
+# 동시 요청 수 / 호스트별 초당 요청 수 (event 로 덮어쓰기 가능)
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+HOST_RATE         = float(os.getenv("CRAWL_HOST_RATE", "2.0"))
+HOST_BURST        = float(os.getenv("CRAWL_HOST_BURST", "4"))
 
-    links = []
-    
-    for a in soup.select("table.inline-table td.hauptlink a"):
-        href = a.get("href", "")
-        
-        if "/profil/spieler" in href:
-            links.append(BASE_URL + href)
+rate_limiter = HostRateLimiter(rate=HOST_RATE, burst=HOST_BURST)
 
-    return list(dict.fromkeys(links))
+# 429 / 5xx 재시도는 http_get 안에서 (시도마다 토큰 버킷을 거치도록), Retry-After 가 있으면 그만큼 대기
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_ATTEMPTS = int(os.getenv("CRAWL_MAX_ATTEMPTS", "6"))
+BACKOFF      = 1.0      # 첫 재시도 대기 (초), 이후 2배씩
+BACKOFF_MAX  = 30.0
 
-# ─── Session + Retry 설정 ───
-session = requests.Session()
+# ─── Session + Retry 설정 (clients 의 프로세스 공유 session, warm 실행끼리 keep-alive 재사용) ───
+# adapter 는 연결 / 읽기 오류만 재시도 (상태 코드 재시도는 rate limit 을 거치지 않으므로 끔)
 retry_strategy = Retry(
-    total=5,                # 최대 3회 재시도
+    total=3,
+    status=0,
     backoff_factor=1,
-    status_forcelist=[429, 500, 502, 503, 504],
     allowed_methods=["GET"]
 )
-adapter = HTTPAdapter(max_retries=retry_strategy)
-session.mount("https://", adapter)
-session.mount("http://", adapter)
+session = clients.http_session("transfermarkt", HEADERS, retry=retry_strategy, pool_size=CRAWL_CONCURRENCY)
+
+# 디스크 응답 캐시 (KICKON_HTTP_CACHE=0 이면 None)
+page_cache = http_cache.from_env()
+
+# 실행(run) 단위 URL 별 요청 횟수 — 같은 페이지를 두 번 받지 않는지 확인용
+fetch_counts = Counter()
+_fetch_lock  = threading.Lock()
+
+def configure_rate_limit(event: dict):
+    """
+    실행마다 event 의 rate / burst (없으면 환경변수 기본값)로 맞춘다.
+    warm 컨테이너에서 이전 실행의 rate 가 남지 않도록, 값이 바뀔 때만 버킷을 새로 만든다
+    """
+    rate  = float(event.get("rate", HOST_RATE))
+    burst = float(event.get("burst", HOST_BURST))
+    if (rate, burst) != (rate_limiter.rate, rate_limiter.burst):
+        rate_limiter.set_rate(rate, burst)
+
+def _retry_delay(res, attempt: int) -> float:
+    try:
+        return min(BACKOFF_MAX, float(res.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        return min(BACKOFF_MAX, BACKOFF * 2 ** (attempt - 1))
+
+def http_get(url, timeout) -> str:
+    """
+    페이지 본문(HTML)을 반환. 디스크 캐시를 먼저 보고, 네트워크로 나가는 요청만
+    공유 session(keep-alive)과 호스트별 토큰 버킷을 거친다.
+    429 / 5xx 는 MAX_ATTEMPTS 번까지 다시 보내며, 재시도도 매번 토큰을 받는다.
+    """
+    with _fetch_lock:
+        fetch_counts[url] += 1
+
+    def fetch(u, headers):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            rate_limiter.acquire(u)
+            with instrument.span("transfermarkt.fetch"):
+                res = session.get(u, headers=headers, timeout=timeout)
+            # urllib3 Retry 가 다시 보낸 횟수 (연결 / 읽기 오류)
+            retries = getattr(getattr(res.raw, "retries", None), "history", ())
+            instrument.count("transfermarkt.retries", len(retries))
+            instrument.count("transfermarkt.bytes", len(res.content))
+            if res.status_code not in RETRY_STATUS or attempt == MAX_ATTEMPTS:
+                return res
+            instrument.count("transfermarkt.retries")
+            instrument.count(f"transfermarkt.status_{res.status_code}")
+            time.sleep(_retry_delay(res, attempt))
+
+    if page_cache is not None:
+        return page_cache.get(url, fetch)
+    res = fetch(url, {})
+    res.raise_for_status()
+    return res.text
+
+def reset_fetch_counts():
+    with _fetch_lock:
+        fetch_counts.clear()
+    if page_cache is not None:
+        page_cache.reset_stats()
+
+def fetch_summary() -> dict:
+    with _fetch_lock:
+        return {
+            "fetches":    sum(fetch_counts.values()),
+            "unique":     len(fetch_counts),
+            "duplicated": sum(1 for n in fetch_counts.values() if n > 1),
+            "cache":      page_cache.stats() if page_cache is not None else None,
+        }
+
+def fetch_team_links(competition=COMPETITION, since_timestamp=None):
+    html = http_get(league_url(competition), timeout=10)
+    return html_parse.extract_team_links(html, BASE_URL)
 
-def build_perf_url(player_url, competition="ES1", season="2023"):
+def fetch_player_links(team_url):
+    html = http_get(team_url, timeout=(5, 30))
+    return html_parse.extract_player_links(html, BASE_URL)
+
+def build_perf_url(player_url, competition=COMPETITION, season=SEASON):
     p = urlparse(player_url)
     perf_path = p.path.replace("/profil/", "/leistungsdatendetails/")
     perf_path = f"{perf_path}/wettbewerb/{competition}/saison/{season}"
@@ -94,187 +169,235 @@ def transfer_label_from_joined(joined_str: str, base_season: str) -> int:
 
     return 1 if joined_dt > season_end else 0
 
-def fetch_player_info(player_url):
-    res = requests.get(player_url, headers=HEADERS, timeout=10)
-    res.raise_for_status()
-    soup = BeautifulSoup(res.text, "html.parser")
-
-    # 1) 이름
-    name_tag = soup.select_one("header.data-header strong")
-    name = name_tag.get_text(strip=True) if name_tag else None
-
-    # 2) Market Value (header)
-    mv_wrapper = soup.select_one("a.data-header__market-value-wrapper")
-    market_value = None
-    if mv_wrapper:
-        last = mv_wrapper.select_one("p.data-header__last-update")
-        if last:
-            last.extract()
-        raw_mv = mv_wrapper.get_text(strip=True)
-        m = re.search(r"([\d\.,]+)", raw_mv)
-        market_value = m.group(1) if m else None
-
-    # 3)
-    info_div = soup.select_one("div.spielerdatenundfakten div.info-table")
-    data = {
-        "name": name,
-        "market_value": market_value,
-    }
-
-    # 4) Appearance & Goals & Assists
-    if info_div:
-        spans = info_div.select("span.info-table__content")
-        for i in range(0, len(spans), 2):
-            label = spans[i].get_text(strip=True).rstrip(":")
-            val = spans[i+1].get_text(strip=True)
-
-            if label == "Date of birth/Age":
-                m = re.search(r"\((\d+)\)", val)
-                data["age"] = int(m.group(1)) if m else None
-            elif label == "Position":
-                data["position"] = val
-            elif label == "Market value":
-                data["market_value"] = val
-            elif label == "Joined":
-                data["joined"] = val
-            elif label == "Contract expires":
-                data["contract_expires"] = val
-        perf_url = build_perf_url(player_url)
-
-        data["appearances"] = data["goals"] = data["assists"] = 0
+def fetch_performance(player_url, competition=COMPETITION, season=SEASON) -> dict:
+    """
+    leistungsdatendetails 페이지를 한 번만 받아서 출장/골/어시스트를 반환.
+    요청이 실패하면 0 으로 채운 값을 반환한다.
+    """
+    perf  = {"appearances": 0, "goals": 0, "assists": 0}
+    perf_url = build_perf_url(player_url, competition, season)
+    try:
+        html = http_get(perf_url, timeout=(5, 30))
+    except requests.exceptions.Timeout:
+        print(f"Timeout fetching performance data: {perf_url}")
+        return perf
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching performance data: {e}")
+        return perf
+    except http_cache.OfflineMiss:
+        print(f"Offline cache miss for performance data: {perf_url}")
+        return perf
+
+    return html_parse.extract_performance(html)
+
+def fetch_player_profile(player_url, season=SEASON):
+    html = http_get(player_url, timeout=10)
+    data = html_parse.extract_player_profile(html)
+
+    # 기준 시즌(예: "2023/24")을 기준으로 이적 여부(0/1) 추가
+    # (인적사항 테이블이 없으면 여기서 실패하므로 기록 페이지는 받지 않는다)
+    data["transfer"] = transfer_label_from_joined(data["joined"], base_season=season_label(season))
+    # 팀 / 이름과 상관없는 선수 식별자 (전처리 중복 제거 key)
+    data["player_id"] = name_index.player_id(player_url)
+    return data
 
-        try:
-            r2 = session.get(perf_url, headers=HEADERS, timeout=(5, 15))
-            r2.raise_for_status()
-        except requests.exceptions.Timeout:
-            print(f"Timeout fetching performance data: {perf_url}")
-            return data
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching performance data: {e}")
-            return data
-
-    # 3) AJAX 상세 페이지 요청
-        r2 = requests.get(perf_url, headers=HEADERS, timeout=(5, 30))
-        r2.raise_for_status()
-        s2 = BeautifulSoup(r2.text, "html.parser")
-
-    # 4) table.items > tfoot > tr > td.zentriert
-        tds = s2.select("table.items tfoot tr td.zentriert")
-        if len(tds) > 0:
-            txt = tds[0].get_text(strip=True)
-            data["appearances"] = int(txt) if txt.isdigit() else 0
-        if len(tds) > 1:
-            txt = tds[1].get_text(strip=True)
-            data["goals"] = int(txt) if txt.isdigit() else 0
-        if len(tds) > 2:
-            txt = tds[2].get_text(strip=True)
-            data["assists"] = int(txt) if txt.isdigit() else 0
-
-    # base_season="2023/24" 을 기준으로 이적 여부(0/1) 추가
-    data["transfer"] = transfer_label_from_joined(data["joined"], base_season="2023/24")
+def fetch_player_info(player_url, competition=COMPETITION, season=SEASON):
+    data = fetch_player_profile(player_url, season)
+    # Appearance & Goals & Assists
+    data.update(fetch_performance(player_url, competition, season))
     return data
 
+# ─── 증분 크롤링 ───
+# manifest: {profile_url: {"hash": 프로필 필드 해시, "crawled_at": 마지막 크롤 시각, "name": 이름,
+#                          "perf_hash": 기록 필드 해시, "perf_at": 기록 페이지를 마지막으로 받은 시각}}
+PROFILE_FIELDS     = ("name", "market_value", "age", "position", "joined", "contract_expires")
+PERF_FIELDS        = ("appearances", "goals", "assists")
+REFRESH_HOURS      = float(os.getenv("CRAWL_REFRESH_HOURS", "24"))
+# 프로필이 그대로여도 기록(출장 / 골 / 어시스트)은 경기마다 바뀌므로 이 시간이 지나면 기록 페이지를 다시 받음
+PERF_REFRESH_HOURS = float(os.getenv("CRAWL_PERF_REFRESH_HOURS", "72"))
+
+def profile_hash(data: dict, fields=PROFILE_FIELDS) -> str:
+    fields = {k: data.get(k) for k in fields}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def crawl_player(player_url, entry=None, incremental=False, refresh_hours=REFRESH_HOURS,
+                 competition=COMPETITION, season=SEASON, perf_refresh_hours=PERF_REFRESH_HOURS):
+    """
+    반환: (info, manifest 항목). info 가 None 이면 변경 없음 → CSV 에 쓰지 않는다.
+    incremental 일 때
+      - refresh_hours 안에 크롤한 선수는 요청 없이 건너뜀
+      - 프로필(캐시 재검증으로 저렴)만 받아 해시가 같고 기록도 perf_refresh_hours 안에 받았으면
+        기록 페이지는 받지 않음
+      - 기록 페이지를 받았으면 프로필 / 기록 해시가 모두 같을 때만 변경 없음
+    """
+    now = time.time()
+    if incremental and entry and now - entry["crawled_at"] < refresh_hours * 3600:
+        return None, entry
+
+    data      = fetch_player_profile(player_url, season)
+    new_entry = {"hash": profile_hash(data), "crawled_at": now, "name": data.get("name"),
+                 "perf_hash": (entry or {}).get("perf_hash"), "perf_at": (entry or {}).get("perf_at", 0)}
+    same_profile = bool(incremental and entry and entry["hash"] == new_entry["hash"])
+    if same_profile and now - new_entry["perf_at"] < perf_refresh_hours * 3600:
+        return None, new_entry
+
+    data.update(fetch_performance(player_url, competition, season))
+    new_entry.update(perf_hash=profile_hash(data, PERF_FIELDS), perf_at=now)
+    if same_profile and entry.get("perf_hash") == new_entry["perf_hash"]:
+        return None, new_entry
+    return data, new_entry
+
 BUCKET          = "kickon-ml-data-bucket"
-PROGRESS_KEY    = "transfer_progress/progress.json"
+PROGRESS_PREFIX = "transfer_progress/"
 RESULTS_PREFIX  = "EPL/Crawl_Data/"
-
-s3        = boto3.client("s3")
-
-TEAM_RANKINGS = {
-    "Real Madrid":              1,
-    "FC Barcelona":             2,
-    "Girona FC":                3,
-    "Atlético de Madrid":       4,
-    "Athletic Bilbao":          5,
-    "Real Sociedad":            6,
-    "Real Betis Balompié":      7,
-    "Villarreal CF":            8,
-    "Valencia CF":              9,
-    "Deportivo Alavés":        10,
-    "CA Osasuna":              11,
-    "Getafe CF":               12,
-    "Celta de Vigo":           13,
-    "Sevilla FC":              14,
-    "RCD Mallorca":            15,
-    "UD Las Palmas":           16,
-    "Rayo Vallecano":          17,
-    "Cadiz CF":                18,
-    "UD Almería":              19,
-    "Granada CF":              20,
+RANKINGS_PREFIX = "transfer_rankings/"
+
+s3        = instrument.wrap_client(clients.lazy("s3"), "s3")
+
+# 기준 시즌 최종 순위 (리그, 시즌) → {팀 이름: 순위}
+# S3 의 transfer_rankings/{리그}/{시즌}.json 이 있으면 그쪽이 우선
+LEAGUE_RANKINGS = {
+    ("ES1", "2023"): {
+        "Real Madrid":              1,
+        "FC Barcelona":             2,
+        "Girona FC":                3,
+        "Atlético de Madrid":       4,
+        "Athletic Bilbao":          5,
+        "Real Sociedad":            6,
+        "Real Betis Balompié":      7,
+        "Villarreal CF":            8,
+        "Valencia CF":              9,
+        "Deportivo Alavés":        10,
+        "CA Osasuna":              11,
+        "Getafe CF":               12,
+        "Celta de Vigo":           13,
+        "Sevilla FC":              14,
+        "RCD Mallorca":            15,
+        "UD Las Palmas":           16,
+        "Rayo Vallecano":          17,
+        "Cadiz CF":                18,
+        "UD Almería":              19,
+        "Granada CF":              20,
+    },
+    ("GB1", "2023"): {
+        "Manchester City":          1,
+        "Arsenal FC":               2,
+        "Liverpool FC":             3,
+        "Aston Villa":              4,
+        "Tottenham Hotspur":        5,
+        "Chelsea FC":               6,
+        "Newcastle United":         7,
+        "Manchester United":        8,
+        "West Ham United":          9,
+        "Crystal Palace":          10,
+        "Brighton & Hove Albion":  11,
+        "AFC Bournemouth":         12,
+        "Fulham FC":               13,
+        "Wolverhampton Wanderers": 14,
+        "Everton FC":              15,
+        "Brentford FC":            16,
+        "Nottingham Forest":       17,
+        "Luton Town":              18,
+        "Burnley FC":              19,
+        "Sheffield United":        20,
+    },
 }
 
-POSITION_MAPPING = {
-    "Goalkeeper": 0,
-    "Defender":   1,
-    "Midfield":   2,
-    "Attack":     3,
-}
+def load_rankings(competition: str, season: str) -> dict:
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=f"{RANKINGS_PREFIX}{competition}/{season}.json")
+        return json.loads(obj["Body"].read())
+    except s3.exceptions.NoSuchKey:
+        return LEAGUE_RANKINGS.get((competition, season), {})
+
+# ─── (리그, 시즌, 팀) 단위 체크포인트 샤드 ───
+# 샤드마다 progress / manifest 파일이 따로 있어서 여러 워커가 서로 다른 팀을 동시에 크롤링해도 덮어쓰지 않는다
+def shard_prefix(competition: str, season: str) -> str:
+    return f"{PROGRESS_PREFIX}{competition}/{season}/"
 
-def map_position(pos_str: str) -> int:
-    ps = pos_str.lower()
-    for key, val in POSITION_MAPPING.items():
-        if key.lower() in ps:
-            return val
-    return -1
-    
-def load_progress():
+def shard_key(shard: dict, kind: str) -> str:
+    return f"{shard_prefix(shard['competition'], shard['season'])}team_{shard['team_idx']:04d}.{kind}.json"
+
+def load_progress(shard: dict) -> dict:
     try:
-        obj = s3.get_object(Bucket=BUCKET, Key=PROGRESS_KEY)
+        obj = s3.get_object(Bucket=BUCKET, Key=shard_key(shard, "progress"))
         return json.loads(obj["Body"].read())
     except s3.exceptions.NoSuchKey:
-        return {"team_idx": 0, "player_idx": 0}
+        return {"player_idx": 0, "rows": 0, "done": False}
 
-def save_progress(prog: dict):
+def save_progress(shard: dict, prog: dict):
     s3.put_object(
         Bucket=BUCKET,
-        Key=PROGRESS_KEY,
+        Key=shard_key(shard, "progress"),
         Body=json.dumps(prog).encode("utf-8"),
         ContentType="application/json"
     )
 
-def save_team_results_csv(team_idx: int, team_name: str, data: list[dict]):
-    """
-    team_{team_idx}_{team_name}.csv
-    컬럼(순서):
-      transfer, market_value, position, joined_ts, expires_ts,
-      appearances, goals, assists, team_rank
-    """
+def reset_progress(competition: str, season: str) -> int:
+    # 해당 리그/시즌의 progress 샤드만 삭제 (manifest 는 증분 크롤링용으로 유지)
+    paginator = s3.get_paginator("list_objects_v2")
+    n = 0
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=shard_prefix(competition, season)):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith(".progress.json"):
+                s3.delete_object(Bucket=BUCKET, Key=obj["Key"])
+                n += 1
+    return n
+
+def load_manifest(shard: dict) -> dict:
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=shard_key(shard, "manifest"))
+        return json.loads(obj["Body"].read())
+    except s3.exceptions.NoSuchKey:
+        return {}
+
+def save_manifest(shard: dict, manifest: dict):
+    s3.put_object(
+        Bucket=BUCKET,
+        Key=shard_key(shard, "manifest"),
+        Body=json.dumps(manifest, ensure_ascii=False).encode("utf-8"),
+        ContentType="application/json"
+    )
+
+# 팀 CSV 컬럼(순서). player_id 는 마지막 — 예전 파일(player_id 없음)도 앞 컬럼 위치는 같다
+CSV_COLUMNS = [
+    "transfer", "name", "age", "market_value", "position",
+    "joined_ts", "expires_ts",
+    "appearances", "goals", "assists", "team_rank", "player_id",
+]
+
+def team_csv_key(shard: dict, team_name: str, run: str = None) -> str:
+    """run 이 있으면 team_XXXX_{팀}.{run}.csv — 팀을 처음부터 다시 돌 때마다 새 파일 (전처리가 아직 안 옮긴 원본을 덮어쓰지 않음)"""
+    name = f"team_{shard['team_idx']:04d}_{team_name}" + (f".{run}" if run else "")
+    return f"{RESULTS_PREFIX}{shard['competition']}/{shard['season']}/{name}.csv"
+
+def new_run_id() -> str:
+    # 전처리 parse_raw_key 가 팀 이름에서 떼어 내는 형식 (r + UTC 시각 + 임의 4자리)
+    return time.strftime("r%Y%m%dT%H%M%S", time.gmtime()) + os.urandom(2).hex()
+
+def to_csv_rows(recs: list, team_rank: int) -> list:
+    """크롤링 레코드 묶음 → CSV 행들. 날짜 / 포지션 / 시장가치 변환은 features 모듈에서 한 번에"""
+    if not recs:
+        return []
+    matrix = features.build_feature_matrix(recs)
+    matrix["team_rank"] = team_rank
+    matrix["transfer"]  = [rec["transfer"] for rec in recs]
+    matrix["name"]      = [rec.get("name") or "" for rec in recs]
+    matrix["player_id"] = [rec.get("player_id") or "" for rec in recs]
+    return [list(row) for row in matrix[CSV_COLUMNS].itertuples(index=False, name=None)]
+
+def to_csv_row(rec: dict, team_rank: int) -> list:
+    return to_csv_rows([rec], team_rank)[0]
+
+def read_team_csv(body: str) -> list:
+    """팀 CSV 본문 → CSV_COLUMNS 순서의 행 (예전 파일에 없는 컬럼은 빈 값)"""
+    return [[rec.get(c) or "" for c in CSV_COLUMNS] for rec in csv.DictReader(StringIO(body))]
+
+def put_team_csv(key: str, rows: list):
     buf = StringIO()
     writer = csv.writer(buf)
-    writer.writerow([
-        "transfer",
-        "name",
-        "age",
-        "market_value",
-        "position",
-        "joined_ts",
-        "expires_ts",
-        "appearances",
-        "goals",
-        "assists",
-        "team_rank",
-    ])
-
-    team_rank = TEAM_RANKINGS.get(team_name, 0)
-
-    for rec in data:
-        joined_ts  = to_ts_safe(rec.get("joined", ""))
-        expires_ts = to_ts_safe(rec.get("contract_expires", ""))
-        writer.writerow([
-            rec["transfer"],
-            rec.get("name", ""),
-            rec.get("age", 0),
-            rec["market_value"],
-            map_position(rec["position"]),
-            joined_ts,
-            expires_ts,
-            rec["appearances"],
-            rec["goals"],
-            rec["assists"],
-            team_rank,
-        ])
-
-    key = f"{RESULTS_PREFIX}team_{team_idx:04d}_{team_name}.csv"
+    writer.writerow(CSV_COLUMNS)
+    writer.writerows(rows)
     s3.put_object(
         Bucket=BUCKET,
         Key=key,
@@ -282,96 +405,297 @@ def save_team_results_csv(team_idx: int, team_name: str, data: list[dict]):
         ContentType="text/csv"
     )
 
-def append_player_to_csv(team_idx: int, team_name: str, rec: dict):
-    key = f"{RESULTS_PREFIX}team_{team_idx:04d}_{team_name}.csv"
-    # 1) 기존 파일 읽어오기 (헤더+이미 있는 데이터)
+def save_team_results_csv(shard: dict, team_name: str, data: list[dict], team_rank: int = 0):
+    """
+    {리그}/{시즌}/team_{team_idx}_{team_name}.csv
+    컬럼(순서): CSV_COLUMNS
+    """
+    rows = to_csv_rows(data, team_rank)
+    put_team_csv(team_csv_key(shard, team_name), rows)
+
+def append_player_to_csv(shard: dict, team_name: str, rec: dict, team_rank: int = 0):
+    """
+    기존 파일을 읽어 한 줄 추가 후 다시 쓰는 단건 경로.
+    lambda_handler 는 TeamCsvBuffer 로 모아서 쓴다.
+    """
+    key = team_csv_key(shard, team_name)
+    # 1) 기존 파일 읽어오기 (헤더 제외)
     try:
         obj = s3.get_object(Bucket=BUCKET, Key=key)
-        text = obj["Body"].read().decode("utf-8")
-        buf = StringIO(text)
-        rows = list(csv.reader(buf))
-        buf = StringIO()
-        writer = csv.writer(buf)
-        for r in rows:
-            writer.writerow(r)
+        rows = read_team_csv(obj["Body"].read().decode("utf-8"))
     except s3.exceptions.NoSuchKey:
         # 파일이 없으면 헤더부터 새로 생성
-        buf = StringIO()
-        writer = csv.writer(buf)
-        writer.writerow([
-            "transfer","name","age","market_value","position",
-            "joined_ts","expires_ts",
-            "appearances","goals","assists","team_rank"
-        ])
-    # 2) 새 플레이어 한 줄 추가
-    joined_ts  = to_ts_safe(rec.get("joined", ""))
-    expires_ts = to_ts_safe(rec.get("contract_expires", ""))
-    team_rank  = TEAM_RANKINGS.get(team_name, 0)
-
-    writer.writerow([
-        rec["transfer"],
-        rec.get("name", ""),
-        rec.get("age", 0),
-        rec["market_value"],
-        map_position(rec["position"]),
-        joined_ts,
-        expires_ts,
-        rec["appearances"],
-        rec["goals"],
-        rec["assists"],
-        team_rank,
-    ])
-
-    # 3) S3에 다시 쓰기
-    s3.put_object(
-        Bucket=BUCKET,
-        Key=key,
-        Body=buf.getvalue().encode("utf-8"),
-        ContentType="text/csv"
-    )
-
-def lambda_handler(event, context):
-    if event.get("reset"):
-        save_progress({"team_idx":0, "player_idx":0})
-        return {"statusCode":200, "body":"✅ progress reset"}
-    
-    # 진행 상태 로드
-    prog   = load_progress()  # {"team_idx": X, "player_idx": Y}
-    ti, pi = prog["team_idx"], prog["player_idx"]
-    teams  = fetch_team_links()
-    if ti >= len(teams):
-        return {"statusCode":200,"body":"✅ all teams done"}
-
-    team      = teams[ti]
-    team_name = team["team"]
-    players   = fetch_player_links(team["url"])
-
-    # 플레이어 하나씩
-    for idx, url in enumerate(players):
-        if idx < pi:
-            continue
+        rows = []
+    # 2) 새 플레이어 한 줄 추가 후 3) S3에 다시 쓰기
+    rows.append(to_csv_row(rec, team_rank))
+    put_team_csv(key, rows)
+
+# 버퍼 flush 기준: 행 수 / 경과 시간 / Lambda 남은 시간
+FLUSH_ROWS       = int(os.getenv("CRAWL_FLUSH_ROWS", "50"))
+FLUSH_SECONDS    = float(os.getenv("CRAWL_FLUSH_SECONDS", "60"))
+TIME_MARGIN_MS   = int(os.getenv("CRAWL_TIME_MARGIN_MS", "30000"))
+
+def remaining_ms(context) -> float:
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return float("inf")
+    return context.get_remaining_time_in_millis()
+
+class TeamCsvBuffer:
+    """
+    한 팀의 CSV 행을 메모리에 모아 두었다가 flush 때 한 번에 S3 에 쓴다.
+
+    flush 는 항상 CSV PUT → progress PUT 순서이고, progress 의 rows 가
+    "CSV 에 확정된 행 수" 의 기준이 된다. 두 PUT 사이에서 Lambda 가 끊기면
+    CSV 에는 체크포인트보다 많은 행이 남는데, 재개할 때 그 초과분을 잘라내고
+    해당 선수들은 다시 크롤링하므로 행이 빠지거나 중복되지 않는다.
+    (증분 모드에서는 건너뛴 선수가 있어 rows 와 player_idx 가 다를 수 있다)
+    add 는 원본 레코드만 쌓고, 특성 변환은 flush 때 pending 전체를 한 번에 한다.
+    run 은 팀을 처음부터 시작할 때 정한 파일 구분자로, progress 에 함께 저장해 재개할 때 같은 파일을 쓴다.
+    """
 
+    def __init__(self, shard: dict, team_name: str, team_rank: int = 0, start_idx: int = 0, run: str = None):
+        self.shard      = shard
+        self.team_name  = team_name
+        self.team_rank  = team_rank
+        self.run        = run
+        self.key        = team_csv_key(shard, team_name, run)
+        self.stale      = False   # S3 파일에 체크포인트 이후 행이 남아 있는지
+        self.rows       = self._load_committed(start_idx)
+        self.pending    = []
+        self.last_flush = time.monotonic()
+
+    def _load_committed(self, start_idx: int) -> list:
+        # 처음부터 시작하는 팀은 새 run 키라 이어 붙일 행이 없다
+        if start_idx == 0:
+            return []
         try:
-            info = fetch_player_info(url)
-            info["team"] = team_name
-
-            # 바로 CSV에 append
-            append_player_to_csv(ti, team_name, info)
-            print(f"[INFO] Team#{ti}({team_name}) ▶ Player#{idx} '{info['name']}' 저장완료")
-
-            # 진행 상태 업데이트 (다음 플레이어부터)
-            save_progress({"team_idx": ti, "player_idx": idx+1})
-
-        except Exception as e:
-            print(f"[ERROR] Team#{ti}({team_name}) ▶ Player#{idx} 실패: {e}")
-            # 실패해도 인덱스만 기록하고 함수 종료
-            save_progress({"team_idx": ti, "player_idx": idx})
-            return {"statusCode":500, "body":f"Error at player #{idx}"}
+            obj = s3.get_object(Bucket=BUCKET, Key=self.key)
+        except s3.exceptions.NoSuchKey:
+            return []
+        rows = read_team_csv(obj["Body"].read().decode("utf-8"))
+        self.stale = len(rows) > start_idx
+        return rows[:start_idx]
+
+    def add(self, rec: dict):
+        self.pending.append(rec)
+
+    def should_flush(self, context) -> bool:
+        return (
+            len(self.pending) >= FLUSH_ROWS
+            or time.monotonic() - self.last_flush >= FLUSH_SECONDS
+            or remaining_ms(context) < TIME_MARGIN_MS
+        )
+
+    def flush(self, progress: dict):
+        if self.pending or self.stale:
+            self.rows.extend(to_csv_rows(self.pending, self.team_rank))
+            put_team_csv(self.key, self.rows)
+        save_progress(self.shard, {**progress, "rows": len(self.rows), "run": self.run})
+        self.pending    = []
+        self.stale      = False
+        self.last_flush = time.monotonic()
+
+def save_name_index(shard: dict, team_name: str, manifest: dict):
+    """팀이 끝나면 manifest 의 (프로필 URL, 이름) 으로 예측용 이름 색인 샤드를 갱신 (실패해도 크롤링은 계속)"""
+    if not name_index.enabled():
+        return
+    try:
+        n = name_index.save_shard(shard["competition"], shard["season"], shard["team_idx"],
+                                  team_name, manifest, s3=s3)
+        print(f"[INFO] {shard['competition']} Team#{shard['team_idx']}({team_name}) ▶ 이름 색인 {n}명")
+    except Exception as e:
+        print(f"[WARN] 이름 색인 저장 실패: {e}")
+
+def compact_name_index():
+    """검색으로 배운 별칭(learned/ 에 하나씩)을 aliases/ 샤드로 합친다 (리그 전체가 끝났을 때 한 번)"""
+    if not name_index.enabled():
+        return
+    try:
+        n = name_index.compact_learned(s3=s3)
+        if n:
+            print(f"[INFO] 이름 색인 ▶ 검색 별칭 {n}개 합침")
+    except Exception as e:
+        print(f"[WARN] 이름 색인 별칭 합치기 실패: {e}")
 
-    # 한 팀 끝나면 다음 팀으로
-    save_progress({"team_idx": ti+1, "player_idx": 0})
+def submit_squads(pool, teams, team_indices, task, starts):
+    """
+    여러 팀의 선수 목록을 동시에 가져온 뒤, 모든 선수의 task(team_idx, url) 를
+    pool 에 한꺼번에 제출한다. starts = {team_idx: 재개할 player_idx}
+    반환: {team_idx: [(player_idx, url, future), ...]}
+    """
+    link_futs = {ti: pool.submit(fetch_player_links, teams[ti]["url"]) for ti in team_indices}
+
+    squads = {}
+    for ti in team_indices:
+        players = link_futs[ti].result()
+        squads[ti] = [
+            (idx, url, pool.submit(task, ti, url))
+            for idx, url in enumerate(players) if idx >= starts[ti]
+        ]
+    return squads
+
+def crawl_teams(competition, season, teams, team_indices, context,
+                concurrency=CRAWL_CONCURRENCY, incremental=False, refresh_hours=REFRESH_HOURS):
+    """team_indices 의 팀들을 각자의 샤드 체크포인트에서 이어서 크롤링"""
+    rankings  = load_rankings(competition, season)
+    shards    = {ti: {"competition": competition, "season": season, "team_idx": ti} for ti in team_indices}
+    progs     = {ti: load_progress(shards[ti]) for ti in team_indices}
+    manifests = {ti: load_manifest(shards[ti]) for ti in team_indices}
+    counts    = Counter()
+
+    def task(ti, url):
+        return crawl_player(url, manifests[ti].get(url), incremental, refresh_hours, competition, season)
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        squads = submit_squads(pool, teams, team_indices, task,
+                               {ti: progs[ti]["player_idx"] for ti in team_indices})
+
+        for ti in team_indices:
+            team_name = teams[ti]["team"]
+            shard     = shards[ti]
+            manifest  = manifests[ti]
+            prog      = progs[ti]
+            if prog["done"] or (prog["player_idx"] == 0 and not prog.get("run")):
+                # 새로 시작 (force 재실행 / 증분 재실행 포함) → 새 파일
+                run, start_idx = new_run_id(), 0
+            else:
+                # 이어서 진행 (run 이 없는 예전 progress 는 예전 키 그대로)
+                run, start_idx = prog.get("run"), prog.get("rows", prog["player_idx"])
+            buf       = TeamCsvBuffer(shard, team_name, rankings.get(team_name, 0),
+                                      start_idx=start_idx, run=run)
+
+            def checkpoint(progress):
+                # CSV → progress → manifest 순서. manifest 가 뒤처지면 다음 실행에서 다시 받을 뿐 행은 빠지지 않는다
+                buf.flush(progress)
+                save_manifest(shard, manifest)
+
+            # 결과는 제출 순서대로 소비해서 버퍼에 모으고, 기준을 넘으면 CSV + 진행 상태를 함께 기록
+            for idx, url, fut in squads[ti]:
+                try:
+                    info, entry = fut.result()
+                except Exception as e:
+                    print(f"[ERROR] {competition} Team#{ti}({team_name}) ▶ Player#{idx} 실패: {e}")
+                    # 실패 전까지 모은 행은 저장하고 실패한 인덱스부터 재개
+                    checkpoint({"player_idx": idx, "done": False})
+                    return {"statusCode":500, "body":f"Error at {competition} team #{ti} player #{idx}"}
+
+                counts["new" if url not in manifest else "changed" if info else "unchanged"] += 1
+                manifest[url] = entry
+                if info is None:
+                    print(f"[INFO] {competition} Team#{ti}({team_name}) ▶ Player#{idx} '{entry['name']}' 변경 없음")
+                else:
+                    info["team"] = team_name
+                    buf.add(info)
+                    print(f"[INFO] {competition} Team#{ti}({team_name}) ▶ Player#{idx} '{info['name']}' 수집완료")
+
+                if buf.should_flush(context):
+                    checkpoint({"player_idx": idx+1, "done": False})
+                    print(f"[INFO] {competition} Team#{ti}({team_name}) ▶ {len(buf.rows)}행 저장완료")
+                    if remaining_ms(context) < TIME_MARGIN_MS:
+                        # 타임아웃 전에 정상 종료, 다음 실행이 idx+1 부터 이어서 진행
+                        return {"statusCode":200, "body":f"⏸ paused at {competition} team #{ti} player #{idx+1}"}
+
+            # 한 팀 끝나면 남은 행과 완료 체크포인트를 한 번에 기록
+            checkpoint({"player_idx": 0, "done": True})
+            print(f"[INFO] {competition} Team#{ti}({team_name}) ▶ {len(buf.rows)}행 저장완료")
+            save_name_index(shard, team_name, manifest)
+    finally:
+        # 실패로 빠져나온 경우 아직 시작 안 한 요청은 버린다
+        pool.shutdown(wait=False, cancel_futures=True)
+        # duplicated 가 0 이 아니면 같은 URL 을 두 번 이상 받은 것
+        summary = fetch_summary()
+        instrument.add_counters("fetch", {k: v for k, v in summary.items() if k != "cache"})
+        instrument.add_counters("http_cache", summary["cache"] or {})
+        instrument.add_counters("players", counts)
+
+    done = ", ".join(f"#{i}: {teams[i]['team']}" for i in team_indices)
     return {
         "statusCode":200,
-        "body":f"✅ processed team #{ti}: {team_name}"
+        "body":f"✅ processed {competition} team {done}"
     }
 
+def fan_out(event, context, competition, season, team_indices) -> dict:
+    """남은 팀마다 이 Lambda 를 비동기(Event)로 한 번씩 호출 — 팀별 샤드라 병렬로 돌아도 안전"""
+    client = clients.boto("lambda")
+    function_name = event.get("function_name") or context.function_name
+    base = {k: v for k, v in event.items() if k not in ("fanout", "league", "function_name")}
+    for ti in team_indices:
+        client.invoke(
+            FunctionName=function_name,
+            InvocationType="Event",
+            Payload=json.dumps({**base, "competition": competition, "season": season, "team_idx": ti}).encode("utf-8"),
+        )
+    return {"statusCode":202, "body":f"✅ fanned out {len(team_indices)} {competition} teams"}
+
+@instrument.handler("crawl")
+def lambda_handler(event, context):
+    reset_fetch_counts()
+    competition = event.get("competition", COMPETITION)
+    season      = str(event.get("season", SEASON))
+
+    if event.get("reset"):
+        n = reset_progress(competition, season)
+        return {"statusCode":200, "body":f"✅ progress reset ({competition} {season}, {n} shards)"}
+
+    # 동시성 / rate limit 설정 (event 값이 우선, 없으면 환경변수 기본값으로 되돌림)
+    concurrency = int(event.get("concurrency", CRAWL_CONCURRENCY))
+    configure_rate_limit(event)
+
+    # {"incremental": true} 이면 manifest 기준으로 바뀐 / 새 선수만 다시 수집
+    incremental   = bool(event.get("incremental", os.getenv("CRAWL_INCREMENTAL", "0") == "1"))
+    refresh_hours = float(event.get("refresh_hours", REFRESH_HOURS))
+
+    teams = fetch_team_links(competition)
+
+    if "team_idx" in event:
+        # 워커: 지정된 팀 샤드 하나만 처리 (이미 끝난 샤드는 "force" 일 때만 다시)
+        ti = int(event["team_idx"])
+        shard = {"competition": competition, "season": season, "team_idx": ti}
+        if load_progress(shard)["done"] and not event.get("force"):
+            return {"statusCode":200,"body":f"✅ {competition} team #{ti} already done"}
+        team_indices = [ti]
+    else:
+        pending = [
+            ti for ti in range(len(teams))
+            if not load_progress({"competition": competition, "season": season, "team_idx": ti})["done"]
+        ]
+        if not pending:
+            compact_name_index()
+            return {"statusCode":200,"body":f"✅ all {competition} teams done"}
+        if event.get("fanout"):
+            return fan_out(event, context, competition, season, pending)
+        # {"league": true} 이면 남은 팀 전체를 한 번에, 아니면 한 팀만 처리
+        team_indices = pending if event.get("league") else pending[:1]
+
+    return crawl_teams(competition, season, teams, team_indices, context,
+                       concurrency, incremental, refresh_hours)
+
+def _run_local_shard(event):
+    return lambda_handler(event, None)
+
+if __name__ == "__main__":
+    # 로컬 병렬 실행: 팀마다 별도 프로세스가 자기 샤드를 처리
+    #   python crawl.py --competition GB1 --season 2023 --workers 4
+    import argparse
+    from multiprocessing import Pool
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--competition", default=COMPETITION, choices=sorted(COMPETITIONS))
+    ap.add_argument("--season", default=SEASON)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--incremental", action="store_true")
+    args = ap.parse_args()
+
+    teams  = fetch_team_links(args.competition)
+    # 호스트별 요청 한도는 프로세스마다 따로 걸리므로 워커 수로 나눈다
+    events = [{
+        "competition": args.competition,
+        "season":      args.season,
+        "team_idx":    ti,
+        "incremental": args.incremental,
+        "rate":        HOST_RATE / args.workers,
+    } for ti in range(len(teams))]
+    with Pool(args.workers) as pool:
+        for res in pool.imap_unordered(_run_local_shard, events):
+            print(res["statusCode"], res["body"])
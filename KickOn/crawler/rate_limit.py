@@ -0,0 +1,61 @@
+import time
+import threading
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    초당 rate 개의 토큰이 채워지는 토큰 버킷.
+    capacity 만큼 순간 burst 를 허용하고, 토큰이 없으면 채워질 때까지 대기한다.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate     = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens  = self.capacity
+        self._updated = time.monotonic()
+        self._lock    = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """토큰을 꺼낼 때까지 블로킹. 실제로 기다린 시간(초)을 반환."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens  = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class HostRateLimiter:
+    """호스트(netloc)별로 TokenBucket 을 하나씩 두는 rate limiter (스레드 안전)."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate    = rate
+        self.burst   = burst
+        self._buckets = {}
+        self._lock   = threading.Lock()
+
+    def set_rate(self, rate: float, burst: float = None):
+        # 이미 만들어진 버킷도 새 설정으로 교체
+        with self._lock:
+            self.rate  = rate
+            self.burst = burst
+            self._buckets.clear()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                b = self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return b
+
+    def acquire(self, url: str) -> float:
+        return self.bucket(urlparse(url).netloc).acquire()
@@ -1,31 +1,48 @@
 import os
 import re
+import sys
 import json
-import openai
-import requests
+
+# 공용 모듈 (KickOn/common) — Lambda 이미지에서는 핸들러와 같은 위치에 복사됨
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import instrument
+import title_store
+import post_pool
+import board_client
 
 # ─────────────────────────────────────
 # 환경 변수 및 상수 설정
-openai.api_key = os.getenv("OPENAI_API_KEY")  # Lambda 환경변수로 설정하세요
-STATE_FILE = "/tmp/used_titles.json"
+# OPENAI_API_KEY 는 Lambda 환경변수로 설정하세요 (openai 는 글을 생성할 때 처음 import)
+# 사용한 제목은 common/title_store.py (KICKON_TITLE_STORE, 기본 S3) 에 저장
+PROMPT_TITLES = int(os.getenv("POSTAI_PROMPT_TITLES", "20"))   # 프롬프트에 보여줄 최근 제목 수
+MAX_ROUNDS    = int(os.getenv("POSTAI_MAX_ROUNDS", "3"))       # 중복 제목 재생성 횟수 (첫 생성 포함)
+
+# 한 번 게시할 때의 종류별 글 수 (축구 상식 3 + 토론형 질문 2)
+PER_RUN = {"trivia": 3, "debate": 2}
+
+# 게시글 풀 (common/post_pool.py, KICKON_POST_POOL) — fill 이 미리 채우고 publish 는 꺼내서 게시만
+POOL_RUNS       = int(os.getenv("POSTAI_POOL_RUNS", "10"))      # 풀 목표량 = 게시 몇 번 분량
+FILL_BATCH      = int(os.getenv("POSTAI_FILL_BATCH", "20"))     # GPT 호출 한 번에 만들 글 수
+FILL_MAX_CALLS  = int(os.getenv("POSTAI_FILL_MAX_CALLS", "10"))
+TIME_MARGIN_MS  = int(os.getenv("POSTAI_TIME_MARGIN_MS", "60000"))   # 남은 시간이 이보다 적으면 fill 중단
+TITLE_MAX_CHARS = 30        # 프롬프트는 20자 이내를 요구, 조금 넘는 것까지는 허용
 
 API_BASE  = "https://api-dev.kickon.net/api"
 BOARD_URL = f"{API_BASE}/board"
 TOKEN     = os.getenv("BACKEND_JWT")          # Lambda 환경변수로 설정하세요
+# 게시판 등록 클라이언트 (동시 요청 수 / 시간 제한 / 재시도는 common/board_client.py 의 BOARD_* 환경변수)
+BOARD     = board_client.BoardClient(BOARD_URL, TOKEN)
 
 SYSTEM_PROMPT = """
 당신은 축구 커뮤니티용 AI 가상 사용자입니다.
-다음 조건을 반드시 준수하여 축구 상식과 토론 주제 5개를 JSON 배열로만 반환하세요:
+다음 조건을 반드시 준수하여 축구 상식과 토론 주제 {count}개를 JSON 배열로만 반환하세요:
 
 [
-  { "team": 37, "title": "…", "contents": "…"},
-  { "team": 37, "title": "…", "contents": "…"},
-  { "team": 37, "title": "…", "contents": "…"},
-  { "team": 37, "title": "…", "contents": "…"},
-  { "team": 37, "title": "…", "contents": "…"}
+  {{ "kind": "trivia", "team": 37, "title": "…", "contents": "…"}},
+  {{ "kind": "debate", "team": 37, "title": "…", "contents": "…"}}
 ]
 
-1. 처음 세 개는 축구 상식, 마지막 두 개는 토론형 질문.
+1. kind 가 "trivia" 인 축구 상식 {trivia}개, 그다음 kind 가 "debate" 인 토론형 질문 {debate}개.
 2. title 20자 이내, contents 2문장 이내, 모두 한국어.
 3. team 값은 모두 37 고정.
 4. JSON 형식 엄격 준수, 마지막 쉼표 금지.
@@ -41,57 +58,184 @@ def _safe_parse_array(text: str):
     snippet = text[start:end+1]
     return json.loads(re.sub(r',\s*(\])', r'\1', snippet))
 
-def load_used_titles():
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-def save_used_titles(titles):
-    with open(STATE_FILE, "w", encoding="utf-8") as f:
-        json.dump(titles, f, ensure_ascii=False, indent=2)
-
 def clear_used_titles():
-    save_used_titles([])
+    title_store.clear()
     return {"cleared": True}
 
-def generate_posts_excluding_previous():
-    used = load_used_titles()
-    ban_list = ""
-    if used:
-        ban_list = "\n금지할 이전 제목:\n- " + "\n- ".join(used)
-    prompt = SYSTEM_PROMPT + ban_list + "\n\n위 제목들은 절대 다시 사용하지 마세요.\n"
-
-    resp = openai.ChatCompletion.create(
-        model="gpt-4o-mini",
-        temperature=0.8,
-        max_tokens=500,
-        messages=[{"role":"system","content":prompt}],
-    )
+def build_prompt(want: dict, recent: list, rejected: list) -> str:
+    """전체 이력 대신 최근 제목 일부 + 이번 실행에서 중복으로 거절된 제목만 (프롬프트 길이 고정)"""
+    prompt = SYSTEM_PROMPT.format(count=sum(want.values()), trivia=want.get("trivia", 0),
+                                  debate=want.get("debate", 0))
+    if recent:
+        prompt += "\n\n최근에 사용한 제목(일부):\n- " + "\n- ".join(recent)
+    if rejected:
+        prompt += "\n\n이미 있는 주제라 거절된 제목:\n- " + "\n- ".join(rejected[-PROMPT_TITLES:])
+    return prompt + "\n\n위 제목들과 같거나 비슷한 제목은 사용하지 마세요.\n"
+
+def request_posts(prompt: str, count: int) -> list:
+    import openai
+    with instrument.span("openai.chat"):
+        resp = openai.ChatCompletion.create(
+            model="gpt-4o-mini",
+            temperature=0.8,
+            max_tokens=100 * count + 100,
+            messages=[{"role":"system","content":prompt}],
+        )
+    usage = resp.get("usage") or {}
+    instrument.count("openai.prompt_tokens", usage.get("prompt_tokens", 0))
+    instrument.count("openai.completion_tokens", usage.get("completion_tokens", 0))
     raw = resp.choices[0].message.content
-    posts = _safe_parse_array(raw)
+    return _safe_parse_array(raw)
+
+def validate_post(post, kind: str):
+    """형식이 맞으면 {"kind", "team", "title", "contents"}, 아니면 None"""
+    if not isinstance(post, dict):
+        return None
+    title    = str(post.get("title") or "").strip()
+    contents = str(post.get("contents") or "").strip()
+    if not title or not contents or len(title) > TITLE_MAX_CHARS:
+        return None
+    return {"kind": kind, "team": 37, "title": title, "contents": contents}
 
-    save_used_titles(used + [p["title"] for p in posts])
+def generate_posts(want: dict, store, rounds: int = MAX_ROUNDS) -> list:
+    """
+    종류별로 want 개수만큼 채운다. 생성된 글의 제목을 저장소와 비교해
+    같거나 비슷한 제목이면 버리고 모자란 만큼만 다시 생성 (최대 rounds 번).
+    kind 가 없거나 잘못된 글은 순서대로 (상식 → 토론) 자리를 채운다.
+    끝까지 못 채운 만큼은 빠진 채로 반환 (상식 → 토론 순)
+    """
+    accepted = {kind: [] for kind in want}
+    rejected = []
+    for round_no in range(rounds):
+        need = {kind: n - len(accepted[kind]) for kind, n in want.items() if n > len(accepted[kind])}
+        if not need:
+            break
+        if round_no:
+            instrument.count("titles.regenerations")
+        order = [kind for kind, n in need.items() for _ in range(n)]
+        posts = request_posts(build_prompt(need, store.recent(PROMPT_TITLES), rejected), len(order))
+        for i, raw in enumerate(posts):
+            kind = raw.get("kind") if isinstance(raw, dict) and raw.get("kind") in want else \
+                (order[i] if i < len(order) else None)
+            post = validate_post(raw, kind) if kind else None
+            if post is None:
+                instrument.count("titles.invalid")
+                continue
+            if len(accepted[kind]) >= want[kind]:
+                continue
+            dup = store.check(post["title"])
+            if dup is not None:
+                rejected.append(post["title"])
+                instrument.count(f"titles.{dup['match']}_duplicate")
+                print(f"[INFO] 중복 제목 거절 ({dup['match']} {dup['score']}): {post['title']} ~ {dup['title']}")
+                continue
+            accepted[kind].append(post)
+            store.add(post["title"])   # 같은 실행 안의 중복도 막음
+
+    out = [p for kind in want for p in accepted[kind]]
+    instrument.count("titles.accepted", len(out))
+    return out
+
+def generate_posts_excluding_previous():
+    """한 번 게시할 분량(PER_RUN)을 바로 생성"""
+    store = title_store.load()
+    posts = generate_posts(PER_RUN, store)
+    title_store.save(store)
     return posts
 
-def post_to_board(post: dict):
+def fill_pool(context=None, pool=None) -> dict:
+    """
+    풀의 종류별 글 수가 게시 POOL_RUNS 번 분량이 될 때까지 FILL_BATCH 개씩 생성해 저장.
+    제목 저장소는 호출마다 저장하므로 중간에 끊겨도 이미 넣은 글과 겹치지 않는다
+    """
+    pool   = pool or post_pool.PostPool()
+    store  = title_store.load()
+    target = {kind: n * POOL_RUNS for kind, n in PER_RUN.items()}
+    for kind in target:
+        pool.recover(kind)
+    added, calls = {kind: 0 for kind in target}, 0
+    while calls < FILL_MAX_CALLS:
+        if context is not None and context.get_remaining_time_in_millis() < TIME_MARGIN_MS:
+            print("[INFO] 남은 시간이 부족해 fill 중단")
+            break
+        deficit = {kind: target[kind] - pool.size(kind) for kind in target}
+        deficit = {kind: n for kind, n in deficit.items() if n > 0}
+        if not deficit:
+            break
+        # FILL_BATCH 를 모자란 비율대로 나눔
+        total = sum(deficit.values())
+        want  = {kind: max(1, min(n, round(FILL_BATCH * n / total))) for kind, n in deficit.items()}
+        posts = generate_posts(want, store, rounds=1)
+        calls += 1
+        for kind in want:
+            added[kind] += pool.enqueue(kind, [p for p in posts if p["kind"] == kind])
+        title_store.save(store)
+
+    sizes = {kind: pool.size(kind) for kind in target}
+    instrument.add_counters("pool.added", added)
+    instrument.add_counters("pool.size", sizes)
+    instrument.count("pool.fill_calls", calls)
+    return {"calls": calls, "added": added, "size": sizes, "target": target}
+
+def board_body(post: dict) -> dict:
     orig = post["contents"].rstrip()
     final_contents = orig + "\n\n\n\n\n이 글은 AI 가상 사용자에 의해 작성되었습니다."
-    body = {
+    return {
         "team":     post["team"],
         "title":    post["title"],
         "contents": final_contents
     }
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "Content-Type":  "application/json"
-    }
-    return requests.post(BOARD_URL, headers=headers, json=body)
 
+def post_to_board(post: dict) -> dict:
+    return BOARD.post(board_body(post), board_client.idempotency_key(post))
+
+def claim_posts(pool, fallback: bool = True) -> list:
+    """
+    풀에서 게시 한 번 분량(PER_RUN)을 꺼낸다. 모자라면 fallback 일 때만 그만큼 바로 생성
+    (바로 생성한 글에는 "_claim" 이 없어 ack / release 대상이 아님)
+    """
+    posts, short = [], {}
+    for kind, n in PER_RUN.items():
+        got = pool.claim(kind, n)
+        posts.extend(got)
+        if len(got) < n:
+            short[kind] = n - len(got)
+    instrument.count("pool.claimed", len(posts))
+    if short:
+        print(f"[WARN] 풀에 글이 부족합니다: {short}" + (" → 바로 생성" if fallback else ""))
+        instrument.count("pool.short", sum(short.values()))
+        if fallback:
+            try:
+                store = title_store.load()
+                posts.extend(generate_posts(short, store))
+                title_store.save(store)
+            except Exception as e:
+                # 꺼낸 글은 그대로 게시
+                print(f"[ERROR] 바로 생성 실패: {e}")
+    kinds = list(PER_RUN)
+    return sorted(posts, key=lambda p: kinds.index(p["kind"]))
+
+def publish(posts: list, pool=None) -> dict:
+    """동시에 등록하고, 풀에서 꺼낸 글은 성공하면 삭제 / 실패하면 풀로 되돌림 (다음 publish 에서 같은 key 로 재시도)"""
+    out = BOARD.publish([(board_body(p), board_client.idempotency_key(p)) for p in posts])
+    for p, res in zip(posts, out["results"]):
+        res["title"] = p["title"]
+        if pool is not None and p.get("_claim"):
+            if res["ok"]:
+                pool.ack(p)
+            else:
+                pool.release(p)
+    return out
+
+@instrument.handler("post_ai")
 def lambda_handler(event, context):
     """
-    event = { "action": "generate" } → 글 생성 & 업로드
-    event = { "action": "clear" }    → used_titles.json 초기화
+    event = { "action": "generate" } → 글 생성 & 업로드 (풀 사용 안 함)
+    event = { "action": "fill" }     → 풀을 목표량까지 채움 (한가한 시간대에 예약 실행)
+    event = { "action": "publish" }  → 풀에서 꺼내 업로드만 (부족하면 바로 생성, "fallback": false 면 부족한 채로)
+    generate / publish 는 올린 글이 없으면 503, 실패한 글이 있으면 502 (body 의 results 에 글별 결과)
+    event = { "action": "status" }   → 풀의 종류별 글 수
+    event = { "action": "clear" }    → 사용한 제목 저장소 초기화
     """
     action = event.get("action", "generate")
     if action == "clear":
@@ -100,25 +244,48 @@ def lambda_handler(event, context):
             "statusCode": 200,
             "body": json.dumps(result, ensure_ascii=False)
         }
+    if action == "status":
+        pool = post_pool.PostPool()
+        return {
+            "statusCode": 200,
+            "body": json.dumps({kind: pool.size(kind) for kind in PER_RUN}, ensure_ascii=False)
+        }
+    if action == "fill":
+        try:
+            result = fill_pool(context)
+        except Exception as e:
+            return {
+                "statusCode": 500,
+                "body": f"AI 생성 오류: {e}"
+            }
+        return {
+            "statusCode": 200,
+            "body": json.dumps(result, ensure_ascii=False)
+        }
 
+    pool = post_pool.PostPool() if action == "publish" else None
     try:
-        posts = generate_posts_excluding_previous()
+        if pool is not None:
+            posts = claim_posts(pool, fallback=event.get("fallback", True))
+        else:
+            posts = generate_posts_excluding_previous()
     except Exception as e:
         return {
             "statusCode": 500,
             "body": f"AI 생성 오류: {e}"
         }
 
-    results = []
-    for p in posts:
-        resp = post_to_board(p)
-        results.append({
-            "title":    p["title"],
-            "status":   resp.status_code,
-            "response": resp.text
-        })
-
+    # 올릴 글이 없었거나 한 건이라도 실패하면 2xx 가 아님 (body 의 ok / error 로도 구분)
+    result  = publish(posts, pool)
+    summary = result["summary"]
+    if not summary["total"]:
+        status, result["error"] = 503, "no posts to publish"
+    elif summary["failed"]:
+        status, result["error"] = 502, f"{summary['failed']}/{summary['total']} posts failed"
+    else:
+        status = 200
+    result["ok"] = status == 200
     return {
-        "statusCode": 200,
-        "body": json.dumps(results, ensure_ascii=False)
+        "statusCode": status,
+        "body": json.dumps(result, ensure_ascii=False)
     }
@@ -1,51 +1,117 @@
 import os
 import re
-import requests
-import dateutil.parser
-import openai
+import sys
 import json
+import time
 from bs4 import BeautifulSoup, NavigableString
 from urllib.parse import quote_plus
 from datetime import datetime
-import feedparser
-import boto3
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as StageTimeout
+
+# 공용 모듈 (KickOn/common) — Lambda 이미지에서는 핸들러와 같은 위치에 복사됨
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import http_cache
+import html_parse
+import features
+import kv_store
+import model_backend
+import news_scoring
+import scoring
+import instrument
+import clients
+import name_index
 
 # ─────────────────────────────────────
 # 설정
 BASE_URL = "https://www.transfermarkt.com"
-openai.api_key = ""
+# openai / feedparser / dateutil 은 처음 쓰는 함수 안에서 import (캐시 적중 / OPTIONS 요청은 로드하지 않음)
+# OpenAI API 키는 환경변수 OPENAI_API_KEY
 
 
-SM_RUNTIME = boto3.client("sagemaker-runtime", region_name="ap-northeast-2")
+# 뉴스 기사 점수 (KICKON_NEWS_CACHE 로 기사별 점수 캐시 저장소 선택)
+NEWS = news_scoring.from_env()
 
-POSITION_MAPPING = {
-    "Goalkeeper": 0,
-    "Defender":   1,
-    "Midfield":   2,
-    "Attack":     3,
+# 모델 호출은 common/model_backend.py (KICKON_MODEL_BACKEND=endpoint | local)
+
+# 배치 예측: 한 요청당 최대 선수 수 / 선수별 스크래핑·뉴스 동시 실행 수
+MAX_BATCH     = int(os.getenv("PREDICT_MAX_BATCH", "40"))
+BATCH_WORKERS = int(os.getenv("PREDICT_BATCH_WORKERS", "8"))
+
+# 단건 예측 단계별 제한 시간(초). profile / news 는 요청 시작부터, model 은 프로필을 받은 뒤부터 잰다
+STAGE_TIMEOUTS = {
+    "profile": float(os.getenv("PREDICT_PROFILE_TIMEOUT", "8")),
+    "model":   float(os.getenv("PREDICT_MODEL_TIMEOUT", "3")),
+    "news":    float(os.getenv("PREDICT_NEWS_TIMEOUT", "12")),
+}
+# 제한 시간을 넘긴 단계가 응답을 붙잡지 않도록 with 블록 대신 모듈 단위 pool 사용.
+# 단계마다 따로 두어 시간 초과로 아직 돌고 있는 profile / news 작업이 다음 요청이나
+# 프로필 뒤에 이어서 제출하는 model 단계의 자리를 차지하지 않게 한다
+STAGE_WORKERS = int(os.getenv("PREDICT_STAGE_WORKERS", "4"))
+STAGE_POOLS = {
+    stage: ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix=f"stage-{stage}")
+    for stage in STAGE_TIMEOUTS
+}
+
+# 예측 캐시 (PREDICT_CACHE: "memory[:최대 개수]" / "sqlite:/경로" / "off")
+#   key = 정규화한 선수 이름 (+ 모델 / 프롬프트 버전), (ttl, stale 허용 시간) 초
+MODEL_VERSION  = os.getenv("PREDICT_MODEL_VERSION", model_backend.ENDPOINT_NAME)
+PROMPT_VERSION = os.getenv("PREDICT_PROMPT_VERSION", news_scoring.PROMPT_VERSION)
+CACHE_STORE    = kv_store.from_uri(os.getenv("PREDICT_CACHE", "memory:2048"))
+CACHE_TTLS = {
+    "profile": (float(os.getenv("PREDICT_PROFILE_TTL", "86400")), float(os.getenv("PREDICT_PROFILE_STALE", "604800"))),
+    "news":    (float(os.getenv("PREDICT_NEWS_TTL", "10800")),    float(os.getenv("PREDICT_NEWS_STALE", "86400"))),
+    "score":   (float(os.getenv("PREDICT_SCORE_TTL", "3600")),    float(os.getenv("PREDICT_SCORE_STALE", "86400"))),
 }
+CACHES = {
+    ns: kv_store.SwrCache(CACHE_STORE, ns, ttl, stale)
+    for ns, (ttl, stale) in CACHE_TTLS.items()
+} if CACHE_STORE is not None else {}
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin":  "*",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Allow-Methods": "*",
+}
+
+# Transfermarkt 요청용 공유 session(clients.http_session) + 디스크 응답 캐시 (KICKON_HTTP_CACHE=0 이면 캐시 없음)
+HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Language": "en-US,en;q=0.9"}
+PAGE_CACHE = http_cache.from_env()
 
 # ─────────────────────────────────────
+def fetch_html(url: str) -> str:
+    def fetch(u, headers):
+        with instrument.span("transfermarkt.fetch"):
+            res = clients.http_session("transfermarkt", HEADERS).get(u, headers=headers, timeout=(5, 30))
+        instrument.count("transfermarkt.bytes", len(res.content))
+        return res
+
+    if PAGE_CACHE is not None:
+        return PAGE_CACHE.get(url, fetch)
+    resp = fetch(url, {})
+    resp.raise_for_status()
+    return resp.text
+
 def search_player_requests(player_name: str) -> BeautifulSoup:
     q = quote_plus(player_name, safe='')
     url = f"{BASE_URL}/schnellsuche/ergebnis/schnellsuche?query={q}"
-    headers = {"User-Agent": "Mozilla/5.0", "Accept-Language": "en-US,en;q=0.9"}
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    return BeautifulSoup(resp.text, "html.parser")
-
-def get_player_profile(player_name: str) -> dict:
-    soup = search_player_requests(player_name)
-    first = soup.select_one("table.items tbody tr td:nth-of-type(2) a")
-    if not first:
+    return html_parse.parse(fetch_html(url), region="items")
+
+def search_profile_path(player_name: str):
+    """빠른 검색 결과 첫 번째 선수의 프로필 경로 (없으면 None)"""
+    first = search_player_requests(player_name).select_one("table.items tbody tr td:nth-of-type(2) a")
+    return first["href"] if first else None
+
+def resolve_profile_path(player_name: str) -> str:
+    """이름 색인(common/name_index.py)에서 먼저 찾고, 없거나 애매하면 빠른 검색"""
+    profile_path, source = name_index.resolve(player_name, search_profile_path)
+    instrument.count(f"name_index.{source}")
+    if not profile_path:
         raise ValueError(f"No results found for '{player_name}'")
-    profile_path = first["href"]
-    profile_url = BASE_URL + profile_path
+    return profile_path
 
-    headers = {"User-Agent": "Mozilla/5.0", "Accept-Language": "en-US,en;q=0.9"}
-    resp = requests.get(profile_url, headers=headers)
-    resp.raise_for_status()
-    prof = BeautifulSoup(resp.text, "html.parser")
+def get_player_profile(player_name: str) -> dict:
+    profile_url = BASE_URL + resolve_profile_path(player_name)
+    prof = html_parse.parse(fetch_html(profile_url), region="profile")
 
     spans = prof.select("span.info-table__content--regular")
     dob = next((s for s in spans if "Date of birth/Age:" in s.get_text()), None)
@@ -84,17 +150,14 @@ def get_player_profile(player_name: str) -> dict:
         "rank": 0,
     }
 
-def to_timestamp(date_str: str, fmt: str = "%b %d, %Y") -> int:
-    dt = datetime.strptime(date_str, fmt)
-    return int(dt.timestamp())
-
-def map_position(pos_str: str) -> int:
-    return POSITION_MAPPING.get(pos_str, -1)
-
 def get_rss_summaries(player_name: str, max_entries: int = 5) -> list[dict]:
+    import feedparser
     q = quote_plus(f"{player_name} transfer rumors")
     url = f"https://news.google.com/rss/search?q={q}&hl=en-US&gl=US&ceid=US:en"
-    feed = feedparser.parse(url)
+    # feedparser 가 직접 받지 않고 공유 session(keep-alive)으로 받은 본문만 파싱
+    with instrument.span("rss.fetch"):
+        resp = clients.http_session("news", HEADERS).get(url, timeout=(5, 15))
+    feed = feedparser.parse(resp.content)
     out = []
     for entry in feed.entries[:max_entries]:
         raw = entry.get("summary", "")
@@ -108,6 +171,7 @@ def get_rss_summaries(player_name: str, max_entries: int = 5) -> list[dict]:
 
 
 def filter_articles_by_date(articles: list[dict], start: str, end: str) -> list[dict]:
+    import dateutil.parser
     start_dt = datetime.fromisoformat(start)
     end_dt = datetime.fromisoformat(end)
     out = []
@@ -121,77 +185,239 @@ def filter_articles_by_date(articles: list[dict], start: str, end: str) -> list[
             continue
     return out
 
-def classify_with_gpt(articles: list[dict]) -> dict:
-    payloads = [
-        f"ARTICLE_{i+1}\n\n{a['summary']}"
-        for i, a in enumerate(articles)
-    ]
-    user_msg = "\n\n---\n\n".join(payloads)
-
-    print("===== USER MESSAGE BEGIN =====")
-    print(user_msg)
-    print("===== USER MESSAGE END =====")
-
-    system_prompt = """
-You are a football transfer prediction assistant.
-For each ARTICLE_i (plain-text summary below), estimate the 0–100 probability it reports a genuine, still-possible transfer move.
-Then give an overall_probability (0–100) for the transfer happening.
-
-⚠️ Special rules:
-• If any ARTICLE_i reports a recent contract extension or re-signing, reduce that ARTICLE_i’s probability by at least 30 points and bias the overall_probability downward accordingly.
-• If any ARTICLE_i says the player’s current club is actively interested in keeping them (e.g. “club wants to keep,” “offer new deal”), boost that ARTICLE_i’s probability by at least 20 points and bias the overall_probability upward accordingly.
-• If any ARTICLE_i contains the keyword “FA” (or “Free Agent”), boost that ARTICLE_i’s probability by at least 20 points and bias overall_probability upward accordingly.
-
-Return ONLY valid JSON like:
-{
-  "per_article":[12,55,88],
-  "overall_probability":67
-}
-""".strip()
-
-    max_tokens = 256
-    for _ in range(3):
-        resp = openai.ChatCompletion.create(
-            model="gpt-4o-mini",
-            response_format={"type": "json_object"},
-            temperature=0.0,
-            max_tokens=max_tokens,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user",   "content": user_msg},
-            ],
-        )
-        content = resp.choices[0].message.content
-        if resp.choices[0].finish_reason == "stop":
+def classify_with_gpt(articles: list[dict], player_name: str = "") -> tuple:
+    """(기사별 확률, 전체 확률). 기사별 점수 캐시 / 통계는 common/news_scoring.py"""
+    return NEWS.score_articles(articles, player_name)
+
+
+def invoke_model(infos: list[dict]) -> list[float]:
+    """
+    선수 여러 명의 특성 행을 한 번에 예측해 행 순서대로 확률을 받는다
+    (endpoint 면 여러 행 text/csv 호출 한 번, local 이면 프로세스 안에서 바로)
+    """
+    return model_backend.predict(features.build_feature_matrix(infos)).tolist()
+
+def news_score(player_name: str):
+    """기사 점수 평균. 기사가 없거나 분류에 실패하면 None (뉴스 단계 실패로 처리)"""
+    arts = get_rss_summaries(player_name, max_entries=5)
+    _, ai_score = classify_with_gpt(arts, player_name)
+    return ai_score
+
+def normalize_name(player_name: str) -> str:
+    """"  Kylian  MBAPPÉ " → "kylian mbappe" (캐시 key, 이름 색인과 같은 정규화)"""
+    return name_index.normalize(player_name)
+
+def cached(ns: str, key: str, compute, should_store=lambda value: True):
+    cache = CACHES.get(ns)
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(key, compute, should_store)
+
+def cached_profile(player_name: str) -> dict:
+    return cached("profile", normalize_name(player_name), lambda: get_player_profile(player_name))
+
+def cached_news(player_name: str):
+    # 점수가 없는 결과(None)는 저장하지 않음 — 다음 요청에서 다시 시도
+    return cached("news", f"{PROMPT_VERSION}:{normalize_name(player_name)}", lambda: news_score(player_name),
+                  should_store=lambda score: score is not None)
+
+def cache_stats() -> dict:
+    return {ns: cache.stats() for ns, cache in CACHES.items()}
+
+def reset_stats():
+    """웜 컨테이너에서도 이번 실행분만 세도록 캐시 / 뉴스 통계 초기화"""
+    if PAGE_CACHE is not None:
+        PAGE_CACHE.reset_stats()
+    for cache in CACHES.values():
+        cache.reset_stats()
+    NEWS.reset_stats()
+
+def record_stats():
+    """캐시 통계를 이번 실행의 계측 카운터로 (instrument.handler 가 한 줄로 출력).
+    뉴스 통계는 NewsScorer 가 셀 때마다 news.* 카운터로 직접 더한다"""
+    if PAGE_CACHE is not None:
+        instrument.add_counters("http_cache", PAGE_CACHE.stats())
+    for ns, stats in cache_stats().items():
+        instrument.add_counters(f"predict_cache.{ns}", stats)
+
+def predict_batch(player_names: list[str], max_workers: int = BATCH_WORKERS) -> dict:
+    """
+    선수 목록 예측. 프로필 / 뉴스 RSS 는 선수별로 동시에 가져오고,
+    모델은 프로필을 얻은 선수 전체를 한 번에, GPT 는 모든 선수의 새 기사를 묶어서 호출한다.
+    프로필 / 모델에 실패한 선수는 results 대신 errors 에 단계와 함께 담고,
+    뉴스만 실패한 선수는 모델 확률만으로 results 에 담는다 (degraded="model_only", errors["news"]).
+    """
+    names = list(dict.fromkeys(n.strip() for n in player_names if n and n.strip()))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, 2 * len(names)))) as pool:
+        prof_futs = {n: pool.submit(cached_profile, n) for n in names}
+        rss_futs  = {n: pool.submit(get_rss_summaries, n, 5) for n in names}
+
+        errors, infos = [], {}
+        for n in names:
+            try:
+                infos[n] = prof_futs[n].result()
+            except Exception as e:
+                errors.append({"player_name": n, "stage": "profile", "error": str(e)})
+
+        base = {}
+        if infos:
             try:
-                data = json.loads(content)
-                pa = [p/100.0 for p in data["per_article"]]
-                ov = data["overall_probability"] / 100.0
-                return pa, ov
-            except (KeyError, json.JSONDecodeError):
-                pass
-        max_tokens *= 2
-    return [], 0.0
+                base = dict(zip(infos, invoke_model(list(infos.values()))))
+            except Exception as e:
+                errors.extend({"player_name": n, "stage": "model", "error": str(e)} for n in infos)
 
+        # 뉴스 단계 실패(RSS / 분류 예외)는 선수를 빼지 않고 모델 확률만으로 — 단건의 model_only 와 같음
+        articles, ai_scores, news_errors = {}, {}, {}
+        for n in base:
+            try:
+                articles[n] = rss_futs[n].result()
+            except Exception as e:
+                news_errors[n] = str(e)
+        if articles:
+            try:
+                scored    = NEWS.score_players(articles)
+                ai_scores = {n: scored[n]["overall"] for n in articles}
+            except Exception as e:
+                news_errors.update((n, str(e)) for n in articles)
+
+        results = []
+        for n in base:
+            ai_score = ai_scores.get(n)
+            if ai_score is None and n not in news_errors:
+                news_errors[n] = "no article scored"
+            results.append({
+                "player_name":     n,
+                "transfer_chance": scoring.combine(base[n], ai_score),
+                "base_prob":       base[n],
+                "ai_score":        ai_score,
+                "degraded":        None if ai_score is not None else "model_only",
+                "errors":          {"news": news_errors[n]} if n in news_errors else {},
+            })
+            if ai_score is None:
+                instrument.count("degraded.model_only")
+                instrument.count("stage.news.failed")
+    return {"results": results, "errors": errors}
+
+def predict_single(player_name: str, timeouts: dict = STAGE_TIMEOUTS) -> dict:
+    """
+    단건 예측. 서로 독립인 두 갈래를 동시에 실행한다.
+      - 모델: 프로필 스크래핑 → SageMaker
+      - 뉴스: RSS → GPT
+    한쪽이 실패하거나 제한 시간을 넘기면 다른 쪽 결과만으로 답한다
+    (degraded = "model_only" / "news_only"). 둘 다 없으면 transfer_chance 는 None.
+    """
+    start    = time.monotonic()
+    news_fut = STAGE_POOLS["news"].submit(cached_news, player_name)
+    prof_fut = STAGE_POOLS["profile"].submit(cached_profile, player_name)
+    errors   = {}
+
+    def wait(stage, fut, deadline):
+        try:
+            return fut.result(timeout=max(0.0, deadline - time.monotonic()))
+        except StageTimeout:
+            errors[stage] = f"timeout after {timeouts[stage]}s"
+        except Exception as e:
+            errors[stage] = str(e)
+        finally:
+            instrument.observe(f"stage.{stage}", (time.monotonic() - start) * 1000)
+        return None
+
+    base_prob = None
+    info = wait("profile", prof_fut, start + timeouts["profile"])
+    if info is not None:
+        # 학습 데이터와 같은 컬럼 순서 / 변환 (features.FEATURE_COLUMNS)
+        probs = wait("model", STAGE_POOLS["model"].submit(invoke_model, [info]),
+                     time.monotonic() + timeouts["model"])
+        base_prob = probs[0] if probs else None
+    ai_score = wait("news", news_fut, start + timeouts["news"])
+    if ai_score is None and "news" not in errors:
+        errors["news"] = "no article scored"
+
+    if base_prob is not None and ai_score is not None:
+        chance, degraded = scoring.combine_fixed(base_prob, ai_score), None
+    elif base_prob is not None:
+        chance, degraded = base_prob, "model_only"
+    elif ai_score is not None:
+        chance, degraded = ai_score, "news_only"
+    else:
+        chance, degraded = None, "failed"
+
+    if degraded:
+        instrument.count(f"degraded.{degraded}")
+    for stage in errors:
+        instrument.count(f"stage.{stage}.failed")
+    return {
+        "player_name":     player_name,
+        "transfer_chance": chance,
+        "base_prob":       base_prob,
+        "ai_score":        ai_score,
+        "degraded":        degraded,
+        "errors":          errors,
+    }
 
-def combine_fixed(base_prob, ai_score, w=0.3):
-    return w * base_prob + (1 - w) * ai_score
+def predict_cached(player_name: str) -> dict:
+    """
+    최종 점수 캐시를 거친 predict_single. 오래된(stale) 점수는 바로 돌려주고
+    백그라운드에서 다시 계산한다. degraded 결과는 저장하지 않는다.
+    """
+    key = f"{MODEL_VERSION}:{PROMPT_VERSION}:{normalize_name(player_name)}"
+    return cached("score", key, lambda: predict_single(player_name),
+                  should_store=lambda r: r["degraded"] is None)
+
+def batch_player_names(event: dict):
+    """
+    배치 요청의 선수 목록. 없으면 None (단건 요청).
+      - 직접 호출 / 스케줄러: {"player_names": [...]}
+      - API Gateway POST body: {"player_names": [...]}
+      - 쿼리스트링: ?player_names=Messi,Kane
+    """
+    if isinstance(event.get("player_names"), list):
+        return event["player_names"]
+    qs = event.get("queryStringParameters") or {}
+    if qs.get("player_names"):
+        return qs["player_names"].split(",")
+    body = event.get("body")
+    if body:
+        try:
+            data = json.loads(body)
+        except (TypeError, json.JSONDecodeError):
+            return None
+        if isinstance(data, dict) and isinstance(data.get("player_names"), list):
+            return data["player_names"]
+    return None
 
 # 최종 handler
 
+@instrument.handler("predict")
 def handler(event, context):
     # CORS 프리플라이트 요청 대응
     if event.get("httpMethod") == "OPTIONS":
         return {
             "statusCode": 200,
-            "headers": {
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "*",
-                "Access-Control-Allow-Methods": "*",
-            },
+            "headers": CORS_HEADERS,
             "body": ""
         }
 
+    # 여러 선수 (배치) 요청
+    names = batch_player_names(event)
+    if names is not None:
+        if not names or len(names) > MAX_BATCH:
+            return {
+                "statusCode": 400,
+                "headers": CORS_HEADERS,
+                "body": f"'player_names' must have 1..{MAX_BATCH} names"
+            }
+        reset_stats()
+        out = predict_batch(names)
+        record_stats()
+        instrument.count("batch.ok", len(out["results"]))
+        instrument.count("batch.failed", len(out["errors"]))
+        return {
+            "statusCode": 200 if out["results"] or not out["errors"] else 502,
+            "headers": CORS_HEADERS,
+            "body": json.dumps(out, ensure_ascii=False)
+        }
+
     qs = event.get("queryStringParameters") or {}
     player_name = qs.get("player_name")
     if not player_name:
@@ -200,49 +426,26 @@ def handler(event, context):
             "body": "Missing 'player_name' in query string"
         }
 
-    info = get_player_profile(player_name)
-
-    features = {
-        "age":        info["age"],
-        "market_value": float(re.sub(r"[^\d.]", "", info["market_value"] or "0")),
-        "joined_ts":  to_timestamp(info["joined"]),
-        "expires_ts": to_timestamp(info["contract_exp"]),
-        "appearance": info["appearance"],
-        "goals":      info["goals"],
-        "assists":    info["assists"],
-        "rank":       info["rank"],
-        "position":   map_position(info["position"]),
-    }
-
-    csv_input = ",".join(str(features.get(k, 0)) for k in [
-        "age", "market_value", "joined_ts", "expires_ts",
-        "appearance", "goals", "assists", "rank", "position"
-    ])
-    resp = SM_RUNTIME.invoke_endpoint(
-        EndpointName="xgboost-kickon-endpoint-v9",
-        ContentType="text/csv",
-        Body=csv_input
-    )
-    body = resp["Body"].read()
-    base_prob = float(body.decode('utf-8'))
+    reset_stats()
+    result = predict_cached(player_name)
+    record_stats()
 
-    arts = get_rss_summaries(player_name, max_entries=5)
-
-    per_article, ai_score = classify_with_gpt(arts)
-    final_chance = combine_fixed(base_prob, ai_score, w=0.1)
+    if result["transfer_chance"] is None:
+        return {
+            "statusCode": 502,
+            "headers": CORS_HEADERS,
+            "body": json.dumps({"player_name": player_name, "errors": result["errors"]}, ensure_ascii=False)
+        }
 
     # 민서가 수정함
     resp_body = {
          "player_name":     player_name,
-         "transfer_chance": final_chance,
+         "transfer_chance": result["transfer_chance"],
+         "degraded":        result["degraded"],
      }
 
     return {
          "statusCode": 200,
-         "headers": {
-             "Access-Control-Allow-Origin":  "*",
-             "Access-Control-Allow-Headers": "*",
-             "Access-Control-Allow-Methods": "*",
-         },
+         "headers": CORS_HEADERS,
          "body": json.dumps(resp_body, ensure_ascii=False)
      }
@@ -1,76 +1,337 @@
-import pandas as pd
-import boto3
-import io
-from botocore.exceptions import ClientError
+import os
+import re
+import sys
+import csv
+import json
+import time
+import hashlib
+import tempfile
 
-def lambda_handler(event, context):
-    # ─── 설정 ───────────────────────────────────
-    bucket           = "kickon-ml-data-bucket"
-    raw_prefix       = "EPL/Crawl_Data/"                # 원본 CSV가 쌓이는 S3 경로
-    processed_prefix = "EPL/Crawl_Data/processed/"      # 전처리된 CSV를 모아둘 경로
-    archive_prefix   = "EPL/Crawl_Data/archive/"        # 처리된 원본을 옮겨둘 경로
-    combined_key     = processed_prefix + "combined.csv"# 최종 합본 파일 경로
-    # ────────────────────────────────────────────
-
-    s3 = boto3.client('s3')
-    paginator = s3.get_paginator('list_objects_v2')
-    processed_dfs = []
-
-    # 1) raw_prefix 아래 신규 CSV를 읽어 전처리 → processed_dfs에 저장, 원본은 archive로 이동
-    for page in paginator.paginate(Bucket=bucket, Prefix=raw_prefix):
-        for obj in page.get('Contents', []):
-            key = obj['Key']
-            if not key.lower().endswith('.csv'):
+# 공용 모듈 (KickOn/common) — Lambda 이미지에서는 핸들러와 같은 위치에 복사됨
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import dedupe
+import feature_store
+import features
+import instrument
+import clients
+
+# ─── 설정 ───────────────────────────────────
+BUCKET           = "kickon-ml-data-bucket"
+RAW_PREFIX       = "EPL/Crawl_Data/"                    # 원본 CSV가 쌓이는 S3 경로 ({리그}/{시즌}/team_*.csv)
+PROCESSED_PREFIX = "EPL/Crawl_Data/processed/"          # 전처리 결과 경로
+PARTS_PREFIX     = PROCESSED_PREFIX + "parts/"          # 학습 입력: 헤더 없는 part CSV 들 (label 이 첫 컬럼)
+MANIFEST_KEY     = PROCESSED_PREFIX + "manifest.json"   # part 목록 / 컬럼 정보
+ARCHIVE_PREFIX   = "EPL/Crawl_Data/archive/"            # 처리된 원본을 옮겨둘 경로
+LEGACY_COMBINED  = PROCESSED_PREFIX + "combined.csv"    # 예전 전체 합본 (첫 실행 때 part 로 편입)
+DEDUPE_PREFIX    = PROCESSED_PREFIX + "dedupe/"         # 시즌별 중복 제거 색인 {시즌}.json: key → [행 해시, part 키]
+LEGACY_DEDUPE    = PROCESSED_PREFIX + "dedupe_index.json"   # 예전 단일 색인 (첫 실행 때 시즌별로 나눔)
+PART_KEYS_PREFIX = PROCESSED_PREFIX + "part_keys/"      # part 행 순서대로의 key 목록 (parts/ 밖 — 학습 입력 아님)
+
+# 예전 combined.csv 의 컬럼 (크롤러 CSV 컬럼에서 name 제외) — 원본에서 이 컬럼만 골라 쓴다
+LEGACY_COLUMNS   = ["transfer", "age", "market_value", "position", "joined_ts", "expires_ts",
+                    "appearances", "goals", "assists", "team_rank"]
+CHUNK_ROWS       = int(os.getenv("PREPROCESS_CHUNK_ROWS", "5000"))   # 특성 변환 배치 크기
+# ────────────────────────────────────────────
+
+s3 = instrument.wrap_client(clients.lazy("s3"), "s3")
+
+
+def load_manifest() -> dict:
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=MANIFEST_KEY)
+        return json.loads(obj["Body"].read())
+    except s3.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+    manifest = {"columns": LEGACY_COLUMNS, "parts": []}
+
+    # 첫 실행: 기존 combined.csv 가 있으면 서버 측 복사로 part 하나로 편입
+    try:
+        head = s3.head_object(Bucket=BUCKET, Key=LEGACY_COMBINED)
+    except s3.exceptions.ClientError:
+        return manifest
+    key = PARTS_PREFIX + "legacy-combined.csv"
+    s3.copy_object(Bucket=BUCKET, CopySource={"Bucket": BUCKET, "Key": LEGACY_COMBINED}, Key=key)
+    manifest["parts"].append({"key": key, "source": LEGACY_COMBINED, "rows": None,
+                              "bytes": head["ContentLength"], "created_at": time.time()})
+    print(f"▶ 기존 combined.csv → s3://{BUCKET}/{key}")
+    return manifest
+
+
+def save_manifest(manifest: dict):
+    s3.put_object(Bucket=BUCKET, Key=MANIFEST_KEY,
+                  Body=json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"),
+                  ContentType="application/json")
+
+
+def dedupe_shard_key(season) -> str:
+    # player_id key 가 (선수, 시즌) 이라 시즌 단위로 나눈다 — 같은 시즌의 리그 간 이적도 한 shard 에서 판정
+    return f"{DEDUPE_PREFIX}{season or '_'}.json"
+
+
+def load_dedupe_shard(season) -> dict:
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=dedupe_shard_key(season))
+        return json.loads(obj["Body"].read())
+    except s3.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+    return {}
+
+
+def save_dedupe_shard(season, index: dict):
+    s3.put_object(Bucket=BUCKET, Key=dedupe_shard_key(season),
+                  Body=json.dumps(index, separators=(",", ":")).encode("utf-8"),
+                  ContentType="application/json")
+
+
+def split_legacy_dedupe_index(manifest: dict) -> int:
+    """
+    예전 단일 dedupe_index.json 이 있으면 시즌별 shard 로 나눠 저장하고 지운다 (한 번만).
+    id key 는 key 의 시즌, 행 해시 key 는 가리키는 part 의 시즌으로 나눈다.
+    """
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=LEGACY_DEDUPE)
+    except s3.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+        return 0
+    legacy  = json.loads(obj["Body"].read())
+    seasons = {p["key"]: p.get("season") for p in manifest["parts"]}
+    shards  = {}
+    for key, entry in legacy.items():
+        season = (key.rsplit("|", 1)[1] or None) if key.startswith("id:") else seasons.get(entry[1])
+        shards.setdefault(season, {})[key] = entry
+    for season, index in shards.items():
+        save_dedupe_shard(season, {**load_dedupe_shard(season), **index})
+    s3.delete_object(Bucket=BUCKET, Key=LEGACY_DEDUPE)
+    print(f"▶ dedupe_index.json → 시즌별 shard {len(shards)}개")
+    return len(shards)
+
+
+def list_raw_files():
+    """RAW_PREFIX 아래 신규 CSV (processed/, archive/ 는 제외), 올라온 순서대로 — 같은 선수는 나중 파일이 이긴다"""
+    paginator = s3.get_paginator("list_objects_v2")
+    objs = []
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=RAW_PREFIX):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.startswith((PROCESSED_PREFIX, ARCHIVE_PREFIX)) or not key.lower().endswith(".csv"):
                 continue
+            objs.append(obj)
+    objs.sort(key=lambda o: (o.get("LastModified") or 0, o["Key"]))
+    return objs
+
+
+def parse_raw_key(key: str) -> dict:
+    """
+    '{리그}/{시즌}/team_0001_팀.csv' → 리그 / 시즌 / 팀 (예전 평면 경로면 리그, 시즌은 None).
+    크롤러가 팀을 다시 돌 때 붙이는 '.r{시각}' 은 팀 이름에서 뺀다
+    """
+    rel   = key[len(RAW_PREFIX):]
+    parts = rel.split("/")
+    name  = re.sub(r"\.r\d{8}T\d{6}[0-9a-f]{4}$", "", parts[-1][:-4])
+    team  = name.split("_", 2)[2] if name.startswith("team_") and name.count("_") >= 2 else name
+    return {
+        "league": parts[0] if len(parts) == 3 else None,
+        "season": parts[1] if len(parts) == 3 else None,
+        "team":   team,
+    }
+
+
+def part_key_for(obj: dict) -> str:
+    # 같은 원본(키 + ETag)은 항상 같은 part 키 → 중간에 끊겨 다시 돌아도 중복 part 가 생기지 않음
+    h = hashlib.sha1(f"{obj['Key']}|{obj.get('ETag', '')}".encode("utf-8")).hexdigest()[:16]
+    return f"{PARTS_PREFIX}part-{h}.csv"
+
+
+def keys_key_for(part_key: str) -> str:
+    return PART_KEYS_PREFIX + part_key.rsplit("/", 1)[-1][:-4] + ".keys"
+
+
+def stream_rows(body, columns: list):
+    """S3 StreamingBody 를 한 줄씩 읽어 {컬럼: 값} 행을 생성 (columns 가 모두 있는지 헤더로 확인)"""
+    lines  = (line.decode("utf-8") for line in body.iter_lines())
+    reader = csv.DictReader(lines)
+    missing = [c for c in columns if c not in (reader.fieldnames or columns)]
+    if missing:
+        raise ValueError(f"missing columns {missing}")
+    for row in reader:
+        yield row
 
-            filename = key.split('/')[-1]
-            print(f"▶ 처리 중: {filename}")
 
-            # 원본 읽기
-            resp = s3.get_object(Bucket=bucket, Key=key)
-            df = pd.read_csv(resp['Body'])
+@instrument.timed("preprocess.normalize")
+def normalize_chunk(rows: list, columns: list):
+    """원본 행 묶음 → columns 순서의 DataFrame (label 외 특성은 features 모듈로 한 번에 변환)"""
+    matrix = features.build_feature_matrix(rows)
+    matrix["transfer"] = features.integers([r.get("transfer") for r in rows])
+    return matrix[columns]
 
-            # name/Name 컬럼 제거
-            df = df.drop(columns=['name', 'Name'], errors='ignore')
-            processed_dfs.append(df)
 
-            # 원본을 archive로 복사 후 삭제
-            dst_arch = archive_prefix + filename
-            copy_source = {'Bucket': bucket, 'Key': key}
-            s3.copy_object(Bucket=bucket, CopySource=copy_source, Key=dst_arch)
-            s3.delete_object(Bucket=bucket, Key=key)
-            print(f"  • 원본 이동 → s3://{bucket}/{dst_arch}")
+def write_part(obj: dict, columns: list, index: dict, stale: dict) -> dict:
+    """
+    원본 하나를 헤더 없는 part CSV 로 스트리밍 변환 (메모리 대신 /tmp 임시 파일 사용).
+    CHUNK_ROWS 행씩 모아 features 모듈로 정규화한 뒤 쓴다.
+    pyarrow 가 있으면 같은 행을 feature store 의 리그/시즌/팀 파티션에도 Parquet 로 저장
+    (원본 하나 = 팀 하나 분량이라 메모리에 모아도 크기가 제한됨).
 
-    # 2) 기존 combined.csv 불러오기 (있으면), 없으면 빈 DataFrame
+    중복 제거 (dedupe 모듈의 key, index = {key: [행 해시, part 키]}):
+      - 이미 다른 part 에 같은 key / 같은 해시가 있으면 건너뜀
+      - 같은 key 인데 해시가 다르면(시즌 중 이적 / 기록 갱신) 새 행을 쓰고,
+        예전 part 는 stale[part 키] 에 선수 id 를 모아 두었다가 rewrite_stale_parts 에서 정리
+      - 같은 파일 안의 중복은 첫 행만
+    index 가 이미 이 part 를 가리키는 key 는 그대로 쓴다 (끊긴 실행을 다시 돌려도 같은 part)
+    """
+    key      = obj["Key"]
+    meta     = parse_raw_key(key)
+    part_key = part_key_for(obj)
+    resp     = s3.get_object(Bucket=BUCKET, Key=key)
+    keep     = [] if feature_store.available() else None
+    rows, chunk, row_keys, seen = 0, [], [], set()
+    dupes = upserts = 0
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", encoding="utf-8", delete=False) as tmp:
+        for row in stream_rows(resp["Body"], columns):
+            rkey = dedupe.row_key(row, meta["season"])
+            if rkey in seen:
+                dupes += 1
+                continue
+            seen.add(rkey)
+            rhash = dedupe.row_hash(row)
+            prev  = index.get(rkey)
+            if prev is not None and prev[1] != part_key:
+                if prev[0] == rhash:
+                    dupes += 1
+                    continue
+                upserts += 1
+                stale.setdefault(prev[1], set()).add(row.get("player_id") or "")
+            index[rkey] = [rhash, part_key]
+            row_keys.append(rkey)
+            chunk.append(row)
+            if keep is not None:
+                keep.append(row)
+            if len(chunk) >= CHUNK_ROWS:
+                normalize_chunk(chunk, columns).to_csv(tmp, header=False, index=False)
+                rows += len(chunk)
+                chunk = []
+        if chunk:
+            normalize_chunk(chunk, columns).to_csv(tmp, header=False, index=False)
+            rows += len(chunk)
     try:
-        resp = s3.get_object(Bucket=bucket, Key=combined_key)
-        existing_df = pd.read_csv(resp['Body'], header=None)
-        print("▶ 기존 combined.csv 불러옴")
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'NoSuchKey':
-            existing_df = pd.DataFrame()
-            print("▶ 기존 combined.csv 없음, 새로 생성")
+        size = os.path.getsize(tmp.name)
+        if rows:   # 모두 중복이면 part 를 만들지 않음
+            s3.upload_file(tmp.name, BUCKET, part_key, ExtraArgs={"ContentType": "text/csv"})
+            s3.put_object(Bucket=BUCKET, Key=keys_key_for(part_key), Body="\n".join(row_keys).encode("utf-8"),
+                          ContentType="text/plain")
+    finally:
+        os.remove(tmp.name)
+
+    part = {"key": part_key, "source": key, "rows": rows, "bytes": size,
+            "created_at": time.time(), "duplicates": dupes, "upserts": upserts, **meta}
+    instrument.count("preprocess.rows", rows)
+    instrument.count("preprocess.bytes", size)
+    instrument.count("preprocess.duplicates", dupes)
+    instrument.count("preprocess.upserts", upserts)
+    if keep:
+        part["parquet"] = feature_store.write_partition(
+            keep, meta["league"], meta["season"], meta["team"],
+            part_name=part_key.rsplit("/", 1)[-1][:-4])
+    return part
+
+
+def rewrite_stale_parts(manifest: dict, index: dict, stale: dict) -> int:
+    """
+    upsert 로 밀려난 행을 예전 part 에서 뺀다. part 의 key 목록에서 index 가 아직
+    그 part 를 가리키는 행만 남기므로 여러 번 돌려도 결과가 같다.
+    key 목록이 없는 part(예전 합본 / 중복 제거 이전 part)는 건드리지 않는다.
+    """
+    by_key, rewritten = {p["key"]: p for p in manifest["parts"]}, 0
+    for part_key, player_ids in stale.items():
+        part = by_key.get(part_key)
+        try:
+            keys = s3.get_object(Bucket=BUCKET, Key=keys_key_for(part_key))["Body"].read().decode("utf-8").split("\n")
+        except s3.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchKey":
+                raise
+            print(f"  • key 목록 없음, 건너뜀: {part_key}")
+            continue
+        lines = s3.get_object(Bucket=BUCKET, Key=part_key)["Body"].read().decode("utf-8").splitlines()
+        kept  = [(k, line) for k, line in zip(keys, lines) if index.get(k, [None, None])[1] == part_key]
+        if len(kept) == len(lines):
+            continue
+        body = "".join(line + "\n" for _, line in kept).encode("utf-8")
+        if kept:
+            s3.put_object(Bucket=BUCKET, Key=part_key, Body=body, ContentType="text/csv")
+            s3.put_object(Bucket=BUCKET, Key=keys_key_for(part_key),
+                          Body="\n".join(k for k, _ in kept).encode("utf-8"), ContentType="text/plain")
         else:
-            raise
+            s3.delete_object(Bucket=BUCKET, Key=part_key)
+            s3.delete_object(Bucket=BUCKET, Key=keys_key_for(part_key))
+        if part is not None:
+            if part.get("parquet"):
+                feature_store.drop_rows(part["parquet"], "player_id", player_ids)
+            part["rows"], part["bytes"] = len(kept), len(body)
+            if not kept:
+                manifest["parts"].remove(part)
+        rewritten += 1
+        print(f"  • part 정리: {part_key} {len(lines)} → {len(kept)}행")
+    instrument.count("preprocess.parts_rewritten", rewritten)
+    return rewritten
+
 
-    # 3) 기존 합본 + 신규 데이터를 합치기
-    all_dfs = processed_dfs
-    if not existing_df.empty:
-        all_dfs = [existing_df] + processed_dfs
-
-    if all_dfs:
-        combined_df = pd.concat(all_dfs, ignore_index=True)
-        # 4) 합본을 S3에 overwrite
-        buf = io.StringIO()
-        combined_df.to_csv(buf, index=False, header=False)
-        buf.seek(0)
-        s3.put_object(Bucket=bucket, Key=combined_key, Body=buf.getvalue())
-        print(f"▶ 전처리된 {len(processed_dfs)}개 파일을 기존 합본과 병합하여 s3://{bucket}/{combined_key}에 저장")
+def archive_raw(key: str):
+    # 원본을 archive로 복사 후 삭제 (리그/시즌 하위 경로 유지)
+    dst_arch = ARCHIVE_PREFIX + key[len(RAW_PREFIX):]
+    s3.copy_object(Bucket=BUCKET, CopySource={"Bucket": BUCKET, "Key": key}, Key=dst_arch)
+    s3.delete_object(Bucket=BUCKET, Key=key)
+    print(f"  • 원본 이동 → s3://{BUCKET}/{dst_arch}")
+
+
+@instrument.handler("preprocessing")
+def lambda_handler(event, context):
+    manifest = load_manifest()
+    columns  = manifest["columns"]
+    known    = {p["key"] for p in manifest["parts"]}
+    split_legacy_dedupe_index(manifest)
+    shards   = {}   # 이번에 들어온 원본의 시즌 → 중복 제거 색인 (그 시즌 shard 만 읽음)
+    stale    = {}   # 시즌 → {part 키: 선수 id}
+    new_parts, done = [], []
+    dupes = upserts = 0
+
+    # 1) 신규 원본만 한 줄씩 읽어 part 로 저장 (기존 합본은 건드리지 않음)
+    for obj in list_raw_files():
+        filename = obj["Key"].split("/")[-1]
+        print(f"▶ 처리 중: {filename}")
+        season = parse_raw_key(obj["Key"])["season"]
+        if season not in shards:
+            shards[season] = load_dedupe_shard(season)
+        part = write_part(obj, columns, shards[season], stale.setdefault(season, {}))
+        if part["rows"] and part["key"] not in known:
+            new_parts.append(part)
+            known.add(part["key"])
+        done.append(obj["Key"])
+        dupes   += part["duplicates"]
+        upserts += part["upserts"]
+        print(f"  • {part['rows']}행 → s3://{BUCKET}/{part['key']} (중복 {part['duplicates']}, 갱신 {part['upserts']})")
+
+    # 2) 밀려난 행 정리 → index / manifest 갱신 후 3) 원본 archive
+    #    순서상 어디서 끊겨도 다시 돌리면 같은 part 를 덮어쓸 뿐
+    if done:
+        manifest["parts"].extend(new_parts)
+        for season, index in shards.items():
+            rewrite_stale_parts(manifest, index, stale[season])
+        manifest["updated_at"] = time.time()
+        for season, index in shards.items():
+            save_dedupe_shard(season, index)
+        save_manifest(manifest)
+        for key in done:
+            archive_raw(key)
+        print(f"▶ 전처리된 {len(done)}개 파일을 s3://{BUCKET}/{PARTS_PREFIX} 에 part 로 추가 "
+              f"(중복 {dupes}행 제외, {upserts}행 갱신)")
     else:
         print("▶ 병합할 데이터가 없습니다.")
 
     return {
         'statusCode': 200,
-        'body': f"Processed {len(processed_dfs)} files; combined.csv updated."
+        'body': f"Processed {len(done)} files; {len(new_parts)} parts added to {PARTS_PREFIX}; "
+                f"{dupes} duplicate rows skipped, {upserts} rows updated."
     }
-
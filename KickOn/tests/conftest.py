@@ -0,0 +1,10 @@
+import os
+import sys
+
+# 공용 모듈 (KickOn/common) 과 로컬 스텁 (KickOn/benchmark/stubs.py)
+HERE = os.path.dirname(os.path.abspath(__file__))
+for sub in ("common", "benchmark"):
+    sys.path.insert(0, os.path.join(HERE, "..", sub))
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-northeast-2")
+os.environ.setdefault("KICKON_METRICS", "0")
@@ -0,0 +1,156 @@
+"""board_client.BoardClient — 게시판 API 스텁(stubs.StubBoardAPI / 응답을 정해 둔 세션)으로 확인"""
+import pytest
+import requests
+
+import board_client
+import stubs
+
+
+class ScriptedSession:
+    """post 마다 responses 를 순서대로 돌려준다 (예외면 raise). 받은 요청은 calls 에 기록"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls     = []
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.calls.append({"url": url, "headers": headers, "json": json, "timeout": timeout})
+        resp = self.responses.pop(0)
+        if isinstance(resp, Exception):
+            raise resp
+        return resp
+
+
+def response(status, payload=None, headers=None):
+    resp = stubs._Response(status, payload or {})
+    resp.headers = headers or {}
+    return resp
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    waited = []
+    monkeypatch.setattr(board_client.time, "sleep", waited.append)
+    return waited
+
+
+def client(session, **kw):
+    return board_client.BoardClient("https://board/posts", "token", session=session, backoff=0.1, **kw)
+
+
+def items(n):
+    posts = [{"team": 37, "title": f"제목 {i}", "contents": "내용"} for i in range(n)]
+    return [(p, board_client.idempotency_key(p)) for p in posts]
+
+
+def test_republish_same_keys_counts_duplicates(sleeps):
+    board = stubs.StubBoardAPI()
+    c     = client(board, concurrency=3)
+    batch = items(5)
+
+    first  = c.publish(batch)["summary"]
+    second = c.publish(batch)["summary"]
+
+    assert first == {"total": 5, "posted": 5, "duplicate": 0, "failed": 0, "retries": 0}
+    assert second == {"total": 5, "posted": 0, "duplicate": 5, "failed": 0, "retries": 0}
+    assert len(board.posts) == 5
+
+
+def test_idempotency_key_sent_and_stable():
+    post = {"team": 37, "title": "제목", "contents": "내용"}
+    assert board_client.idempotency_key(post) == board_client.idempotency_key(dict(post))
+    assert board_client.idempotency_key({**post, "id": "abc"}) == "abc"
+
+    session = ScriptedSession([response(201, {"created": True})])
+    client(session).post(post, "key-1")
+    assert session.calls[0]["headers"]["Idempotency-Key"] == "key-1"
+    assert session.calls[0]["timeout"] == board_client.TIMEOUT
+
+
+def test_replay_header_counts_as_duplicate():
+    session = ScriptedSession([response(200, {}, {"Idempotent-Replayed": "true"})])
+    res = client(session).post({"title": "t"}, "k")
+    assert res["ok"] and not res["created"]
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_retryable_status_honours_retry_after(status, sleeps):
+    session = ScriptedSession([response(status, headers={"Retry-After": "7"}),
+                               response(201, {"created": True})])
+    res = client(session).post({"title": "t"}, "k")
+
+    assert res["ok"] and res["created"] and res["attempts"] == 2
+    assert sleeps == [7.0]
+    # 재시도도 같은 key
+    assert [c["headers"]["Idempotency-Key"] for c in session.calls] == ["k", "k"]
+
+
+def test_long_retry_after_is_clamped_to_backoff_max(sleeps):
+    session = ScriptedSession([response(429, headers={"Retry-After": "600"}),
+                               response(201, {"created": True})])
+    res = client(session).post({"title": "t"}, "k")
+
+    assert res["ok"] and res["attempts"] == 2
+    assert sleeps == [board_client.BACKOFF_MAX]
+
+
+def test_backoff_without_retry_after_grows(sleeps):
+    session = ScriptedSession([response(503), response(503), response(201, {"created": True})])
+    res = client(session).post({"title": "t"}, "k")
+
+    assert res["ok"] and res["attempts"] == 3
+    # 지터 0.5~1.0 배: 첫 대기 0.05~0.1, 두 번째 0.1~0.2
+    assert 0.05 <= sleeps[0] <= 0.1 and 0.1 <= sleeps[1] <= 0.2
+
+
+def test_timeout_is_retried(sleeps):
+    session = ScriptedSession([requests.exceptions.ReadTimeout("slow"), response(201, {"created": True})])
+    res = client(session).post({"title": "t"}, "k")
+    assert res["ok"] and res["attempts"] == 2 and "error" not in res
+
+
+@pytest.mark.parametrize("status", [400, 401, 403, 404, 422])
+def test_other_4xx_fail_immediately(status, sleeps):
+    session = ScriptedSession([response(status, {"error": "bad"})])
+    res = client(session).post({"title": "t"}, "k")
+
+    assert not res["ok"] and res["status"] == status and res["attempts"] == 1
+    assert len(session.calls) == 1 and sleeps == []
+
+
+def test_gives_up_after_max_attempts(sleeps):
+    session = ScriptedSession([response(503)] * 3)
+    res = client(session, max_attempts=3).post({"title": "t"}, "k")
+    assert not res["ok"] and res["status"] == 503 and res["attempts"] == 3
+    assert len(sleeps) == 2
+
+
+def test_summary_counts_mixed_results(sleeps):
+    # 순차(concurrency=1)로 보내 응답 순서를 고정
+    session = ScriptedSession([
+        response(201, {"created": True}),                        # 0: 등록
+        response(200, {"created": False}),                       # 1: 중복
+        response(503), response(201, {"created": True}),         # 2: 재시도 1번 후 등록
+        response(400),                                           # 3: 실패
+        response(503), response(503),                            # 4: 재시도 끝에 실패
+    ])
+    out = client(session, concurrency=1, max_attempts=2).publish(items(5))
+
+    assert out["summary"] == {"total": 5, "posted": 2, "duplicate": 1, "failed": 2, "retries": 2}
+    assert [r["ok"] for r in out["results"]] == [True, True, True, False, False]
+
+
+def test_concurrent_publish_keeps_order_and_survives_failures(sleeps):
+    board = stubs.StubBoardAPI(fail_every=3)
+    out   = client(board, concurrency=4).publish(items(12))
+
+    summary = out["summary"]
+    # 3번째 요청마다 503 → 적어도 4번은 재시도, 재시도 덕에 (스레드 순서와 무관하게) 거의 모두 등록
+    assert summary["retries"] >= 4
+    assert summary["posted"] + summary["failed"] == 12 and summary["duplicate"] == 0
+    assert len(board.posts) == summary["posted"]
+    assert [r["key"] for r in out["results"]] == [k for _, k in items(12)]
+
+
+def test_empty_publish():
+    assert client(ScriptedSession([])).publish([])["summary"]["total"] == 0
@@ -0,0 +1,100 @@
+"""crawl.http_get 재시도 / rate limit 설정 (가짜 session, 네트워크 없음)"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "crawler"))
+import crawl  # noqa: E402
+
+
+class Response:
+    def __init__(self, status, text="", headers=None):
+        self.status_code = status
+        self.text        = text
+        self.content     = text.encode("utf-8")
+        self.headers     = headers or {}
+        self.raw         = None
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise crawl.requests.HTTPError(f"{self.status_code}")
+
+
+class ScriptedSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls     = 0
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, url):
+        self.acquired += 1
+        return 0.0
+
+
+@pytest.fixture
+def env(monkeypatch):
+    limiter, sleeps = CountingLimiter(), []
+    monkeypatch.setattr(crawl, "page_cache", None)
+    monkeypatch.setattr(crawl, "rate_limiter", limiter)
+    monkeypatch.setattr(crawl.time, "sleep", sleeps.append)
+
+    def use(*responses):
+        session = ScriptedSession(*responses)
+        monkeypatch.setattr(crawl, "session", session)
+        return session
+    return use, limiter, sleeps
+
+
+def test_retries_go_through_the_limiter_each_attempt(env):
+    use, limiter, sleeps = env
+    session = use(Response(429, headers={"Retry-After": "3"}), Response(503), Response(200, "ok"))
+    assert crawl.http_get("https://www.transfermarkt.com/x", timeout=1) == "ok"
+    assert session.calls == 3 and limiter.acquired == 3
+    assert sleeps == [3.0, 2.0]        # Retry-After, 그다음은 BACKOFF * 2
+
+
+def test_gives_up_after_max_attempts(env, monkeypatch):
+    use, limiter, sleeps = env
+    monkeypatch.setattr(crawl, "MAX_ATTEMPTS", 3)
+    use(*[Response(500) for _ in range(3)])
+    with pytest.raises(crawl.requests.HTTPError):
+        crawl.http_get("https://www.transfermarkt.com/x", timeout=1)
+    assert limiter.acquired == 3 and len(sleeps) == 2
+
+
+def test_other_errors_are_not_retried(env):
+    use, limiter, sleeps = env
+    session = use(Response(404))
+    with pytest.raises(crawl.requests.HTTPError):
+        crawl.http_get("https://www.transfermarkt.com/x", timeout=1)
+    assert session.calls == 1 and sleeps == []
+
+
+def test_adapter_does_not_retry_status_codes():
+    assert not crawl.retry_strategy.status_forcelist
+    assert crawl.retry_strategy.status == 0
+
+
+def test_rate_limit_resets_to_defaults_between_invocations(monkeypatch):
+    limiter = crawl.HostRateLimiter(rate=crawl.HOST_RATE, burst=crawl.HOST_BURST)
+    monkeypatch.setattr(crawl, "rate_limiter", limiter)
+
+    crawl.configure_rate_limit({"rate": "0.5", "burst": "2"})
+    assert (limiter.rate, limiter.burst) == (0.5, 2.0)
+    assert limiter.bucket("h").capacity == 2.0
+
+    crawl.configure_rate_limit({})
+    assert (limiter.rate, limiter.burst) == (crawl.HOST_RATE, crawl.HOST_BURST)
+
+    bucket = limiter.bucket("h")
+    crawl.configure_rate_limit({})     # 값이 같으면 버킷 유지
+    assert limiter.bucket("h") is bucket
@@ -0,0 +1,64 @@
+"""crawl_player 증분 모드 — 프로필이 그대로여도 기록(출장 / 골 / 어시스트) 변경은 반영되는지"""
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "crawler"))
+import crawl  # noqa: E402
+
+URL     = "https://tm/saka/profil/spieler/433177"
+PROFILE = {"name": "Bukayo Saka", "market_value": "€140.00m", "age": "22", "position": "Right Winger",
+           "joined": "Jul 1, 2019", "contract_expires": "Jun 30, 2027", "transfer": 0}
+HOUR    = 3600
+
+
+@pytest.fixture
+def site(monkeypatch):
+    state = {"now": 1_000_000.0, "perf": {"appearances": 30, "goals": 14, "assists": 9}, "perf_calls": 0}
+
+    def perf(url, competition, season):
+        state["perf_calls"] += 1
+        return dict(state["perf"])
+
+    monkeypatch.setattr(crawl.time, "time", lambda: state["now"])
+    monkeypatch.setattr(crawl, "fetch_player_profile", lambda url, season: dict(PROFILE))
+    monkeypatch.setattr(crawl, "fetch_performance", perf)
+    return state
+
+
+def crawl_again(entry):
+    return crawl.crawl_player(URL, entry, incremental=True, refresh_hours=24, perf_refresh_hours=72)
+
+
+def test_stats_only_change_is_written_after_perf_refresh(site):
+    info, entry = crawl.crawl_player(URL, None, incremental=True)
+    assert info["goals"] == 14 and site["perf_calls"] == 1
+
+    # 프로필 재검증 주기는 지났지만 기록은 아직 새것 → 기록 페이지 요청 없이 변경 없음
+    site["now"] += 25 * HOUR
+    site["perf"]["goals"] = 15
+    info, entry = crawl_again(entry)
+    assert info is None and site["perf_calls"] == 1
+
+    # 기록 주기가 지나면 기록만 바뀐 선수도 다시 기록
+    site["now"] += 48 * HOUR
+    info, entry = crawl_again(entry)
+    assert site["perf_calls"] == 2
+    assert info is not None and info["goals"] == 15
+    assert entry["perf_at"] == site["now"]
+
+
+def test_unchanged_stats_after_perf_refresh_are_not_written(site):
+    _, entry = crawl.crawl_player(URL, None, incremental=True)
+    site["now"] += 80 * HOUR
+    info, entry = crawl_again(entry)
+    assert info is None and site["perf_calls"] == 2
+
+
+def test_old_manifest_entry_without_perf_fields_refetches_stats(site):
+    entry = {"hash": crawl.profile_hash(PROFILE), "crawled_at": site["now"] - 30 * HOUR, "name": PROFILE["name"]}
+    info, entry = crawl_again(entry)
+    assert site["perf_calls"] == 1
+    assert info is not None and entry["perf_hash"] and entry["perf_at"] == site["now"]
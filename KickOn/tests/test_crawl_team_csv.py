@@ -0,0 +1,98 @@
+"""crawl 팀 CSV — 다시 돌린 팀이 아직 전처리 안 된 원본을 덮어쓰지 않는지 (메모리 S3 스텁)"""
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "crawler"))
+sys.path.insert(0, os.path.join(HERE, "..", "preprocessing"))
+import crawl           # noqa: E402
+import preprocessing   # noqa: E402
+import stubs           # noqa: E402
+
+TEAMS   = [{"team": "Arsenal FC", "url": "https://tm/arsenal"}]
+PLAYERS = [f"https://tm/p{i}/profil/spieler/{i}" for i in range(3)]
+
+
+class Context:
+    def __init__(self, remaining_ms=10 ** 9):
+        self.remaining = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    s3 = stubs.StubS3()
+    monkeypatch.setattr(crawl, "s3", s3)
+    monkeypatch.setattr(crawl, "fetch_player_links", lambda url: PLAYERS)
+    monkeypatch.setattr(crawl, "save_name_index", lambda *a: None)
+    return s3
+
+
+def use_players(monkeypatch, market_value):
+    def crawl_player(url, entry=None, incremental=False, *args):
+        i = int(url.rsplit("/", 1)[1])
+        return ({"name": f"P{i}", "transfer": 0, "age": 20 + i, "market_value": market_value,
+                 "position": "Attack", "joined": "Jul 1, 2020", "contract_expires": "Jun 30, 2026",
+                 "appearances": 1, "goals": 0, "assists": 0, "player_id": str(i)},
+                {"hash": market_value, "crawled_at": 0.0, "name": f"P{i}"})
+    monkeypatch.setattr(crawl, "crawl_player", crawl_player)
+
+
+def team_files(s3):
+    return sorted(k for _, k in s3.objects if k.startswith(crawl.RESULTS_PREFIX) and k.endswith(".csv"))
+
+
+def run(**kw):
+    return crawl.crawl_teams("GB1", "2023", TEAMS, [0], Context(), concurrency=2, **kw)
+
+
+def test_rerun_writes_a_new_file_instead_of_overwriting(s3, monkeypatch):
+    use_players(monkeypatch, "€10m")
+    run()
+    first = team_files(s3)
+    assert len(first) == 1
+    body = s3.objects[(crawl.BUCKET, first[0])]
+
+    # 전처리가 아직 archive 하지 않은 상태에서 팀을 다시 돌림 (완료된 팀 force / 증분 재실행)
+    use_players(monkeypatch, "€20m")
+    run(incremental=True)
+    files = team_files(s3)
+    assert len(files) == 2 and first[0] in files
+    assert s3.objects[(crawl.BUCKET, first[0])] == body
+    assert crawl.load_progress({"competition": "GB1", "season": "2023", "team_idx": 0})["done"]
+
+
+def test_resume_continues_the_same_run_file(s3, monkeypatch):
+    use_players(monkeypatch, "€10m")
+    shard = {"competition": "GB1", "season": "2023", "team_idx": 0}
+    monkeypatch.setattr(crawl, "FLUSH_ROWS", 1)
+    # 첫 선수 뒤에 시간이 다 되어 멈춤
+    out = crawl.crawl_teams("GB1", "2023", TEAMS, [0], Context(remaining_ms=0), concurrency=1)
+    assert "paused" in out["body"]
+    run_id = crawl.load_progress(shard)["run"]
+    assert run_id and team_files(s3) == [crawl.team_csv_key(shard, "Arsenal FC", run_id)]
+
+    run()
+    assert team_files(s3) == [crawl.team_csv_key(shard, "Arsenal FC", run_id)]
+    rows = crawl.read_team_csv(s3.objects[(crawl.BUCKET, team_files(s3)[0])].decode("utf-8"))
+    assert [r[1] for r in rows] == ["P0", "P1", "P2"]
+
+
+def test_legacy_progress_without_run_keeps_the_old_key(s3, monkeypatch):
+    use_players(monkeypatch, "€10m")
+    shard = {"competition": "GB1", "season": "2023", "team_idx": 0}
+    legacy = crawl.team_csv_key(shard, "Arsenal FC")
+    crawl.save_team_results_csv(shard, "Arsenal FC", [], 0)
+    crawl.save_progress(shard, {"player_idx": 1, "rows": 0, "done": False})
+    run()
+    assert team_files(s3) == [legacy]
+
+
+def test_preprocessing_strips_the_run_from_the_team_name(s3):
+    shard = {"competition": "GB1", "season": "2023", "team_idx": 7}
+    key = crawl.team_csv_key(shard, "1. FC Köln", crawl.new_run_id())
+    assert preprocessing.parse_raw_key(key) == {"league": "GB1", "season": "2023", "team": "1. FC Köln"}
@@ -0,0 +1,36 @@
+"""feature_store — 타입 변환 / 예전 스키마 part 읽기 (로컬 디렉터리)"""
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq  # noqa: E402
+
+import feature_store  # noqa: E402
+
+ROW = {"transfer": "1", "name": "Gómez", "age": "22", "market_value": "€10m", "position": "Attack - Centre-Forward",
+       "joined_ts": "Jul 1, 2024", "expires_ts": "1782777600", "appearances": "-", "goals": "3.0",
+       "assists": "", "team_rank": "5", "player_id": "100"}
+
+
+def test_to_table_uses_the_features_conversions():
+    rec = feature_store.to_table([ROW, {"name": "B"}]).to_pylist()
+    assert rec[0] == {"transfer": 1, "name": "Gómez", "age": 22, "market_value": 10.0, "position": 3,
+                      "joined_ts": 1719792000, "expires_ts": 1782777600, "appearances": 0, "goals": 3,
+                      "assists": 0, "team_rank": 5, "player_id": "100"}
+    assert rec[1]["position"] == -1 and rec[1]["age"] == 0
+
+
+def test_load_reads_player_id_from_old_and_new_parts(tmp_path):
+    root = str(tmp_path)
+    feature_store.write_partition([ROW], "GB1", "2023", "B", "new", uri=root)
+    # player_id 컬럼이 생기기 전의 part
+    old = feature_store.to_table([ROW]).drop(["player_id"])
+    directory = feature_store.partition_path(root, "GB1", "2022", "A")
+    os.makedirs(directory)
+    pq.write_table(old, f"{directory}/old.parquet")
+
+    df = feature_store.load(["name", "player_id", "season"], uri=root).sort_values("season")
+    assert df["season"].tolist() == ["2022", "2023"]
+    assert df["player_id"].isna().tolist() == [True, False]
+    assert df["player_id"].iloc[1] == "100"
@@ -0,0 +1,164 @@
+"""kv_store — MemoryStore / SqliteStore 와 SwrCache 의 fresh / stale / miss 동작 (시계는 고정값으로 조절)"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import kv_store
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(kv_store.time, "time", c)
+    return c
+
+
+@pytest.fixture
+def pool():
+    p = ThreadPoolExecutor(max_workers=2)
+    yield p
+    p.shutdown(wait=True)
+
+
+class Counter:
+    """compute 대용: 부를 때마다 1, 2, 3 ..."""
+
+    def __init__(self):
+        self.n = 0
+
+    def __call__(self):
+        self.n += 1
+        return self.n
+
+
+def test_fresh_hit_does_not_recompute(clock):
+    cache   = kv_store.SwrCache(kv_store.MemoryStore(), "score", ttl=60, stale_ttl=600)
+    compute = Counter()
+
+    assert cache.get_or_compute("son", compute) == 1
+    clock.now += 59
+    assert cache.get_or_compute("son", compute) == 1
+    assert compute.n == 1
+    assert cache.stats() == {"hits": 1, "stale_hits": 0, "misses": 1, "refreshes": 0, "refresh_errors": 0}
+
+
+def test_stale_hit_returns_old_value_and_refreshes_in_background(clock, pool):
+    cache   = kv_store.SwrCache(kv_store.MemoryStore(), "score", ttl=60, stale_ttl=600, pool=pool)
+    compute = Counter()
+    cache.get_or_compute("son", compute)
+
+    clock.now += 120
+    assert cache.get_or_compute("son", compute) == 1      # 예전 값을 바로 반환
+    pool.shutdown(wait=True)                               # 백그라운드 갱신 대기
+    assert compute.n == 2
+    assert cache.lookup("son") == (2, "fresh")            # 갱신된 값은 방금 저장됨
+    assert cache.stats()["stale_hits"] == 1 and cache.stats()["refreshes"] == 1
+
+
+def test_stale_refresh_runs_once_per_key(clock, pool):
+    cache   = kv_store.SwrCache(kv_store.MemoryStore(), "news", ttl=10, stale_ttl=100, pool=pool)
+    cache.get_or_compute("son", lambda: "old")
+    clock.now += 20
+
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "new"
+
+    for _ in range(5):
+        assert cache.get_or_compute("son", slow) == "old"
+    started.wait(5)
+    release.set()
+    pool.shutdown(wait=True)
+    assert len(calls) == 1
+    assert cache.stats()["stale_hits"] == 5
+
+
+def test_expired_entry_is_a_miss(clock):
+    cache   = kv_store.SwrCache(kv_store.MemoryStore(), "profile", ttl=60, stale_ttl=600)
+    compute = Counter()
+    cache.get_or_compute("son", compute)
+
+    clock.now += 60 + 600
+    assert cache.lookup("son") == (None, "miss")
+    assert cache.get_or_compute("son", compute) == 2      # 바로 다시 계산
+    assert cache.stats()["misses"] == 2
+
+
+def test_ttl_is_per_namespace_on_a_shared_store(clock):
+    store   = kv_store.MemoryStore()
+    score   = kv_store.SwrCache(store, "score", ttl=60, stale_ttl=0)
+    profile = kv_store.SwrCache(store, "profile", ttl=3600, stale_ttl=0)
+    score.put("son", "s")
+    profile.put("son", "p")
+
+    # 같은 key 도 namespace 가 다르면 따로 저장
+    assert score.lookup("son") == ("s", "fresh") and profile.lookup("son") == ("p", "fresh")
+    clock.now += 120
+    assert score.lookup("son") == (None, "miss")
+    assert profile.lookup("son") == ("p", "fresh")
+
+
+def test_should_store_false_is_not_cached(clock):
+    cache   = kv_store.SwrCache(kv_store.MemoryStore(), "score", ttl=60)
+    compute = Counter()
+    cache.get_or_compute("son", compute, should_store=lambda v: False)
+    assert cache.lookup("son") == (None, "miss")
+
+
+def test_refresh_error_keeps_old_value(clock, pool):
+    cache = kv_store.SwrCache(kv_store.MemoryStore(), "score", ttl=10, stale_ttl=100, pool=pool)
+    cache.get_or_compute("son", lambda: "old")
+    clock.now += 20
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    assert cache.get_or_compute("son", boom) == "old"
+    pool.shutdown(wait=True)
+    assert cache.stats()["refresh_errors"] == 1
+    assert cache.lookup("son") == ("old", "stale")
+
+
+def test_caches_share_one_refresh_pool():
+    store = kv_store.MemoryStore()
+    a = kv_store.SwrCache(store, "a", ttl=1)
+    b = kv_store.SwrCache(store, "b", ttl=1)
+    assert a.pool is b.pool is kv_store.refresh_pool()
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = kv_store.MemoryStore(max_items=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    store.get("a")
+    store.set("c", 3)
+    assert store.get("b") is None and store.get("a")[0] == 1 and len(store) == 2
+
+
+def test_sqlite_store_roundtrip(tmp_path):
+    path  = str(tmp_path / "kv.db")
+    store = kv_store.from_uri(f"sqlite:{path}")
+    store.set("k", {"prob": 0.5}, stored_at=123.0)
+    assert kv_store.SqliteStore(path).get("k") == ({"prob": 0.5}, 123.0)
+    store.delete("k")
+    assert store.get("k") is None and len(store) == 0
+
+
+def test_from_uri():
+    assert kv_store.from_uri("off") is None and kv_store.from_uri("") is None
+    assert kv_store.from_uri("memory:5").max_items == 5
+    with pytest.raises(ValueError):
+        kv_store.from_uri("redis://x")
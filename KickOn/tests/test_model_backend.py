@@ -0,0 +1,89 @@
+"""model_backend.fetch_artifact — 산출물별 캐시 디렉터리 (가짜 S3 클라이언트, 네트워크 없음)"""
+import io
+import os
+import tarfile
+
+import pytest
+
+import clients
+import model_backend
+
+
+def make_tar(path, payload: bytes):
+    with tarfile.open(path, "w:gz") as tar:
+        info = tarfile.TarInfo("model/booster.bin")
+        info.size = len(payload)
+        tar.addfile(info, io.BytesIO(payload))
+
+
+class FakeS3:
+    """bucket/key → (ETag, 로컬 파일)"""
+
+    def __init__(self):
+        self.objects   = {}
+        self.downloads = []
+
+    def head_object(self, Bucket, Key):
+        return {"ETag": f'"{self.objects[(Bucket, Key)][0]}"'}
+
+    def download_file(self, bucket, key, path):
+        self.downloads.append(key)
+        with open(self.objects[(bucket, key)][1], "rb") as src, open(path, "wb") as dst:
+            dst.write(src.read())
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    fake = FakeS3()
+    monkeypatch.setattr(clients, "boto", lambda service, region=None: fake)
+    return fake
+
+
+def read(path):
+    with open(path, "rb") as fp:
+        return fp.read()
+
+
+def test_s3_artifacts_with_same_basename_do_not_collide(tmp_path, s3):
+    for name, payload in (("v8", b"model-v8"), ("v9", b"model-v9")):
+        make_tar(tmp_path / f"{name}.tar.gz", payload)
+        s3.objects[("bkt", f"models/{name}/model.tar.gz")] = (name, tmp_path / f"{name}.tar.gz")
+
+    cache = str(tmp_path / "cache")
+    v8 = model_backend.fetch_artifact("s3://bkt/models/v8/model.tar.gz", cache)
+    v9 = model_backend.fetch_artifact("s3://bkt/models/v9/model.tar.gz", cache)
+    assert v8 != v9
+    assert read(v8) == b"model-v8" and read(v9) == b"model-v9"
+    assert os.path.basename(v9) == "xgboost-model"
+
+
+def test_s3_artifact_is_reused_until_etag_changes(tmp_path, s3):
+    make_tar(tmp_path / "a.tar.gz", b"first")
+    s3.objects[("bkt", "m/model.tar.gz")] = ("e1", tmp_path / "a.tar.gz")
+    cache = str(tmp_path / "cache")
+
+    first = model_backend.fetch_artifact("s3://bkt/m/model.tar.gz", cache)
+    assert model_backend.fetch_artifact("s3://bkt/m/model.tar.gz", cache) == first
+    assert len(s3.downloads) == 1
+
+    # 같은 키에 새 모델을 덮어씀 → ETag 가 바뀌어 다시 받음
+    make_tar(tmp_path / "b.tar.gz", b"second")
+    s3.objects[("bkt", "m/model.tar.gz")] = ("e2", tmp_path / "b.tar.gz")
+    second = model_backend.fetch_artifact("s3://bkt/m/model.tar.gz", cache)
+    assert second != first and read(second) == b"second" and len(s3.downloads) == 2
+
+
+def test_local_tar_is_extracted_per_file(tmp_path):
+    make_tar(tmp_path / "a.tar.gz", b"a")
+    make_tar(tmp_path / "b.tar.gz", b"b")
+    cache = str(tmp_path / "cache")
+    a = model_backend.fetch_artifact(str(tmp_path / "a.tar.gz"), cache)
+    b = model_backend.fetch_artifact(str(tmp_path / "b.tar.gz"), cache)
+    assert read(a) == b"a" and read(b) == b"b"
+    assert not [f for f in os.listdir(os.path.dirname(a)) if f.endswith(".tmp")]
+
+
+def test_plain_local_model_file_is_used_in_place(tmp_path):
+    path = tmp_path / "xgboost-model"
+    path.write_bytes(b"raw")
+    assert model_backend.fetch_artifact(str(path), str(tmp_path / "cache")) == str(path)
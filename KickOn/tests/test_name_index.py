@@ -0,0 +1,89 @@
+"""name_index — 검색 별칭 합치기 (로컬 디렉터리 저장소)"""
+import os
+import threading
+
+import pytest
+
+import name_index
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    uri = str(tmp_path / "index")
+    monkeypatch.setattr(name_index, "INDEX_URI", uri)
+    monkeypatch.setattr(name_index, "_index", None)
+    monkeypatch.setattr(name_index, "_loaded_at", 0.0)
+    monkeypatch.setattr(name_index, "_reloading", False)
+    monkeypatch.setattr(name_index, "_pending", [])
+    name_index.save_shard("GB1", "2023", 0, "Arsenal",
+                          {"https://www.transfermarkt.com/martin-odegaard/profil/spieler/316264": {"name": "Martin Ødegaard"}},
+                          uri)
+    return uri
+
+
+def files(uri, sub):
+    base = os.path.join(uri, sub)
+    return sorted(os.listdir(base)) if os.path.isdir(base) else []
+
+
+def test_learned_aliases_are_compacted_into_shards(root):
+    for i in range(40):
+        name_index.learn(f"Player Number {i}", f"/player-{i}/profil/spieler/{1000 + i}")
+    name_index.flush()
+    assert len(files(root, name_index.LEARNED_DIR)) == 40
+
+    assert name_index.compact_learned() == 40
+    assert files(root, name_index.LEARNED_DIR) == []
+    assert 0 < len(files(root, name_index.ALIAS_DIR)) <= name_index.ALIAS_SHARDS
+
+    index = name_index.load()
+    assert index.lookup("Player Number 7")["id"] == "1007"
+    assert index.lookup("Martin Odegaard")["id"] == "316264"
+
+
+def test_compaction_merges_with_existing_shards_and_later_alias_wins(root):
+    name_index.learn("Kun", "/sergio-aguero/profil/spieler/26399")
+    name_index.learn("Sonny", "/heung-min-son/profil/spieler/91845")
+    name_index.compact_learned()
+
+    name_index.learn("Kun", "/kun-other/profil/spieler/1")   # 같은 별칭을 다시 배움
+    assert name_index.compact_learned() == 1
+
+    index = name_index.load()
+    assert index.lookup("Sonny")["id"] == "91845"
+    assert index.lookup("Kun")["id"] == "1"
+
+
+def test_compaction_without_learned_files_is_a_noop(root):
+    assert name_index.compact_learned() == 0
+    assert files(root, name_index.ALIAS_DIR) == []
+
+
+def test_stale_index_is_served_while_reloading_in_background(root, monkeypatch):
+    old = name_index.get_index()
+    assert old.lookup("odegaard")["path"] == "/martin-odegaard/profil/spieler/316264"
+
+    release, real_load = threading.Event(), name_index.load
+    monkeypatch.setattr(name_index, "load", lambda: (release.wait(5), real_load())[1])
+    name_index.save_shard("GB1", "2023", 1, "Chelsea",
+                          {"https://www.transfermarkt.com/cole-palmer/profil/spieler/568177": {"name": "Cole Palmer"}},
+                          root)
+    monkeypatch.setattr(name_index, "_loaded_at", 0.0)
+
+    # 다시 읽기가 막혀 있어도 요청은 기다리지 않고 이전 색인을 받음, 다시 읽기는 한 번만
+    assert name_index.get_index() is old
+    assert name_index.get_index() is old
+    assert len(name_index._pending) == 1
+
+    release.set()
+    name_index.flush(5)
+    fresh = name_index.get_index()
+    assert fresh is not old
+    assert fresh.lookup("cole palmer")["path"] == "/cole-palmer/profil/spieler/568177"
+
+
+def test_learn_updates_memory_now_and_writes_in_background(root):
+    name_index.learn("Kun", "/sergio-aguero/profil/spieler/26399")
+    assert name_index.get_index().lookup("kun")["path"] == "/sergio-aguero/profil/spieler/26399"
+    name_index.flush(5)
+    assert len(files(root, name_index.LEARNED_DIR)) == 1
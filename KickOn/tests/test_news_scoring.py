@@ -0,0 +1,144 @@
+"""news_scoring.NewsScorer — 기사 해시 캐시 / 배치 / 실패 처리 (로컬 StubModel, 네트워크 없음)"""
+import json
+
+import kv_store
+import news_scoring
+
+
+def articles(*summaries):
+    return [{"summary": s} for s in summaries]
+
+
+def scorer(model=None, store=None, **kw):
+    return news_scoring.NewsScorer(model=model or news_scoring.StubModel(),
+                                   store=store if store is not None else kv_store.MemoryStore(), **kw)
+
+
+def test_second_run_classifies_no_new_articles():
+    model = news_scoring.StubModel()
+    s     = scorer(model)
+    arts  = {"Son": articles("Bid expected in talks", "Club wants him to stay"),
+             "Kane": articles("Medical booked after agreement")}
+
+    first = s.score_players(arts)
+    assert len(model.calls) == 1 and s.stats()["classified"] == 3
+
+    s.reset_stats()
+    second = s.score_players(arts)
+    assert len(model.calls) == 1                       # 모델 호출 없음
+    assert s.stats()["classified"] == 0 and s.stats()["cache_hits"] == 3
+    assert second == first
+
+
+def test_same_article_with_whitespace_or_case_changes_is_cached():
+    model = news_scoring.StubModel()
+    s     = scorer(model)
+    s.score_articles(articles("Bid expected in talks"), "Son")
+    s.score_articles(articles("  BID expected   in talks "), "Son")
+    assert len(model.calls) == 1
+
+
+def test_prompt_version_bump_invalidates_cache(monkeypatch):
+    model = news_scoring.StubModel()
+    store = kv_store.MemoryStore()
+    arts  = articles("Bid expected in talks", "New deal discussed")
+    scorer(model, store).score_articles(arts, "Son")
+
+    monkeypatch.setattr(news_scoring, "PROMPT_VERSION", "next-prompt")
+    s = scorer(model, store)
+    s.score_articles(arts, "Son")
+    assert len(model.calls) == 2 and s.stats()["classified"] == 2 and s.stats()["cache_hits"] == 0
+
+
+def test_expired_entries_are_reclassified():
+    model = news_scoring.StubModel()
+    store = kv_store.MemoryStore()
+    key   = news_scoring.article_key("Bid expected in talks", "Son")
+    store.set(key, 0.99, stored_at=0.0)                # 아주 오래된 점수
+
+    per, overall = scorer(model, store, ttl=3600).score_articles(articles("Bid expected in talks"), "Son")
+    assert len(model.calls) == 1 and overall == per[0] != 0.99
+
+
+def test_article_naming_two_players_is_classified_per_player():
+    model = news_scoring.StubModel()
+    s     = scorer(model)
+    same  = "Chelsea bid for A and B"
+    out   = s.score_players({"A": articles(same), "B": articles(same)})
+
+    # 같은 기사라도 선수마다 따로 분류 (프롬프트가 "그 선수" 기준)
+    assert len(model.calls) == 1 and len(model.calls[0]) == 2
+    assert s.stats()["classified"] == 2
+    assert news_scoring.article_key(same, "A") != news_scoring.article_key(same, "B")
+    assert out["A"]["overall"] is not None and out["B"]["overall"] is not None
+
+    # 다시 보면 둘 다 캐시, 선수 이름의 공백 / 대소문자 차이는 같은 key
+    s.reset_stats()
+    s.score_players({" a ": articles(same), "B": articles(same)})
+    assert len(model.calls) == 1 and s.stats()["cache_hits"] == 2
+
+
+def test_duplicate_articles_of_one_player_are_classified_once_and_batched():
+    model = news_scoring.StubModel()
+    s     = scorer(model, batch_articles=25)
+    same  = "Agent confirms interest from several clubs"
+    arts  = {f"P{i}": articles(f"Player {i} signs new deal", same, same) for i in range(10)}
+
+    out = s.score_players(arts)
+    # 선수 10명 × 서로 다른 기사 2개 = 20 → 25개씩 묶으면 요청 1번
+    assert len(model.calls) == 1 and len(model.calls[0]) == 20
+    assert all(len(v["per_article"]) == 3 for v in out.values())
+
+    s2 = scorer(news_scoring.StubModel(), batch_articles=8)
+    s2.score_players(arts)
+    assert s2.stats()["requests"] == 3
+
+
+def test_overall_is_mean_of_article_scores():
+    res = scorer().score_players({"Son": articles("Bid expected in talks", "Club wants him to stay")})["Son"]
+    # StubModel: 40 + bid 20 + talks 10 = 70, 40 + stay -20 = 20
+    assert res["per_article"] == [0.7, 0.2]
+    assert abs(res["overall"] - 0.45) < 1e-9
+
+
+class FailingModel:
+    def __init__(self):
+        self.max_tokens = []
+
+    def __call__(self, system_prompt, user_msg, max_tokens):
+        self.max_tokens.append(max_tokens)
+        return '{"scores": {"A1": 5', "length", {"prompt_tokens": 10, "completion_tokens": max_tokens}
+
+
+def test_failed_classification_gives_none_and_is_not_cached():
+    model = FailingModel()
+    store = kv_store.MemoryStore()
+    s     = scorer(model, store)
+    per, overall = s.score_articles(articles("Bid expected in talks"), "Son")
+
+    assert per == [] and overall is None
+    assert s.stats()["failed"] == 1 and len(store) == 0
+    # 잘린 응답은 max_tokens 를 두 배로 늘려 MAX_ATTEMPTS 번까지
+    assert len(model.max_tokens) == news_scoring.MAX_ATTEMPTS
+    assert model.max_tokens[1] == 2 * model.max_tokens[0]
+
+
+def test_no_articles_gives_none():
+    model = news_scoring.StubModel()
+    assert scorer(model).score_articles([], "Son") == ([], None)
+    assert model.calls == []
+
+
+def test_truncated_then_valid_response_is_used():
+    class Flaky:
+        def __init__(self):
+            self.n = 0
+
+        def __call__(self, system_prompt, user_msg, max_tokens):
+            self.n += 1
+            if self.n == 1:
+                return '{"scores": {"A1"', "length", {}
+            return json.dumps({"scores": {"A1": 80}}), "stop", {}
+
+    _, overall = scorer(Flaky()).score_articles(articles("Bid expected"), "Son")
+    assert overall == 0.8
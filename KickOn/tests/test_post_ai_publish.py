@@ -0,0 +1,65 @@
+"""post_ai publish — 게시 결과에 따른 statusCode (로컬 풀 + 게시판 스텁, 네트워크 없음)"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "postai"))
+import board_client  # noqa: E402
+import post_ai       # noqa: E402
+import post_pool     # noqa: E402
+import stubs         # noqa: E402
+
+
+class DownBoard:
+    def post(self, url, json=None, headers=None, timeout=None, **kw):
+        return stubs._Response(400, {"error": "bad request"})
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(post_pool, "POOL_URI", str(tmp_path / "pool"))
+    pool = post_pool.PostPool()
+    for kind, n in post_ai.PER_RUN.items():
+        pool.enqueue(kind, [{"team": 37, "title": f"{kind} {i}", "contents": "내용"} for i in range(n)])
+    return pool
+
+
+def use_board(monkeypatch, session):
+    monkeypatch.setattr(post_ai, "BOARD", board_client.BoardClient("https://board", "t", session=session,
+                                                                    concurrency=1, max_attempts=1))
+
+
+def publish():
+    out = post_ai.lambda_handler({"action": "publish", "fallback": False}, None)
+    return out["statusCode"], json.loads(out["body"])
+
+
+def test_all_posted_is_200(pool, monkeypatch):
+    use_board(monkeypatch, stubs.StubBoardAPI())
+    status, body = publish()
+    assert status == 200 and body["ok"] is True and "error" not in body
+    assert body["summary"]["posted"] == sum(post_ai.PER_RUN.values())
+
+
+def test_every_post_failed_is_not_2xx_and_posts_return_to_the_pool(pool, monkeypatch):
+    use_board(monkeypatch, DownBoard())
+    status, body = publish()
+    assert status == 502 and body["ok"] is False
+    assert body["summary"]["failed"] == body["summary"]["total"] == sum(post_ai.PER_RUN.values())
+    assert {k: pool.size(k) for k in post_ai.PER_RUN} == post_ai.PER_RUN
+
+
+def test_partial_failure_is_not_2xx(pool, monkeypatch):
+    use_board(monkeypatch, stubs.StubBoardAPI(fail_every=2))
+    status, body = publish()
+    assert status == 502 and body["ok"] is False
+    assert 0 < body["summary"]["failed"] < body["summary"]["total"]
+
+
+def test_nothing_to_publish_is_not_2xx(tmp_path, monkeypatch):
+    monkeypatch.setattr(post_pool, "POOL_URI", str(tmp_path / "empty"))
+    use_board(monkeypatch, stubs.StubBoardAPI())
+    status, body = publish()
+    assert status == 503 and body["ok"] is False and body["summary"]["total"] == 0
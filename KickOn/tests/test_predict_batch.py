@@ -0,0 +1,55 @@
+"""predict_batch — 뉴스 단계만 실패한 선수는 빠지지 않고 모델 확률만으로 (model_only)"""
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "predict"))
+import predict        # noqa: E402
+import news_scoring   # noqa: E402
+
+BASE = {"Saka": 0.2, "Kane": 0.6}
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    monkeypatch.setattr(predict, "cached_profile", lambda name: {"name": name})
+    monkeypatch.setattr(predict, "invoke_model", lambda infos: [BASE[i["name"]] for i in infos])
+    monkeypatch.setattr(predict, "NEWS", news_scoring.NewsScorer(model=news_scoring.StubModel()))
+
+
+def by_name(out):
+    return {r["player_name"]: r for r in out["results"]}
+
+
+def test_rss_failure_for_one_player_falls_back_to_base_prob(stages, monkeypatch):
+    def rss(name, limit):
+        if name == "Kane":
+            raise RuntimeError("rss down")
+        return [{"summary": "Saka agreement reached, medical booked"}]
+    monkeypatch.setattr(predict, "get_rss_summaries", rss)
+
+    out = predict.predict_batch(["Saka", "Kane"])
+    res = by_name(out)
+    assert out["errors"] == []
+    assert res["Saka"]["degraded"] is None and res["Saka"]["ai_score"] is not None
+    assert res["Kane"]["degraded"] == "model_only"
+    assert res["Kane"]["ai_score"] is None
+    assert res["Kane"]["transfer_chance"] == BASE["Kane"]
+    assert res["Kane"]["errors"] == {"news": "rss down"}
+
+
+def test_news_scorer_failure_degrades_every_player(stages, monkeypatch):
+    def boom(articles):
+        raise RuntimeError("openai down")
+    monkeypatch.setattr(predict, "get_rss_summaries", lambda name, limit: [{"summary": f"{name} talks"}])
+    monkeypatch.setattr(predict.NEWS, "score_players", boom)
+
+    out = predict.predict_batch(["Saka", "Kane"])
+    res = by_name(out)
+    assert out["errors"] == []
+    for name, prob in BASE.items():
+        assert res[name]["degraded"] == "model_only"
+        assert res[name]["transfer_chance"] == prob
+        assert res[name]["errors"] == {"news": "openai down"}
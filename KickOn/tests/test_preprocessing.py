@@ -0,0 +1,120 @@
+"""preprocessing — part 쓰기 / 중복 제거 / upsert 정리 (메모리 S3 스텁)"""
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "preprocessing"))
+import preprocessing   # noqa: E402
+import stubs           # noqa: E402
+
+HEADER  = "transfer,name,age,market_value,position,joined_ts,expires_ts,appearances,goals,assists,team_rank,player_id\n"
+GOMEZ   = "1,Gómez,22,€10m,2,1,2,10,1,1,5,100"
+SMITH   = "0,Smith,25,€5m,1,1,2,3,0,0,5,101"
+SMITH_2 = "0,Smith,25,€6m,1,1,2,9,1,0,3,101"     # 같은 시즌 이적 / 기록 갱신
+COLUMNS = preprocessing.LEGACY_COLUMNS
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    s3 = stubs.StubS3()
+    monkeypatch.setattr(preprocessing, "s3", s3)
+    monkeypatch.setattr(preprocessing.feature_store, "available", lambda: False)
+    return s3
+
+
+def put_raw(s3, name, rows):
+    key = f"{preprocessing.RAW_PREFIX}GB1/2023/{name}"
+    s3.put_object(Bucket=preprocessing.BUCKET, Key=key, Body=HEADER + "".join(r + "\n" for r in rows))
+    return next(o for o in preprocessing.list_raw_files() if o["Key"] == key)
+
+
+def part_lines(s3, part_key):
+    body = s3.objects.get((preprocessing.BUCKET, part_key))
+    return body.decode("utf-8").splitlines() if body is not None else None
+
+
+def test_duplicate_rows_are_skipped_within_and_across_files(s3):
+    index, stale = {}, {}
+    first = preprocessing.write_part(put_raw(s3, "team_0001_A.csv", [GOMEZ, SMITH, SMITH]), COLUMNS, index, stale)
+    assert first["rows"] == 2 and first["duplicates"] == 1
+    assert len(part_lines(s3, first["key"])) == 2
+
+    # 다른 팀 파일에 같은 행이 다시 나옴 → 모두 중복이면 part 를 만들지 않음
+    second = preprocessing.write_part(put_raw(s3, "team_0002_B.csv", [GOMEZ]), COLUMNS, index, stale)
+    assert second["rows"] == 0 and second["duplicates"] == 1 and second["upserts"] == 0
+    assert part_lines(s3, second["key"]) is None
+    assert stale == {}
+
+
+def test_upsert_removes_the_old_row_from_its_part(s3):
+    index, stale = {}, {}
+    old = preprocessing.write_part(put_raw(s3, "team_0001_A.csv", [GOMEZ, SMITH]), COLUMNS, index, stale)
+    manifest = {"columns": COLUMNS, "parts": [old]}
+
+    new = preprocessing.write_part(put_raw(s3, "team_0002_B.csv", [SMITH_2]), COLUMNS, index, stale)
+    manifest["parts"].append(new)
+    assert new["rows"] == 1 and new["upserts"] == 1
+    assert stale == {old["key"]: {"101"}}
+    assert index["id:101|2023"][1] == new["key"]
+
+    assert preprocessing.rewrite_stale_parts(manifest, index, stale) == 1
+    assert len(part_lines(s3, old["key"])) == 1
+    assert part_lines(s3, preprocessing.keys_key_for(old["key"])) == ["id:100|2023"]
+    assert old["rows"] == 1 and old in manifest["parts"]
+
+
+def test_upsert_of_the_only_row_drops_the_part(s3):
+    index, stale = {}, {}
+    old = preprocessing.write_part(put_raw(s3, "team_0001_A.csv", [SMITH]), COLUMNS, index, stale)
+    new = preprocessing.write_part(put_raw(s3, "team_0002_B.csv", [SMITH_2]), COLUMNS, index, stale)
+    manifest = {"columns": COLUMNS, "parts": [old, new]}
+
+    preprocessing.rewrite_stale_parts(manifest, index, stale)
+    assert part_lines(s3, old["key"]) is None
+    assert manifest["parts"] == [new]
+
+
+def test_rerun_is_idempotent(s3):
+    index, stale = {}, {}
+    a = put_raw(s3, "team_0001_A.csv", [GOMEZ, SMITH])
+    b = put_raw(s3, "team_0002_B.csv", [SMITH_2])
+    parts = [preprocessing.write_part(obj, COLUMNS, index, stale) for obj in (a, b)]
+    manifest = {"columns": COLUMNS, "parts": parts}
+    preprocessing.rewrite_stale_parts(manifest, index, stale)
+    snapshot = dict(s3.objects), dict(index)
+
+    # archive 전에 끊겨 같은 원본을 같은 순서로 다시 처리 → 같은 part 키, 정리 후 같은 내용
+    stale = {}
+    again = [preprocessing.write_part(obj, COLUMNS, index, stale) for obj in (a, b)]
+    assert [p["key"] for p in again] == [p["key"] for p in parts]
+    preprocessing.rewrite_stale_parts(manifest, index, stale)
+    assert dict(s3.objects) == snapshot[0]
+    assert index == snapshot[1]
+
+
+def manifest_parts(s3):
+    return [p["key"] for p in preprocessing.load_manifest()["parts"]]
+
+
+def test_manifest_skips_an_unchanged_raw_file_and_reprocesses_a_changed_one(s3):
+    raw = put_raw(s3, "team_0001_A.csv", [GOMEZ, SMITH])["Key"]
+    assert "1 parts added" in preprocessing.lambda_handler({}, None)["body"]
+    parts = manifest_parts(s3)
+    part  = s3.objects[(preprocessing.BUCKET, parts[0])]
+    assert len(parts) == 1 and (preprocessing.BUCKET, raw) not in s3.objects
+
+    # archive 전에 끊긴 것처럼 같은 원본이 다시 보임 → 같은 (키, ETag) 의 part 는 이미 manifest 에 있음
+    put_raw(s3, "team_0001_A.csv", [GOMEZ, SMITH])
+    assert "0 parts added" in preprocessing.lambda_handler({}, None)["body"]
+    assert manifest_parts(s3) == parts
+    assert s3.objects[(preprocessing.BUCKET, parts[0])] == part
+
+    # 같은 키에 내용이 바뀐 원본 → ETag 가 달라 새 part 로 다시 처리, 밀려난 행은 예전 part 에서 빠짐
+    put_raw(s3, "team_0001_A.csv", [GOMEZ, SMITH_2])
+    assert "1 duplicate rows skipped, 1 rows updated" in preprocessing.lambda_handler({}, None)["body"]
+    changed = manifest_parts(s3)
+    assert len(changed) == 2 and changed[0] == parts[0]
+    assert len(part_lines(s3, parts[0])) == 1
+    assert part_lines(s3, preprocessing.keys_key_for(changed[1])) == ["id:101|2023"]
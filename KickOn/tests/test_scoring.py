@@ -0,0 +1,69 @@
+"""scoring — 손으로 계산한 AUC / 보정 값, 격자 평가가 예전 임계값 하나짜리 정확도 루프와 같은지"""
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+import scoring
+
+
+def pairwise_auc(y, scores):
+    """양성-음성 쌍마다 양성이 크면 1, 같으면 0.5"""
+    pos = [s for s, t in zip(scores, y) if t]
+    neg = [s for s, t in zip(scores, y) if not t]
+    return sum(1.0 if p > n else 0.5 if p == n else 0.0 for p in pos for n in neg) / (len(pos) * len(neg))
+
+
+def test_roc_auc_with_ties_matches_hand_computed_value():
+    y      = [0, 0, 1, 1, 0, 1]
+    scores = [0.1, 0.4, 0.4, 0.8, 0.8, 0.9]
+    # 양성 0.4 → 1 + 0.5, 0.8 → 2 + 0.5, 0.9 → 3  ⇒  7 / 9
+    auc = scoring.roc_auc(y, np.array([scores]))
+    assert auc[0] == pytest.approx(7 / 9)
+    assert auc[0] == pytest.approx(pairwise_auc(y, scores))
+
+
+def test_roc_auc_per_weight_row_and_single_class():
+    y     = [1, 0, 1, 0]
+    probs = np.array([[0.9, 0.1, 0.8, 0.2],      # 완벽
+                      [0.1, 0.9, 0.2, 0.8],      # 완전히 반대
+                      [0.5, 0.5, 0.5, 0.5]])     # 모두 동점
+    assert scoring.roc_auc(y, probs).tolist() == pytest.approx([1.0, 0.0, 0.5])
+    assert np.isnan(scoring.roc_auc([1, 1], np.array([[0.2, 0.3]]))).all()
+
+
+def test_calibration_bins_and_ece():
+    cal = scoring.calibration([0, 1, 1, 0], [0.05, 0.15, 0.95, 1.0])
+    assert cal["bins"] == [
+        {"range": [0.0, 0.1], "count": 1, "mean_pred": 0.05,  "frac_pos": 0.0},
+        {"range": [0.1, 0.2], "count": 1, "mean_pred": 0.15,  "frac_pos": 1.0},
+        {"range": [0.9, 1.0], "count": 2, "mean_pred": 0.975, "frac_pos": 0.5},
+    ]
+    # (1·0.05 + 1·0.85 + 2·0.475) / 4
+    assert cal["ece"] == pytest.approx(0.4625)
+
+
+def test_best_grid_point_matches_the_scalar_loop():
+    y    = [1, 0, 1, 0, 1, 0, 0]
+    base = [0.7, 0.6, 0.2, 0.1, 0.55, 0.45, 0.3]
+    ai   = [0.9, float("nan"), 0.8, 0.3, float("nan"), 0.7, 0.1]
+    weights, thresholds = [0.0, 0.25, 0.5, 1.0], [0.3, 0.5, 0.6, 0.75]
+
+    # 예전 backtest: 선수마다 combine → prob >= t 로 예측 → 정확도, 격자는 앞에서부터 처음 나온 최댓값
+    best = None
+    for w, t in itertools.product(weights, thresholds):
+        probs = [b if math.isnan(a) else scoring.combine_fixed(b, a, w) for b, a in zip(base, ai)]
+        acc   = sum(int(p >= t) == label for p, label in zip(probs, y)) / len(y)
+        if best is None or acc > best[0]:
+            best = (acc, w, t)
+
+    out = scoring.evaluate(y, base, ai, weights, thresholds, default_w=0.25, default_t=0.5)
+    assert (out["best"]["accuracy"], out["best"]["w"], out["best"]["threshold"]) == pytest.approx(
+        (round(best[0], 4), best[1], best[2]))
+    assert out["with_news"] == 5 and out["positives"] == 3
+
+    probs = [b if math.isnan(a) else scoring.combine_fixed(b, a, 0.25) for b, a in zip(base, ai)]
+    assert out["default"]["accuracy"] == pytest.approx(
+        round(sum(int(p >= 0.5) == label for p, label in zip(probs, y)) / len(y), 4))
+    assert out["default"]["roc_auc"] == pytest.approx(round(pairwise_auc(y, probs), 4))
@@ -0,0 +1,57 @@
+"""title_store — 정확히 같은 / 거의 같은 제목 거르기, 오래된 제목 삭제"""
+import pytest
+
+import title_store
+
+TITLE = "손흥민의 EPL 최다 골 기록은?"
+
+
+@pytest.fixture
+def store():
+    s = title_store.TitleStore()
+    s.add(TITLE)
+    return s
+
+
+def test_exact_duplicate_ignores_spacing_case_and_punctuation(store):
+    hit = store.check("  손흥민의 epl 최다골 기록은!! ")
+    assert hit == {"match": "exact", "title": TITLE, "score": 1.0}
+
+
+@pytest.mark.parametrize("title", ["손흥민의 EPL 최다골 기록은 몇 골?",   # 꼬리 추가
+                                   "손흥민 EPL 최다 골 기록은?"])        # 조사 빠짐
+def test_near_duplicate_is_rejected(store, title):
+    hit = store.check(title)
+    assert hit is not None and hit["match"] == "near" and hit["title"] == TITLE
+    assert title_store.NEAR_DUP <= hit["score"] < 1.0
+
+
+@pytest.mark.parametrize("title", ["손흥민 EPL 통산 도움 기록은?",           # 같은 선수, 다른 질문
+                                   "아스널의 최근 이적 시장 소식은?"])
+def test_distinct_title_is_accepted(store, title):
+    grams = title_store.shingles(title_store.normalize(title))
+    assert title_store.jaccard(grams, title_store.shingles(title_store.normalize(TITLE))) < title_store.NEAR_DUP
+    assert store.check(title) is None
+
+
+def test_oldest_titles_are_evicted(monkeypatch):
+    monkeypatch.setattr(title_store, "MAX_TITLES", 3)
+    s = title_store.TitleStore()
+    titles = ["아스널 우승 확률은?", "첼시 새 감독은 누구?", "리버풀 최다 득점자는?", "토트넘 주장은 누구?"]
+    for t in titles:
+        s.add(t)
+
+    assert len(s) == 3 and s.recent(10) == titles[1:]
+    assert s.check(titles[0]) is None
+    assert s.check(titles[-1])["match"] == "exact"
+    # 밀려난 제목은 밴드 색인에도 남지 않음
+    evicted = title_store.title_hash(titles[0])
+    assert all(evicted not in members for members in s.by_band.values())
+
+
+def test_saved_store_round_trips(tmp_path, store):
+    path = str(tmp_path / "titles.json")
+    title_store.save(store, path)
+    loaded = title_store.load(path)
+    assert len(loaded) == 1
+    assert loaded.check("손흥민 EPL 최다 골 기록은?")["match"] == "near"